@@ -1,14 +1,55 @@
 import requests
-import json
-from typing import Dict, Optional, List
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Optional, List, Tuple, Union
+from requests.adapters import HTTPAdapter
 
+from config import ConfigRegistry, get_registry
+from attachments import Attachment, AttachmentCache, streaming_body
+from batching import BatchCoalescer
+from breaker import CircuitBreakers, CircuitOpenError
+from deadline import Deadline, DeadlineExceeded, capped_timeout
+from idempotency import SubmissionStore, idempotency_key
+from instrumentation import (OUTCOME_CIRCUIT_OPEN, OUTCOME_CREATED, OUTCOME_DEDUPLICATED,
+                             OUTCOME_ERROR, OUTCOME_IN_PROGRESS, OUTCOME_REJECTED, Metrics,
+                             get_logger, log_event)
+from outbox import Outbox, outbox_row
+from payloads import build_candidate, dumps, template_for
+from preflight import validate_batch
+from ratelimit import RateLimiter
+from retry import RetryEngine
+from tracing import Span, Tracer, take_connect_time, time_connections
 
-class ATSApplicationCreator:
+
+KNIT_APPLICATION_URL = "https://api.getknit.dev/v1.0/ats.application.create"
+
+logger = get_logger("apply")
+
+# (connect, read) timeout in seconds used when none is given
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+class ATSPayloadBuilder:
     """
-    Create applications across ALL ATS platforms using Knit API
-    Dynamically supports any ATS platform added to the configuration
+    Load ATS configurations and build Knit application requests
+    Shared by the blocking and asyncio clients so both send identical payloads
     """
     
+    # Optional SubmissionStore used to short-circuit repeat submissions
+    dedup_store: Optional[SubmissionStore] = None
+    
+    # Optional AttachmentCache reusing encoded attachments and remote file references
+    attachment_cache: Optional[AttachmentCache] = None
+    
+    # Idempotency key namespace, set per tenant when creators for several Knit
+    # accounts share one dedup store
+    tenant_id: Optional[str] = None
+    
+    # Seconds, or (connect, read) tuple, for ATS platforms without a 'timeout' block
+    timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT
+    
     def __init__(self, api_key: str, config_file: str = "ats_config.json"):
         """
         Initialize with API key and load ATS configurations from JSON file
@@ -18,21 +59,11 @@ class ATSApplicationCreator:
             config_file: Path to JSON file containing ATS configurations
         """
         self.api_key = api_key
-        self.base_url = "https://api.getknit.dev/v1.0/ats.application.create"
         self.config_file = config_file
         
-        # Load ATS configurations from JSON file
-        try:
-            with open(config_file, 'r') as f:
-                self.ats_configs = json.load(f)
-            print(f"✓ Loaded configurations for {len(self.ats_configs)} ATS platforms")
-        except FileNotFoundError:
-            print(f"\n❌ Error: Configuration file '{config_file}' not found!")
-            print(f"Please create '{config_file}' manually with your ATS configurations.")
-            raise
-        except json.JSONDecodeError:
-            print(f"\n❌ Error: Invalid JSON in configuration file '{config_file}'")
-            raise
+        # Parsed once per process and shared by every creator; edits to the
+        # file are picked up without a restart
+        self.ats_configs: ConfigRegistry = get_registry(config_file)
     
     def get_candidate_payload(self, 
                             first_name: str,
@@ -54,60 +85,385 @@ class ATSApplicationCreator:
                             permanent_address: Dict = None,
                             links: List[Dict] = None) -> Dict:
         """Generate candidate object with provided details"""
-        candidate = {
-            "firstName": first_name,
-            "lastName": last_name,
-            "phones": [
-                {
-                    "type": "PERSONAL",
-                    "phoneNumber": phone
-                }
-            ],
-            "emails": [
-                {
-                    "type": "PERSONAL",
-                    "email": email
-                }
-            ]
-        }
+        return build_candidate(
+            first_name, last_name, email, phone, title, company,
+            degree, major, institute, currently_pursuing,
+            address_line1, city, state, country, zip_code,
+            work_address, permanent_address, links
+        )
+    
+    def build_application_request(self,
+                                  ats_name: str,
+                                  job_id: str,
+                                  initial_stage_id: str,
+                                  first_name: str,
+                                  last_name: str,
+                                  email: str,
+                                  phone: str,
+                                  candidate_id: str = None,
+                                  title: str = None,
+                                  company: str = None,
+                                  degree: str = None,
+                                  major: str = None,
+                                  institute: str = None,
+                                  currently_pursuing: bool = None,
+                                  address_line1: str = None,
+                                  city: str = None,
+                                  state: str = None,
+                                  country: str = None,
+                                  zip_code: str = None,
+                                  work_address: Dict = None,
+                                  permanent_address: Dict = None,
+                                  links: List[Dict] = None,
+                                  answers: Optional[List[Dict]] = None,
+                                  metadata: Optional[Dict] = None,
+                                  attachment: Optional[Union[Dict, Attachment]] = None,
+                                  source: str = None) -> Tuple[Dict, Dict, Dict]:
+        """
+        Validate the ATS and build the payload and headers for one application
+        
+        Takes the same arguments as ATSApplicationCreator.create_application.
+        
+        Returns:
+            (ats config, payload, headers)
+        """
+        
+        if ats_name not in self.ats_configs:
+            raise ValueError(f"ATS '{ats_name}' not found in configuration. "
+                           f"Available: {list(self.ats_configs.keys())}\n"
+                           f"Use add_ats_to_config() to add new ATS platforms.")
+        
+        config = self.ats_configs[ats_name]
+        
+        # Payload and static headers come from the ATS's precompiled template
+        template = template_for(config)
+        payload = template.build(
+            job_id, initial_stage_id, first_name, last_name, email, phone,
+            candidate_id, title, company, degree, major, institute,
+            currently_pursuing, address_line1, city, state, country, zip_code,
+            work_address, permanent_address, links, answers, metadata,
+            attachment, source
+        )
+        headers = template.headers(self.api_key)
+        if config.get("supports_idempotency_key"):
+            headers["Idempotency-Key"] = idempotency_key(ats_name, job_id, email,
+                                                         self.tenant_id or "")
+        
+        return config, payload, headers
+    
+    def begin_submission(self, ats_name: str, job_id: str, email: str,
+                         headers: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Check the dedup store before sending an application
+        
+        Returns:
+            (idempotency key, previous result). The key is None when no dedup
+            store is configured; a previous result means the application must
+            not be sent again: either the stored result of the created
+            application, marked 'deduplicated', or an 'in_progress' error
+            result while another caller is still sending it.
+        """
+        if self.dedup_store is None:
+            return None, None
+        key = headers.get("Idempotency-Key") or idempotency_key(ats_name, job_id, email,
+                                                                self.tenant_id or "")
+        previous = self.dedup_store.begin(key, ats_name, job_id)
+        if previous is not None and previous.get("in_progress"):
+            # Not a duplicate of a finished submission; it may still fail
+            self.metrics.record(ats_name, OUTCOME_IN_PROGRESS)
+            log_event(logger, logging.INFO, "application.in_progress", ats=ats_name, job_id=job_id)
+            return key, previous
+        if previous is not None:
+            self.metrics.record(ats_name, OUTCOME_DEDUPLICATED)
+            log_event(logger, logging.INFO, "application.deduplicated", ats=ats_name, job_id=job_id)
+            return key, dict(previous, deduplicated=True)
+        return key, None
+    
+    def record_result(self, ats_name: str, job_id: str, result: Dict,
+                      started: float, responded: bool = True):
+        """
+        Count a sent application and log its outcome
+        
+        Args:
+            ats_name: ATS the application was sent to
+            job_id: Job applied for
+            result: Response dictionary returned to the caller
+            started: time.perf_counter() when the request was built
+            responded: False when no response was received (connection, timeout)
+        """
+        seconds = time.perf_counter() - started
+        if result.get("success") == "true" or result.get("success") is True:
+            outcome = OUTCOME_CREATED
+            data = result.get("data") or {}
+            log_event(logger, logging.INFO, "application.created", ats=ats_name, job_id=job_id,
+                      application_id=data.get("applicationId"),
+                      candidate_id=data.get("candidateId"), latency_ms=seconds * 1000)
+        elif responded:
+            outcome = OUTCOME_REJECTED
+            log_event(logger, logging.WARNING, "application.rejected", ats=ats_name,
+                      job_id=job_id, result=result, latency_ms=seconds * 1000)
+        else:
+            outcome = OUTCOME_ERROR
+            log_event(logger, logging.ERROR, "application.error", ats=ats_name,
+                      job_id=job_id, error=result.get("error"), latency_ms=seconds * 1000)
+        self.metrics.record(ats_name, outcome, seconds)
+    
+    def timeouts(self, ats_name: str) -> Tuple[float, float]:
+        """
+        (connect, read) timeout of one attempt to an ATS
+        
+        The ATS's 'timeout' block in ats_config.json overrides the creator's
+        timeout per field:
         
-        # Add optional fields
-        if title:
-            candidate["title"] = title
-        if company:
-            candidate["company"] = company
-        if links:
-            candidate["links"] = links
-        
-        # Add education if provided
-        if degree or major or institute:
-            candidate["education"] = [
-                {
-                    "id": "1",
-                    "degree": degree or "bachelors degree",
-                    "currentlyPursuing": currently_pursuing if currently_pursuing is not None else True,
-                    "major": major or "General",
-                    "institute": institute or "University"
-                }
-            ]
-        
-        # Add addresses
-        if any([address_line1, city, state, country, zip_code]):
-            candidate["presentAddress"] = {
-                "addressLine1": address_line1 or "",
-                "city": city or "",
-                "state": state or "",
-                "country": country or "",
-                "zipCode": zip_code or ""
-            }
-        
-        if work_address:
-            candidate["workAddress"] = work_address
-        
-        if permanent_address:
-            candidate["permanentAddress"] = permanent_address
-        
-        return candidate
+            "timeout": {"connect": 3.05, "read": 30, "total": 60}
+        """
+        default = self.timeout if isinstance(self.timeout, tuple) else (self.timeout, self.timeout)
+        block = self.ats_configs[ats_name].get("timeout") or {}
+        return block.get("connect", default[0]), block.get("read", default[1])
+    
+    def call_deadline(self, ats_name: str,
+                      deadline: Union[None, float, Deadline] = None) -> Optional[Deadline]:
+        """The caller's deadline, tightened by the ATS's 'timeout.total' budget"""
+        # Unknown ATS names are reported by build_application_request
+        config = self.ats_configs.get(ats_name) or {}
+        total = (config.get("timeout") or {}).get("total")
+        return Deadline.earliest(Deadline.coerce(deadline), Deadline(total) if total else None)
+    
+    def circuit_open_result(self, error: CircuitOpenError) -> Dict:
+        """Count an application refused by an open circuit and build its error result"""
+        self.metrics.record(error.ats_name, OUTCOME_CIRCUIT_OPEN)
+        log_event(logger, logging.WARNING, "application.circuit_open", ats=error.ats_name,
+                  retry_in=error.retry_in)
+        return {"success": False, "error": str(error), "circuit_open": True,
+                "retry_in": error.retry_in}
+    
+    def breaker_state(self, ats_name: Optional[str] = None) -> Dict:
+        """
+        Circuit breaker state of one ATS, or of every configured ATS
+        
+        Returns:
+            {"state": closed|open|half_open, "failures", "retry_in",
+             "times_opened", "integration_id"}, or a dict of those keyed by
+            ATS name when ats_name is omitted
+        """
+        if ats_name is not None:
+            return self.breakers.state(ats_name)
+        return self.breakers.states()
+    
+    def reset_breaker(self, ats_name: str):
+        """Close an ATS's circuit by hand, e.g. after fixing its integration_id"""
+        self.breakers.reset(ats_name)
+    
+    def prometheus_metrics(self) -> str:
+        """Application and retry metrics in the Prometheus text format"""
+        return self.metrics.prometheus(self.retry_engine.metrics.snapshot())
+    
+    def _reference_scope(self, config: Dict) -> str:
+        """Remote file ids belong to one integration of one Knit account"""
+        if self.tenant_id:
+            return f"{self.tenant_id}/{config['integration_id']}"
+        return config["integration_id"]
+    
+    def prepare_attachment(self, config: Dict, payload: Dict) -> Optional[str]:
+        """
+        Swap the payload's Attachment for its cached encoding or a remote reference
+        
+        Returns:
+            Digest of attachment content about to be uploaded (pass it to
+            remember_attachment), or None when nothing is uploaded
+        """
+        attachment = payload.get("attachment")
+        if self.attachment_cache is None or not isinstance(attachment, Attachment):
+            return None
+        attachment = self.attachment_cache.encode(attachment)
+        digest = attachment.digest
+        if config.get("supports_attachment_reference"):
+            reference = self.attachment_cache.reference(self._reference_scope(config), digest)
+            if reference is not None:
+                payload["attachment"] = attachment.to_reference(reference)
+                return None
+        payload["attachment"] = attachment
+        return digest
+    
+    def remember_attachment(self, config: Dict, digest: Optional[str], result: Dict):
+        """Keep the remote file id from a successful upload for later reuse"""
+        if not digest or not config.get("supports_attachment_reference"):
+            return
+        data = result.get("data") or {}
+        reference = data.get(config.get("attachment_reference_field", "attachmentId"))
+        if reference:
+            self.attachment_cache.remember_reference(self._reference_scope(config), digest,
+                                                     reference)
+    
+    @staticmethod
+    def application_kwargs(data: Dict) -> Dict:
+        """
+        Map an application data dictionary to create_application keyword arguments
+        
+        An 'attachment_path' entry (e.g. from a bulk JSONL/CSV row) becomes a
+        streamed Attachment.
+        
+        Args:
+            data: Dictionary containing all application data
+        
+        Returns:
+            Keyword arguments (everything except ats_name)
+        """
+        return dict(
+            job_id=data["job_id"],
+            initial_stage_id=data["initial_stage_id"],
+            first_name=data["first_name"],
+            last_name=data["last_name"],
+            email=data["email"],
+            phone=data["phone"],
+            candidate_id=data.get("candidate_id"),
+            title=data.get("title"),
+            company=data.get("company"),
+            degree=data.get("degree"),
+            major=data.get("major"),
+            institute=data.get("institute"),
+            currently_pursuing=data.get("currently_pursuing"),
+            address_line1=data.get("address_line1"),
+            city=data.get("city"),
+            state=data.get("state"),
+            country=data.get("country"),
+            zip_code=data.get("zip_code"),
+            work_address=data.get("work_address"),
+            permanent_address=data.get("permanent_address"),
+            links=data.get("links"),
+            answers=data.get("answers"),
+            metadata=data.get("metadata"),
+            attachment=(Attachment(data["attachment_path"]) if data.get("attachment_path")
+                        else data.get("attachment")),
+            source=data.get("source")
+        )
+    
+    def list_configured_ats(self):
+        """List all configured ATS platforms"""
+        print("\n📋 Configured ATS Platforms:")
+        for ats_name, config in self.ats_configs.items():
+            status = "✓" if config["integration_id"] != f"YOUR_{ats_name.upper()}_INTEGRATION_ID" else "⚠"
+            print(f"   {status} {ats_name}")
+            print(f"      Integration ID: {config['integration_id']}")
+            print(f"      Requires Candidate Object: {config.get('requires_candidate_object', False)}")
+            if config.get('notes'):
+                print(f"      Notes: {config['notes']}")
+        print(f"\nTotal: {len(self.ats_configs)} ATS platforms configured")
+
+
+class ATSApplicationCreator(ATSPayloadBuilder):
+    """
+    Create applications across ALL ATS platforms using Knit API
+    Dynamically supports any ATS platform added to the configuration
+    """
+    
+    def __init__(self, api_key: str, config_file: str = "ats_config.json",
+                 base_url: str = KNIT_APPLICATION_URL,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_engine: Optional[RetryEngine] = None,
+                 dedup_store: Optional[SubmissionStore] = None,
+                 attachment_cache: Optional[AttachmentCache] = None,
+                 outbox: Optional[Outbox] = None,
+                 metrics: Optional[Metrics] = None,
+                 tracer: Optional[Tracer] = None,
+                 breakers: Optional[CircuitBreakers] = None,
+                 coalescer: Optional[BatchCoalescer] = None):
+        """
+        Initialize with API key and load ATS configurations from JSON file
+        
+        Args:
+            api_key: Your Knit API key
+            config_file: Path to JSON file containing ATS configurations
+            base_url: Application create endpoint (override for stubs/proxies)
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum connections kept open per host
+            pool_block: Block when the pool is exhausted instead of opening
+                        throwaway connections
+            keep_alive: Reuse connections between calls (False sends
+                        'Connection: close' on every request)
+            timeout: Seconds, or (connect, read) tuple, for every request
+            session: Existing requests.Session to share (not closed by us)
+            rate_limiter: Existing RateLimiter to share (defaults to one built
+                          from the 'rate_limit' blocks in the config file)
+            retry_engine: Existing RetryEngine to share (defaults to one built
+                          from the 'retry' blocks in the config file)
+            dedup_store: SubmissionStore recording outcomes by idempotency key;
+                         repeat submissions of a created application return
+                         the stored result without a network call
+            attachment_cache: AttachmentCache shared by calls (and creators) so
+                              repeated resumes are encoded/uploaded once
+            outbox: Durable queue that enqueue_application() writes to;
+                    outbox_worker.py processes send the queued applications
+            metrics: Existing Metrics to share (outcome counters and latency
+                     histograms per ATS)
+            tracer: Tracer timing each phase of every call and running its
+                    hooks (connection setup is only timed on a session
+                    owned by this creator)
+            breakers: Existing CircuitBreakers to share (defaults to one built
+                      from the 'circuit_breaker' blocks in the config file)
+            coalescer: BatchCoalescer grouping submissions to ATS platforms
+                       with a 'batch' block into batch requests
+        """
+        super().__init__(api_key, config_file)
+        self.base_url = base_url
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.rate_limiter = rate_limiter or RateLimiter(self.ats_configs)
+        self.retry_engine = retry_engine or RetryEngine(self.ats_configs)
+        self.dedup_store = dedup_store
+        self.attachment_cache = attachment_cache
+        self.outbox = outbox
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer
+        self.breakers = breakers or CircuitBreakers(self.ats_configs)
+        self.coalescer = coalescer
+        
+        # One long-lived session so every call reuses pooled connections
+        # instead of paying a TCP + TLS handshake per application
+        self._owns_session = session is None
+        self.session = session if session is not None else self._build_session(
+            pool_connections, pool_maxsize, pool_block
+        )
+        if tracer is not None and self._owns_session:
+            for adapter in self.session.adapters.values():
+                time_connections(adapter)
+        
+        # Per-integration concurrency caps for bulk submissions
+        self._semaphores: Dict[str, Tuple[int, threading.BoundedSemaphore]] = {}
+        self._semaphores_lock = threading.Lock()
+    
+    @staticmethod
+    def _build_session(pool_connections: int, pool_maxsize: int,
+                       pool_block: bool) -> requests.Session:
+        """Create a session whose adapters keep a pool of open connections"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def close(self):
+        """Close pooled connections (only if the session is owned by this creator)"""
+        if self._owns_session:
+            self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
     
     def create_application(self, 
                           ats_name: str,
@@ -134,8 +490,9 @@ class ATSApplicationCreator:
                           links: List[Dict] = None,
                           answers: Optional[List[Dict]] = None,
                           metadata: Optional[Dict] = None,
-                          attachment: Optional[Dict] = None,
-                          source: str = None) -> Dict:
+                          attachment: Optional[Union[Dict, Attachment]] = None,
+                          source: str = None,
+                          deadline: Optional[Union[float, Deadline]] = None) -> Dict:
         """
         Create an application in ANY specified ATS
         
@@ -164,172 +521,495 @@ class ATSApplicationCreator:
             links: List of social/web links (optional)
             answers: List of question answers (optional)
             metadata: Additional metadata (optional)
-            attachment: Resume/file attachment (optional)
+            attachment: Resume/file attachment, either a ready dict or an
+                        Attachment that is base64-streamed from disk (optional)
             source: Application source (optional)
+            deadline: Seconds (or a Deadline) the whole call may take,
+                      including rate-limit waits and retries (optional)
         
         Returns:
             Response dictionary from the API
         """
+        deadline = self.call_deadline(ats_name, deadline)
+        span = self.tracer.start(ats_name, job_id) if self.tracer is not None else None
+        if span is not None:
+            self.tracer.before_build(span)
+            build_started = time.perf_counter_ns()
         
-        if ats_name not in self.ats_configs:
-            raise ValueError(f"ATS '{ats_name}' not found in configuration. "
-                           f"Available: {list(self.ats_configs.keys())}\n"
-                           f"Use add_ats_to_config() to add new ATS platforms.")
-        
-        config = self.ats_configs[ats_name]
-        
-        # Build payload
-        payload = {
-            "jobId": job_id,
-            "initialStageId": initial_stage_id
-        }
+        config, payload, headers = self.build_application_request(
+            ats_name=ats_name,
+            job_id=job_id,
+            initial_stage_id=initial_stage_id,
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone,
+            candidate_id=candidate_id,
+            title=title,
+            company=company,
+            degree=degree,
+            major=major,
+            institute=institute,
+            currently_pursuing=currently_pursuing,
+            address_line1=address_line1,
+            city=city,
+            state=state,
+            country=country,
+            zip_code=zip_code,
+            work_address=work_address,
+            permanent_address=permanent_address,
+            links=links,
+            answers=answers,
+            metadata=metadata,
+            attachment=attachment,
+            source=source
+        )
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        if span is not None:
+            span.add_phase("build", build_started)
         
-        # Add candidate ID or candidate object
-        if candidate_id:
-            payload["candidateId"] = candidate_id
-        
-        # Add candidate object (required for some ATS or if candidateId not provided)
-        if not candidate_id or config.get("requires_candidate_object"):
-            candidate = self.get_candidate_payload(
-                first_name, last_name, email, phone, title, company,
-                degree, major, institute, currently_pursuing,
-                address_line1, city, state, country, zip_code,
-                work_address, permanent_address, links
-            )
-            payload["candidate"] = candidate
-        
-        # Add optional fields
-        if answers:
-            payload["answers"] = answers
-        if metadata:
-            payload["metaData"] = json.dumps(metadata) if isinstance(metadata, dict) else metadata
-        if attachment:
-            payload["attachment"] = attachment
-        if source:
-            payload["source"] = source
-        
-        # Build headers
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-            "X-Knit-Integration-Id": config["integration_id"]
-        }
+        dedup_key, previous = self.begin_submission(ats_name, job_id, email, headers)
+        if previous is not None:
+            if span is not None:
+                span.attributes["knit.in_progress" if previous.get("in_progress")
+                                else "knit.deduplicated"] = True
+                self.tracer.finish(span, previous)
+            return previous
         
         # Make API request
+        started = time.perf_counter()
+        log_event(logger, logging.DEBUG, "application.sending", ats=ats_name, job_id=job_id)
         try:
-            print(f"\n🚀 Creating application in {ats_name.upper()}...")
-            print(f"   Job ID: {job_id}")
-            print(f"   Candidate: {first_name} {last_name} ({email})")
-            if config.get("notes"):
-                print(f"   ⚠ Note: {config['notes']}")
-            
-            response = requests.post(self.base_url, json=payload, headers=headers)
+            if span is not None:
+                attachment_started = time.perf_counter_ns()
+            attachment_digest = self.prepare_attachment(config, payload)
+            if span is not None:
+                span.add_phase("build", attachment_started)
+            response = self._send(ats_name, payload, headers, span, deadline)
             response.raise_for_status()
             
+            if span is not None:
+                parse_started = time.perf_counter_ns()
             result = response.json()
+            if span is not None:
+                span.add_phase("parse", parse_started)
+            self.remember_attachment(config, attachment_digest, result)
+            self.record_result(ats_name, job_id, result, started)
             
-            if result.get("success") == "true" or result.get("success") == True:
-                print(f"✓ Application created successfully!")
-                if "data" in result:
-                    if result['data'].get('applicationId'):
-                        print(f"   Application ID: {result['data'].get('applicationId')}")
-                    if result['data'].get('candidateId'):
-                        print(f"   Candidate ID: {result['data'].get('candidateId')}")
-                    if result['data'].get('jobId'):
-                        print(f"   Job ID: {result['data'].get('jobId')}")
-            else:
-                print(f"⚠ Application creation returned: {result}")
+            if dedup_key:
+                self.dedup_store.complete(dedup_key, result)
+            if span is not None:
+                self.tracer.finish(span, result)
+            return result
             
+        except CircuitOpenError as e:
+            # Refused locally; earlier attempts of this call may have reached Knit
+            if span is not None:
+                self.tracer.on_error(span, e)
+            result = self.circuit_open_result(e)
+            if dedup_key:
+                self.dedup_store.complete(dedup_key, result, definitive=False)
+            if span is not None:
+                self.tracer.finish(span, result)
             return result
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error creating application: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
+        except (requests.exceptions.RequestException, DeadlineExceeded) as e:
+            if span is not None:
+                self.tracer.on_error(span, e)
+            result = {"success": False, "error": str(e)}
+            if isinstance(e, DeadlineExceeded):
+                result["deadline_exceeded"] = True
+            elif isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                # Knit never answered; sending it again later may still work
+                result["no_response"] = True
+            response = getattr(e, 'response', None)
+            if response is not None:
+                result["status_code"] = response.status_code
                 try:
-                    error_data = e.response.json()
-                    print(f"   Response: {json.dumps(error_data, indent=2)}")
-                except:
-                    print(f"   Response: {e.response.text}")
-            return {"success": False, "error": str(e)}
+                    result["response"] = response.json()
+                except ValueError:
+                    result["response"] = response.text
+            self.record_result(ats_name, job_id, result, started, responded=response is not None)
+            if dedup_key:
+                # Without a response we can't know whether it was created
+                self.dedup_store.complete(dedup_key, result, definitive=response is not None)
+            if span is not None:
+                self.tracer.finish(span, result)
+            return result
+            
+        except BaseException:
+            # Let a resubmission claim the key again instead of waiting out the claim
+            if dedup_key:
+                self.dedup_store.release(dedup_key)
+            raise
     
-    def create_application_from_dict(self, ats_name: str, data: Dict) -> Dict:
+    def _send(self, ats_name: str, payload: Dict, headers: Dict,
+              span: Optional[Span] = None,
+              deadline: Optional[Deadline] = None) -> requests.Response:
+        """
+        POST one application, retrying transient failures per the ATS retry policy
+        
+        Retries 5xx/429 responses and connection errors with backoff, as long
+        as the shared retry budget allows. The rate limiter paces every attempt
+        and the integration's circuit breaker sees every outcome. With a
+        deadline, waits and socket timeouts are capped by the time left and no
+        retry is scheduled that could not finish in time.
+        
+        Raises:
+            CircuitOpenError: The integration's circuit is open
+            DeadlineExceeded: The deadline passed before an attempt could be sent
+            requests.exceptions.RequestException: If the final attempt fails to connect
+        """
+        if span is not None:
+            serialize_started = time.perf_counter_ns()
+        # Attachments are encoded chunk by chunk while the body is sent
+        body = streaming_body(payload)
+        # Otherwise serialize once; retries resend the same bytes
+        data = dumps(payload) if body is None else None
+        if span is not None:
+            span.add_phase("serialize", serialize_started)
+            self.tracer.after_serialize(span, data)
+        # Streamed attachments always go out on their own request
+        batched = body is None and self.coalescer is not None and self.coalescer.enabled(ats_name)
+        call = self.retry_engine.start(ats_name, deadline)
+        try:
+            while True:
+                # Fail fast while the integration is known to be broken
+                self.breakers.check(ats_name)
+                if span is not None:
+                    wait_started = time.perf_counter_ns()
+                reserved = False
+                try:
+                    # Waits for a token, or for an earlier Retry-After to pass
+                    delay = self.rate_limiter.reserve(ats_name, deadline)
+                    reserved = True
+                    if delay > 0:
+                        time.sleep(delay)
+                    timeout = capped_timeout(self.timeouts(ats_name), deadline)
+                except BaseException:
+                    # Not sent after all: give back the token, and a half-open
+                    # circuit its probe
+                    if reserved:
+                        self.rate_limiter.cancel(ats_name)
+                    self.breakers.cancel(ats_name)
+                    raise
+                call.start_attempt()
+                request_kwargs = {}
+                if span is not None:
+                    post_started = span.add_phase("rate_limit", wait_started)
+                    # Response hooks run once the headers are parsed, before the body is read
+                    headers_at = []
+                    request_kwargs["hooks"] = {
+                        "response": lambda r, *args, **kwargs: headers_at.append(time.perf_counter_ns())
+                    }
+                try:
+                    if batched:
+                        response = self._post_batched(ats_name, data, headers, timeout, deadline)
+                    else:
+                        response = self.session.post(self.base_url,
+                                                     data=data if body is None else body.request_data(),
+                                                     headers=headers, timeout=timeout,
+                                                     **request_kwargs)
+                except requests.exceptions.ConnectionError as e:
+                    self.breakers.observe(ats_name)
+                    if span is not None:
+                        self._trace_attempt(span, post_started, None, e)
+                    delay = call.retry_delay(transient_error=True)
+                    if delay is None:
+                        raise
+                except requests.exceptions.Timeout as e:
+                    self.breakers.observe(ats_name)
+                    if span is not None:
+                        self._trace_attempt(span, post_started, None, e)
+                    delay = call.retry_delay(timed_out=True)
+                    if delay is None:
+                        raise
+                except requests.exceptions.RequestException:
+                    # Sent but broken on the way back (e.g. a truncated body)
+                    self.breakers.observe(ats_name)
+                    raise
+                except DeadlineExceeded:
+                    # Withdrawn from its batch unsent: give back the token and probe
+                    self.rate_limiter.cancel(ats_name)
+                    self.breakers.cancel(ats_name)
+                    raise
+                except BaseException:
+                    # Interrupted without a verdict; free a half-open probe slot
+                    self.breakers.cancel(ats_name)
+                    raise
+                else:
+                    self.breakers.observe(ats_name, response.status_code)
+                    if span is not None:
+                        self._trace_attempt(span, post_started, response,
+                                            headers_at=headers_at[0] if headers_at else None)
+                    retry_after = self.rate_limiter.observe(ats_name, response.status_code,
+                                                            response.headers)
+                    delay = call.retry_delay(status_code=response.status_code,
+                                             retry_after=retry_after)
+                    if delay is None:
+                        return response
+                log_event(logger, logging.INFO, "request.retry", ats=ats_name,
+                          attempt=call.attempt + 1, delay=delay)
+                if span is not None:
+                    span.add_event("retry", attempt=call.attempt + 1, delay=delay)
+                    backoff_started = time.perf_counter_ns()
+                time.sleep(delay)
+                if span is not None:
+                    span.add_phase("backoff", backoff_started)
+        finally:
+            if span is not None:
+                span.attributes["knit.attempts"] = call.attempt
+            call.finish()
+    
+    def _post_batched(self, ats_name: str, data: bytes, headers: Dict,
+                      timeout: Tuple[float, float],
+                      deadline: Optional[Deadline]) -> requests.Response:
+        """
+        One attempt sent as part of a coalesced batch request
+        
+        Raises:
+            DeadlineExceeded: The deadline passed while the item was still
+                              waiting for its batch; it is withdrawn unsent
+            requests.exceptions.ReadTimeout: The batch was sent but not
+                                             answered within the deadline
+        """
+        future = self.coalescer.submit(ats_name, data, headers, timeout)
+        try:
+            return future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except FutureTimeout:
+            if self.coalescer.withdraw(future):
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded "
+                                       f"waiting for a {ats_name} batch") from None
+            raise requests.exceptions.ReadTimeout(
+                f"Batch response for {ats_name} not received within the deadline") from None
+    
+    def _trace_attempt(self, span: Span, started: int,
+                       response: Optional[requests.Response],
+                       error: Optional[Exception] = None,
+                       headers_at: Optional[int] = None):
+        """Split one POST into connect/server/download phases and run on_response"""
+        finished = time.perf_counter_ns()
+        connect = take_connect_time()
+        server_started = started
+        if connect is not None and connect[0] >= started:
+            server_started = span.add_phase("connect", *connect)
+        if response is None:
+            span.add_phase("server", server_started, finished)
+            span.add_event("attempt_failed", **{"exception.type": type(error).__name__})
+            return
+        if headers_at is None:
+            headers_at = finished
+        span.add_phase("server", server_started, headers_at)
+        span.add_phase("download", headers_at, finished)
+        span.attributes["http.response.status_code"] = response.status_code
+        self.tracer.on_response(span, response)
+    
+    def retry_metrics(self) -> Dict:
+        """Retry rate and retry-added latency, overall and per ATS"""
+        return self.retry_engine.metrics.snapshot()
+    
+    def create_application_from_dict(self, ats_name: str, data: Dict,
+                                     deadline: Optional[Union[float, Deadline]] = None) -> Dict:
         """
         Create application using a dictionary of parameters
         
         Args:
             ats_name: Name of the ATS platform
             data: Dictionary containing all application data
+            deadline: Seconds (or a Deadline) the call may take (optional)
         
         Returns:
             Response dictionary from the API
         """
-        return self.create_application(
-            ats_name=ats_name,
-            job_id=data["job_id"],
-            initial_stage_id=data["initial_stage_id"],
-            first_name=data["first_name"],
-            last_name=data["last_name"],
-            email=data["email"],
-            phone=data["phone"],
-            candidate_id=data.get("candidate_id"),
-            title=data.get("title"),
-            company=data.get("company"),
-            degree=data.get("degree"),
-            major=data.get("major"),
-            institute=data.get("institute"),
-            currently_pursuing=data.get("currently_pursuing"),
-            address_line1=data.get("address_line1"),
-            city=data.get("city"),
-            state=data.get("state"),
-            country=data.get("country"),
-            zip_code=data.get("zip_code"),
-            work_address=data.get("work_address"),
-            permanent_address=data.get("permanent_address"),
-            links=data.get("links"),
-            answers=data.get("answers"),
-            metadata=data.get("metadata"),
-            attachment=data.get("attachment"),
-            source=data.get("source")
-        )
+        return self.create_application(ats_name=ats_name, deadline=deadline,
+                                       **self.application_kwargs(data))
     
-    def list_configured_ats(self):
-        """List all configured ATS platforms"""
-        print("\n📋 Configured ATS Platforms:")
-        for ats_name, config in self.ats_configs.items():
-            status = "✓" if config["integration_id"] != f"YOUR_{ats_name.upper()}_INTEGRATION_ID" else "⚠"
-            print(f"   {status} {ats_name}")
-            print(f"      Integration ID: {config['integration_id']}")
-            print(f"      Requires Candidate Object: {config.get('requires_candidate_object', False)}")
-            if config.get('notes'):
-                print(f"      Notes: {config['notes']}")
-        print(f"\nTotal: {len(self.ats_configs)} ATS platforms configured")
+    def enqueue_application(self, ats_name: str, **application) -> int:
+        """
+        Queue an application in the outbox instead of sending it now
+        
+        Returns as soon as the row is stored; outbox worker processes submit
+        it later with the same limits, retries and deduplication.
+        
+        Args:
+            ats_name: Name of ATS from config file
+            **application: Arguments of create_application
+        
+        Returns:
+            Outbox id of the queued application
+        
+        Raises:
+            RuntimeError: The creator has no outbox
+            ValueError: Unknown ATS, or an attachment that cannot be stored
+        """
+        if self.outbox is None:
+            raise RuntimeError("No outbox configured; pass outbox=Outbox(...) to the creator")
+        if ats_name not in self.ats_configs:
+            raise ValueError(f"ATS '{ats_name}' not found in configuration")
+        return self.outbox.enqueue(outbox_row(ats_name, application))
+    
+    def _integration_semaphore(self, ats_name: str) -> Optional[threading.BoundedSemaphore]:
+        """
+        Get the concurrency cap for an ATS, shared by every ATS name that
+        points at the same integration_id
+        
+        Uses the optional 'max_concurrency' key from the ATS configuration.
+        Returns None when the ATS is uncapped.
+        """
+        config = self.ats_configs.get(ats_name)
+        if not config or not config.max_concurrency:
+            return None
+        
+        limit = config.max_concurrency
+        with self._semaphores_lock:
+            entry = self._semaphores.get(config.integration_id)
+            if entry is None or entry[0] != limit:
+                # New cap (or edited config): rows already in flight finish
+                # against the old semaphore
+                entry = (limit, threading.BoundedSemaphore(limit))
+                self._semaphores[config.integration_id] = entry
+        return entry[1]
     
-    def bulk_create_applications(self, applications: List[Dict]) -> List[Dict]:
+    def submit_bulk_item(self, app_data: Dict,
+                         deadline: Optional[Union[float, Deadline]] = None,
+                         slot: Optional[threading.BoundedSemaphore] = None) -> Dict:
+        """
+        Submit one bulk row, turning any failure into an error result
+        
+        Args:
+            app_data: Dict containing 'ats_name' and application data (not modified)
+            deadline: Seconds (or a Deadline) the row may take, including the
+                      wait for a 'max_concurrency' slot (optional)
+            slot: 'max_concurrency' semaphore the caller already acquired for
+                  this row; released once the row is done (optional)
+        
+        Returns:
+            Dict with 'ats_name' and 'result'
+        """
+        data = dict(app_data)
+        ats_name = data.pop("ats_name", None)
+        deadline = Deadline.coerce(deadline)
+        try:
+            semaphore = slot or self._integration_semaphore(ats_name)
+            if semaphore is None:
+                result = self.create_application_from_dict(ats_name, data, deadline)
+            else:
+                # Queue for a slot no longer than the deadline allows
+                if slot is None and not semaphore.acquire(
+                        timeout=deadline.remaining() if deadline is not None else None):
+                    raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded "
+                                           f"waiting for a {ats_name} slot")
+                try:
+                    result = self.create_application_from_dict(ats_name, data, deadline)
+                finally:
+                    semaphore.release()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+            if isinstance(e, DeadlineExceeded):
+                result["deadline_exceeded"] = True
+        return {
+            "ats_name": ats_name,
+            "result": result
+        }
+    
+    def _submit_rows(self, rows: List[Tuple[int, Dict]], results: List[Optional[Dict]],
+                     max_workers: int, deadline: Optional[Deadline] = None,
+                     call_deadline: Optional[float] = None):
+        """
+        Submit (index, row) pairs and store each item at its index in results
+        
+        Each row gets the earlier of the batch deadline and call_deadline
+        seconds from when the row is picked up.
+        """
+        def row_deadline() -> Optional[Deadline]:
+            return Deadline.earliest(deadline, Deadline.coerce(call_deadline))
+        
+        # Failures are isolated per row: a bad row becomes an error result
+        # instead of aborting the rest of the batch
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                items = executor.map(lambda app_data: self.submit_bulk_item(app_data, row_deadline()),
+                                     [app_data for _, app_data in rows])
+                for (index, _), item in zip(rows, items):
+                    results[index] = item
+            return
+        
+        for index, app_data in rows:
+            results[index] = self.submit_bulk_item(app_data, row_deadline())
+    
+    def bulk_create_applications(self, applications: List[Dict],
+                                 max_workers: int = 1,
+                                 preflight: bool = True,
+                                 max_defer: float = 0.0,
+                                 deadline: Optional[Union[float, Deadline]] = None,
+                                 call_deadline: Optional[float] = None) -> List[Dict]:
         """
         Create multiple applications across different ATS platforms
         
+        With max_workers > 1 the applications are submitted concurrently from a
+        thread pool. Each ATS can be capped further with 'max_concurrency' in
+        ats_config.json; rows for a capped ATS wait for a free slot while the
+        other ATS platforms keep flowing. Keep pool_maxsize >= max_workers so
+        every worker gets a pooled connection.
+        
+        With preflight, the whole batch is first checked locally against each
+        ATS's required/unsupported fields; rows that would be rejected get an
+        error result without an API call.
+        
+        Rows for an ATS whose circuit breaker is open fail fast with a
+        'circuit_open' result while the other ATS platforms keep flowing. With
+        max_defer, those rows are instead held back and resubmitted once their
+        circuit half-opens, for up to max_defer seconds after the first pass.
+        
+        deadline bounds the whole batch and call_deadline each row (measured
+        from when the row is picked up). Slot waits, rate-limit waits, retries
+        and socket timeouts are all capped by the time left; rows that run out
+        of time get a 'deadline_exceeded' error result.
+        
         Args:
             applications: List of dicts, each containing 'ats_name' and application data
+            max_workers: Number of applications in flight at once (1 = sequential)
+            preflight: Validate the batch before sending anything
+            max_defer: Seconds to keep retrying rows refused by an open circuit
+            deadline: Seconds (or a Deadline) for the whole batch (optional)
+            call_deadline: Seconds for each row (optional)
         
         Returns:
-            List of response dictionaries
+            List of response dictionaries, in the same order as applications
         """
-        results = []
-        print(f"\n🔄 Creating {len(applications)} applications...")
+        results: List[Optional[Dict]] = [None] * len(applications)
+        pending = list(enumerate(applications))
+        if preflight:
+            report = validate_batch(applications, self.ats_configs)
+            report.log_summary()
+            for index in report.errors:
+                results[index] = {"ats_name": applications[index].get("ats_name"),
+                                  "result": report.error_result(index)}
+            pending = [(index, app_data) for index, app_data in pending if report.is_valid(index)]
+        
+        log_event(logger, logging.INFO, "bulk.started", count=len(pending))
+        deadline = Deadline.coerce(deadline)
+        self._submit_rows(pending, results, max_workers, deadline, call_deadline)
         
-        for idx, app_data in enumerate(applications, 1):
-            print(f"\n--- Application {idx}/{len(applications)} ---")
-            ats_name = app_data.pop("ats_name")
-            result = self.create_application_from_dict(ats_name, app_data)
-            results.append({
-                "ats_name": ats_name,
-                "result": result
-            })
+        defer_until = Deadline.earliest(Deadline(max_defer), deadline)
+        while max_defer > 0:
+            deferred = [(index, app_data) for index, app_data in pending
+                        if results[index]["result"].get("circuit_open")]
+            if not deferred:
+                break
+            # Sleep until the first refused circuit is due to half-open
+            wait = max(0.05, min(self.breakers.breaker(app_data["ats_name"]).retry_in()
+                                 for _, app_data in deferred))
+            if wait >= defer_until.remaining():
+                break
+            log_event(logger, logging.INFO, "bulk.deferred", count=len(deferred), wait=wait)
+            time.sleep(wait)
+            self._submit_rows(deferred, results, max_workers, deadline, call_deadline)
+            pending = deferred
         
         return results
 
-
 # Example usage
 # if __name__ == "__main__":
 #     # Initialize with your API key
@@ -0,0 +1,528 @@
+import asyncio
+import logging
+import time
+import aiohttp
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from apply import ATSPayloadBuilder, KNIT_APPLICATION_URL, DEFAULT_TIMEOUT
+from ratelimit import RateLimiter
+from attachments import AttachmentCache, streaming_body
+from breaker import CircuitBreakers, CircuitOpenError
+from deadline import Deadline, DeadlineExceeded, capped_timeout
+from idempotency import SubmissionStore
+from instrumentation import Metrics, get_logger, log_event
+from payloads import dumps
+from preflight import validate_batch
+from retry import RetryEngine
+from tracing import Span, Tracer, aiohttp_trace_config
+
+logger = get_logger("async_apply")
+
+
+@asynccontextmanager
+async def _slot(semaphore: asyncio.Semaphore, deadline: Optional[Deadline], what: str):
+    """Hold a semaphore slot, waiting for it no longer than the deadline allows"""
+    if deadline is None:
+        async with semaphore:
+            yield
+        return
+    deadline.check(f"waiting for {what}")
+    try:
+        await asyncio.wait_for(semaphore.acquire(), deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded "
+                               f"waiting for {what}") from None
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+async def _json_body(response: aiohttp.ClientResponse) -> Dict:
+    """
+    Parse a response body as JSON, whatever its Content-Type
+
+    Raises:
+        aiohttp.ContentTypeError: The body is not valid JSON
+    """
+    try:
+        return await response.json(content_type=None)
+    except ValueError as e:
+        raise aiohttp.ContentTypeError(response.request_info, response.history,
+                                       status=response.status, message=str(e),
+                                       headers=response.headers) from e
+
+
+class AsyncATSApplicationCreator(ATSPayloadBuilder):
+    """
+    asyncio counterpart of ATSApplicationCreator
+    Builds the same payloads and keeps hundreds of Knit requests in flight
+    on a single event loop
+    """
+
+    def __init__(self, api_key: str, config_file: str = "ats_config.json",
+                 base_url: str = KNIT_APPLICATION_URL,
+                 max_in_flight: int = 200,
+                 limit_per_host: int = 0,
+                 keepalive_timeout: float = 30.0,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_engine: Optional[RetryEngine] = None,
+                 dedup_store: Optional[SubmissionStore] = None,
+                 attachment_cache: Optional[AttachmentCache] = None,
+                 metrics: Optional[Metrics] = None,
+                 tracer: Optional[Tracer] = None,
+                 breakers: Optional[CircuitBreakers] = None):
+        """
+        Initialize with API key and load ATS configurations from JSON file
+
+        Args:
+            api_key: Your Knit API key
+            config_file: Path to JSON file containing ATS configurations
+            base_url: Application create endpoint (override for stubs/proxies)
+            max_in_flight: Maximum concurrent requests across all ATS platforms
+            limit_per_host: Maximum open connections per host (0 = max_in_flight)
+            keepalive_timeout: Seconds an idle pooled connection is kept open
+            timeout: Seconds, or (connect, read) tuple, for every request
+            session: Existing aiohttp.ClientSession to share (not closed by us)
+            rate_limiter: Existing RateLimiter to share (defaults to one built
+                          from the 'rate_limit' blocks in the config file)
+            retry_engine: Existing RetryEngine to share (defaults to one built
+                          from the 'retry' blocks in the config file)
+            dedup_store: SubmissionStore recording outcomes by idempotency key;
+                         repeat submissions of a created application return
+                         the stored result without a network call
+            attachment_cache: AttachmentCache shared by calls (and creators) so
+                              repeated resumes are encoded/uploaded once
+            metrics: Existing Metrics to share (outcome counters and latency
+                     histograms per ATS)
+            tracer: Tracer timing each phase of every call and running its
+                    hooks (connection setup is only timed on a session
+                    owned by this creator)
+            breakers: Existing CircuitBreakers to share (defaults to one built
+                      from the 'circuit_breaker' blocks in the config file)
+        """
+        super().__init__(api_key, config_file)
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter(self.ats_configs)
+        self.retry_engine = retry_engine or RetryEngine(self.ats_configs)
+        self.dedup_store = dedup_store
+        self.attachment_cache = attachment_cache
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer
+        self.breakers = breakers or CircuitBreakers(self.ats_configs)
+
+        # The session is created lazily because it must belong to a running loop
+        self._owns_session = session is None
+        self._session = session
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._semaphores: Dict[str, Tuple[int, asyncio.Semaphore]] = {}
+
+    def _client_timeout(self) -> aiohttp.ClientTimeout:
+        """Translate a requests-style timeout into an aiohttp ClientTimeout"""
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=self.timeout)
+
+    def _attempt_timeout(self, ats_name: str, deadline: Optional[Deadline]) -> aiohttp.ClientTimeout:
+        """
+        ClientTimeout of one attempt: the ATS's connect/read timeouts, with
+        the total capped by what is left of the deadline
+
+        Raises:
+            DeadlineExceeded: Nothing is left of the deadline
+        """
+        connect, read = capped_timeout(self.timeouts(ats_name), deadline)
+        total = None if isinstance(self.timeout, tuple) else self.timeout
+        if deadline is not None:
+            total = min(total or deadline.remaining(), deadline.remaining())
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read, total=total)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Pooled session shared by every request made by this creator"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_in_flight,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            trace_configs = [aiohttp_trace_config()] if self.tracer is not None else None
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=self._client_timeout(),
+                                                  trace_configs=trace_configs)
+        return self._session
+
+    async def close(self):
+        """Close pooled connections (only if the session is owned by this creator)"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    async def create_application(self,
+                                 ats_name: str,
+                                 job_id: str,
+                                 initial_stage_id: str,
+                                 first_name: str,
+                                 last_name: str,
+                                 email: str,
+                                 phone: str,
+                                 deadline: Optional[Union[float, Deadline]] = None,
+                                 **kwargs) -> Dict:
+        """
+        Create an application in ANY specified ATS
+
+        Takes the same arguments as ATSApplicationCreator.create_application.
+        The deadline also bounds the wait for one of the max_in_flight slots.
+
+        Returns:
+            Response dictionary from the API
+        """
+        deadline = self.call_deadline(ats_name, deadline)
+        span = self.tracer.start(ats_name, job_id) if self.tracer is not None else None
+        if span is not None:
+            self.tracer.before_build(span)
+            build_started = time.perf_counter_ns()
+        config, payload, headers = self.build_application_request(
+            ats_name, job_id, initial_stage_id, first_name, last_name, email, phone,
+            **kwargs
+        )
+        if span is not None:
+            span.add_phase("build", build_started)
+
+        # SQLite and file I/O run on worker threads so they never stall the loop
+        dedup_key, previous = await asyncio.to_thread(self.begin_submission,
+                                                      ats_name, job_id, email, headers)
+        if previous is not None:
+            if span is not None:
+                span.attributes["knit.in_progress" if previous.get("in_progress")
+                                else "knit.deduplicated"] = True
+                self.tracer.finish(span, previous)
+            return previous
+
+        definitive = True
+        started = time.perf_counter()
+        try:
+            async with _slot(self._in_flight, deadline, "an in-flight slot"):
+                started = time.perf_counter()
+                log_event(logger, logging.DEBUG, "application.sending", ats=ats_name, job_id=job_id)
+                if span is not None:
+                    attachment_started = time.perf_counter_ns()
+                attachment_digest = await asyncio.to_thread(self.prepare_attachment,
+                                                            config, payload)
+                if span is not None:
+                    span.add_phase("build", attachment_started)
+                result = await self._send(ats_name, payload, headers, span, deadline)
+                self.remember_attachment(config, attachment_digest, result)
+        except (aiohttp.ClientError, asyncio.TimeoutError, DeadlineExceeded) as e:
+            # Without a response we can't know whether it was created
+            definitive = False
+            result = {"success": False, "error": str(e) or type(e).__name__}
+            if isinstance(e, DeadlineExceeded):
+                result["deadline_exceeded"] = True
+            elif isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                # Knit never answered; sending it again later may still work
+                result["no_response"] = True
+            if span is not None:
+                self.tracer.on_error(span, e)
+            self.record_result(ats_name, job_id, result, started, responded=False)
+        except CircuitOpenError as e:
+            # Refused locally; earlier attempts of this call may have reached Knit
+            definitive = False
+            if span is not None:
+                self.tracer.on_error(span, e)
+            result = self.circuit_open_result(e)
+        except BaseException:
+            # Let a resubmission claim the key again instead of waiting out the claim
+            if dedup_key:
+                await asyncio.to_thread(self.dedup_store.release, dedup_key)
+            raise
+        else:
+            self.record_result(ats_name, job_id, result, started)
+        if span is not None:
+            self.tracer.finish(span, result)
+
+        if dedup_key:
+            await asyncio.to_thread(self.dedup_store.complete, dedup_key, result,
+                                    definitive=definitive)
+        return result
+
+    async def _send(self, ats_name: str, payload: Dict, headers: Dict,
+                    span: Optional[Span] = None,
+                    deadline: Optional[Deadline] = None) -> Dict:
+        """
+        POST one application, retrying transient failures per the ATS retry policy
+
+        Raises:
+            CircuitOpenError: The integration's circuit is open
+            DeadlineExceeded: The deadline passed before an attempt could be sent
+            aiohttp.ClientError, asyncio.TimeoutError: If the final attempt
+                fails, or its body is not JSON
+        """
+        if span is not None:
+            serialize_started = time.perf_counter_ns()
+        # Attachments are encoded chunk by chunk while the body is sent
+        body = streaming_body(payload)
+        if body is None:
+            request_kwargs = {"data": dumps(payload)}
+        elif body.length is not None:
+            headers = dict(headers, **{"Content-Length": str(body.length)})
+        if span is not None:
+            span.add_phase("serialize", serialize_started)
+            self.tracer.after_serialize(span, request_kwargs["data"] if body is None else None)
+        call = self.retry_engine.start(ats_name, deadline)
+        try:
+            while True:
+                # Fail fast while the integration is known to be broken
+                self.breakers.check(ats_name)
+                if span is not None:
+                    wait_started = time.perf_counter_ns()
+                reserved = False
+                try:
+                    # Waits for a token, or for an earlier Retry-After to pass
+                    delay = self.rate_limiter.reserve(ats_name, deadline)
+                    reserved = True
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    timeout = self._attempt_timeout(ats_name, deadline)
+                except BaseException:
+                    # Not sent after all (deadline, cancellation): give back the
+                    # token, and a half-open circuit its probe
+                    if reserved:
+                        self.rate_limiter.cancel(ats_name)
+                    self.breakers.cancel(ats_name)
+                    raise
+                call.start_attempt()
+                if body is not None:
+                    # A fresh iterator per attempt so retries resend the whole file
+                    request_kwargs = {"data": body.__aiter__()}
+                if span is not None:
+                    post_started = span.add_phase("rate_limit", wait_started)
+                    request_kwargs["trace_request_ctx"] = span
+                responded = False
+                try:
+                    async with self.session.post(self.base_url, headers=headers, timeout=timeout,
+                                                 **request_kwargs) as response:
+                        responded = True
+                        self.breakers.observe(ats_name, response.status)
+                        if span is not None:
+                            self._trace_headers(span, post_started, response)
+                        retry_after = self.rate_limiter.observe(ats_name, response.status,
+                                                                response.headers)
+                        delay = call.retry_delay(status_code=response.status,
+                                                 retry_after=retry_after)
+                        if delay is None:
+                            if response.status >= 400:
+                                return {
+                                    "success": False,
+                                    "error": f"{response.status} {response.reason} for url: {response.url}",
+                                    "status_code": response.status
+                                }
+                            if span is None:
+                                return await _json_body(response)
+                            download_started = time.perf_counter_ns()
+                            await response.read()
+                            parse_started = span.add_phase("download", download_started)
+                            result = await _json_body(response)
+                            span.add_phase("parse", parse_started)
+                            return result
+                except aiohttp.ConnectionTimeoutError as e:
+                    self.breakers.observe(ats_name)
+                    if span is not None:
+                        span.add_event("attempt_failed", **{"exception.type": type(e).__name__})
+                    # Never reached the server, so always safe to retry
+                    delay = call.retry_delay(transient_error=True)
+                    if delay is None:
+                        raise
+                except asyncio.TimeoutError as e:
+                    self.breakers.observe(ats_name)
+                    if span is not None:
+                        span.add_event("attempt_failed", **{"exception.type": type(e).__name__})
+                    delay = call.retry_delay(timed_out=True)
+                    if delay is None:
+                        raise
+                except aiohttp.ClientConnectionError as e:
+                    self.breakers.observe(ats_name)
+                    if span is not None:
+                        span.add_event("attempt_failed", **{"exception.type": type(e).__name__})
+                    delay = call.retry_delay(transient_error=True)
+                    if delay is None:
+                        raise
+                except aiohttp.ClientError:
+                    # E.g. a malformed response; counts against the integration
+                    if not responded:
+                        self.breakers.observe(ats_name)
+                    raise
+                except BaseException:
+                    # Cancelled without a verdict; free a half-open probe slot
+                    if not responded:
+                        self.breakers.cancel(ats_name)
+                    raise
+                log_event(logger, logging.INFO, "request.retry", ats=ats_name,
+                          attempt=call.attempt + 1, delay=delay)
+                if span is not None:
+                    span.add_event("retry", attempt=call.attempt + 1, delay=delay)
+                    backoff_started = time.perf_counter_ns()
+                await asyncio.sleep(delay)
+                if span is not None:
+                    span.add_phase("backoff", backoff_started)
+        finally:
+            if span is not None:
+                span.attributes["knit.attempts"] = call.attempt
+            call.finish()
+
+    def _trace_headers(self, span: Span, started: int, response: aiohttp.ClientResponse):
+        """Record the server phase of one attempt (after any connect) and run on_response"""
+        server_started = started
+        if span.phases and span.phases[-1][0] == "connect" and span.phases[-1][1] >= started:
+            server_started = span.phases[-1][2]
+        span.add_phase("server", server_started)
+        span.attributes["http.response.status_code"] = response.status
+        self.tracer.on_response(span, response)
+
+    def retry_metrics(self) -> Dict:
+        """Retry rate and retry-added latency, overall and per ATS"""
+        return self.retry_engine.metrics.snapshot()
+
+    async def create_application_from_dict(self, ats_name: str, data: Dict,
+                                           deadline: Optional[Union[float, Deadline]] = None) -> Dict:
+        """
+        Create application using a dictionary of parameters
+
+        Args:
+            ats_name: Name of the ATS platform
+            data: Dictionary containing all application data
+            deadline: Seconds (or a Deadline) the call may take (optional)
+
+        Returns:
+            Response dictionary from the API
+        """
+        return await self.create_application(ats_name=ats_name, deadline=deadline,
+                                             **self.application_kwargs(data))
+
+    def _integration_semaphore(self, ats_name: str) -> Optional[asyncio.Semaphore]:
+        """Get the 'max_concurrency' cap for an ATS, shared per integration_id"""
+        config = self.ats_configs.get(ats_name)
+        if not config or not config.max_concurrency:
+            return None
+
+        limit = config.max_concurrency
+        entry = self._semaphores.get(config.integration_id)
+        if entry is None or entry[0] != limit:
+            entry = (limit, asyncio.Semaphore(limit))
+            self._semaphores[config.integration_id] = entry
+        return entry[1]
+
+    async def _create_bulk_item(self, index: int, app_data: Dict,
+                                deadline: Optional[Deadline] = None) -> Dict:
+        """Submit one bulk row, turning any failure into an error result"""
+        data = dict(app_data)
+        ats_name = data.pop("ats_name", None)
+        try:
+            semaphore = self._integration_semaphore(ats_name)
+            if semaphore is None:
+                result = await self.create_application_from_dict(ats_name, data, deadline)
+            else:
+                async with _slot(semaphore, deadline, f"a {ats_name} slot"):
+                    result = await self.create_application_from_dict(ats_name, data, deadline)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+            if isinstance(e, DeadlineExceeded):
+                result["deadline_exceeded"] = True
+        return {
+            "index": index,
+            "ats_name": ats_name,
+            "result": result
+        }
+
+    async def iter_bulk_create_applications(self, applications: Iterable[Dict],
+                                            deadline: Optional[Union[float, Deadline]] = None,
+                                            call_deadline: Optional[float] = None
+                                            ) -> AsyncIterator[Dict]:
+        """
+        Submit applications concurrently and yield results as they complete
+
+        At most max_in_flight rows are scheduled at a time, so the input can be
+        a lazy iterator of any length.
+
+        Usage:
+            async for item in creator.iter_bulk_create_applications(rows):
+                print(item["index"], item["result"])
+
+        Args:
+            applications: Iterable of dicts, each containing 'ats_name' and application data
+            deadline: Seconds (or a Deadline) for the whole batch (optional)
+            call_deadline: Seconds for each row, from when it is scheduled (optional)
+
+        Yields:
+            Dicts with 'index' (position in the input), 'ats_name' and 'result'
+        """
+        deadline = Deadline.coerce(deadline)
+        pending = set()
+        try:
+            for index, app_data in enumerate(applications):
+                row_deadline = Deadline.earliest(deadline, Deadline.coerce(call_deadline))
+                pending.add(asyncio.ensure_future(self._create_bulk_item(index, app_data, row_deadline)))
+                if len(pending) >= self.max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Consumer stopped early - don't leave requests running unobserved
+            for task in pending:
+                task.cancel()
+
+    async def bulk_create_applications(self, applications: List[Dict],
+                                       preflight: bool = True,
+                                       deadline: Optional[Union[float, Deadline]] = None,
+                                       call_deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Create multiple applications concurrently across different ATS platforms
+
+        Slot waits, rate-limit waits, retries and socket timeouts are capped by
+        the time left of the batch deadline and of each row's call_deadline;
+        rows that run out of time get a 'deadline_exceeded' error result.
+
+        Args:
+            applications: List of dicts, each containing 'ats_name' and application data
+            preflight: Validate the whole batch locally first; rows that would
+                       be rejected get an error result without an API call
+            deadline: Seconds (or a Deadline) for the whole batch (optional)
+            call_deadline: Seconds for each row, from when it is scheduled (optional)
+
+        Returns:
+            List of response dictionaries, in the same order as applications
+        """
+        results: List[Optional[Dict]] = [None] * len(applications)
+        valid = list(range(len(applications)))
+        if preflight:
+            report = validate_batch(applications, self.ats_configs)
+            report.log_summary()
+            for index in report.errors:
+                results[index] = {"ats_name": applications[index].get("ats_name"),
+                                  "result": report.error_result(index)}
+            valid = [index for index in valid if report.is_valid(index)]
+
+        rows = (applications[index] for index in valid)
+        async for item in self.iter_bulk_create_applications(rows, deadline, call_deadline):
+            results[valid[item.pop("index")]] = item
+        return results
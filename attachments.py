@@ -0,0 +1,355 @@
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+from payloads import dumps
+
+
+# Raw bytes read per chunk; a multiple of 3 so chunks base64-encode without padding
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+# Non-seekable sources are copied to a spool file that stays in memory up to this size
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Stand-in for the attachment content while the rest of the payload is serialized
+_PLACEHOLDER = "__KNIT_ATTACHMENT_CONTENT__"
+
+
+class Attachment:
+    """
+    Resume/file attachment that is base64-encoded lazily, one chunk at a time
+
+    The file is never held in memory as a whole: the request body streams the
+    JSON payload around the encoded chunks, so peak memory per upload is a
+    small multiple of chunk_size. Every source can be re-read, which lets the
+    retry engine resend the body: non-seekable streams (pipes, sockets, HTTP
+    responses) are first copied to a spool file.
+    """
+
+    def __init__(self, source: Union[str, bytes, BinaryIO],
+                 filename: Optional[str] = None,
+                 content_type: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            source: File path, bytes, or binary file-like object (e.g. a
+                    Streamlit UploadedFile)
+            filename: Name sent upstream (defaults to the path's basename)
+            content_type: MIME type (guessed from filename when omitted)
+            chunk_size: Raw bytes encoded per chunk (rounded down to a multiple of 3)
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        self._path = source if isinstance(source, str) else None
+        self._stream = None if self._path else source
+        self._start = None
+
+        self.filename = filename or (os.path.basename(self._path) if self._path else getattr(source, "name", "attachment"))
+        self.content_type = content_type or mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+
+        if self._stream is not None:
+            seekable = getattr(self._stream, "seekable", None)
+            if seekable is None or not seekable():
+                # A one-shot stream would be empty on a retry
+                spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+                shutil.copyfileobj(self._stream, spool, self.chunk_size)
+                spool.seek(0)
+                self._stream = spool
+            self._start = self._stream.tell()
+
+    @property
+    def size(self) -> Optional[int]:
+        """Raw size in bytes, if it can be determined without reading"""
+        if self._path:
+            return os.path.getsize(self._path)
+        if self._start is not None:
+            position = self._stream.tell()
+            end = self._stream.seek(0, io.SEEK_END)
+            self._stream.seek(position)
+            return end - self._start
+        return None
+
+    @property
+    def encoded_size(self) -> Optional[int]:
+        """Length of the base64 text, if the raw size is known"""
+        size = self.size
+        return None if size is None else 4 * ((size + 2) // 3)
+
+    def iter_raw(self) -> Iterator[bytes]:
+        """Yield raw chunks from the start of the source"""
+        if self._path:
+            with open(self._path, "rb") as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        else:
+            if self._start is not None:
+                self._stream.seek(self._start)
+            while True:
+                chunk = self._stream.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def iter_base64(self) -> Iterator[bytes]:
+        """Yield base64-encoded chunks"""
+        for chunk in self.iter_raw():
+            yield base64.b64encode(chunk)
+
+    def to_payload(self, content) -> Dict:
+        """Attachment object as sent to Knit, wrapping the given content"""
+        return {
+            "filename": self.filename,
+            "content": content,
+            "content_type": self.content_type
+        }
+
+    def to_reference(self, reference: str) -> Dict:
+        """Attachment object pointing at a file already uploaded to the ATS"""
+        return {
+            "id": reference,
+            "filename": self.filename,
+            "content_type": self.content_type
+        }
+
+
+class CachedAttachment(Attachment):
+    """Attachment whose base64 form is already encoded and held by an AttachmentCache"""
+
+    def __init__(self, digest: str, encoded: Union[bytes, memoryview], filename: str,
+                 content_type: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._path = None
+        self._stream = None
+        self._start = None
+        self.digest = digest
+        self.encoded = encoded
+        self.filename = filename
+        self.content_type = content_type
+        self.chunk_size = chunk_size
+
+    @property
+    def size(self) -> Optional[int]:
+        return None
+
+    @property
+    def encoded_size(self) -> Optional[int]:
+        return len(self.encoded)
+
+    def iter_base64(self) -> Iterator[bytes]:
+        """Yield zero-copy slices of the cached encoding"""
+        view = memoryview(self.encoded)
+        step = 4 * (self.chunk_size // 3)
+        for start in range(0, len(view), step):
+            yield view[start:start + step]
+
+
+class AttachmentCache:
+    """
+    Content-addressed cache of base64-encoded attachments
+
+    Keyed by the SHA-256 of the raw file, so the same resume sent to several
+    jobs or ATS platforms is read and encoded once. Entries are evicted least
+    recently used first once their total encoded size exceeds max_bytes.
+
+    Also remembers remote file references: for ATS platforms configured with
+    'supports_attachment_reference', the id Knit returns for an uploaded file
+    is reused instead of uploading the same bytes again. File path digests
+    and remote references are kept least recently used too, up to max_keys
+    of each.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_keys: int = 10000):
+        """
+        Args:
+            max_bytes: Upper bound on the total size of cached encodings
+            max_keys: Upper bound on remembered file paths and on remembered
+                      remote references
+        """
+        self.max_bytes = max_bytes
+        self.max_keys = max_keys
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, memoryview]" = OrderedDict()
+        self._bytes = 0
+        self._digests_by_path: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._references: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._bytes
+
+    def _path_key(self, attachment: Attachment) -> Optional[Tuple[str, int, int]]:
+        if not attachment._path:
+            return None
+        stat = os.stat(attachment._path)
+        return attachment._path, stat.st_mtime_ns, stat.st_size
+
+    def _lookup(self, mapping: OrderedDict, key) -> Optional[str]:
+        with self._lock:
+            value = mapping.get(key)
+            if value is not None:
+                mapping.move_to_end(key)
+            return value
+
+    def _remember(self, mapping: OrderedDict, key, value: str):
+        with self._lock:
+            mapping[key] = value
+            mapping.move_to_end(key)
+            while len(mapping) > self.max_keys:
+                mapping.popitem(last=False)
+
+    def _store(self, digest: str, encoded: memoryview):
+        with self._lock:
+            if digest in self._entries:
+                return
+            self._entries[digest] = encoded
+            self._bytes += len(encoded)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def encode(self, attachment: Attachment) -> Attachment:
+        """
+        Return a cached, already-encoded version of an attachment
+
+        Hashes and encodes in a single pass on a miss, into one buffer that
+        is cached as is (read-only) rather than copied. Files whose encoding
+        would not fit in the cache are only hashed and still streamed.
+
+        Returns:
+            CachedAttachment (with .digest), or the original attachment with a
+            .digest attribute when it is too large to cache
+        """
+        if isinstance(attachment, CachedAttachment):
+            return attachment
+
+        path_key = self._path_key(attachment)
+        digest = self._lookup(self._digests_by_path, path_key) if path_key else None
+        if digest is not None:
+            with self._lock:
+                encoded = self._entries.get(digest)
+                if encoded is not None:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return CachedAttachment(digest, encoded, attachment.filename,
+                                            attachment.content_type, attachment.chunk_size)
+
+        encoded_size = attachment.encoded_size
+        cacheable = encoded_size is None or encoded_size <= self.max_bytes
+        hasher = hashlib.sha256()
+        encoded = bytearray() if cacheable else None
+        for chunk in attachment.iter_raw():
+            hasher.update(chunk)
+            if encoded is not None:
+                encoded += base64.b64encode(chunk)
+                if len(encoded) > self.max_bytes:
+                    encoded = None
+        digest = hasher.hexdigest()
+        if path_key:
+            self._remember(self._digests_by_path, path_key, digest)
+
+        with self._lock:
+            cached = self._entries.get(digest)
+            if cached is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is None and encoded is not None:
+            cached = memoryview(encoded).toreadonly()
+            self._store(digest, cached)
+        if cached is None:
+            attachment.digest = digest
+            return attachment
+        return CachedAttachment(digest, cached, attachment.filename,
+                                attachment.content_type, attachment.chunk_size)
+
+    def reference(self, integration_id: str, digest: str) -> Optional[str]:
+        """Remote file id previously returned by an integration for this content"""
+        return self._lookup(self._references, (integration_id, digest))
+
+    def remember_reference(self, integration_id: str, digest: str, reference: str):
+        self._remember(self._references, (integration_id, digest), reference)
+
+
+class StreamingJSONBody:
+    """
+    Re-iterable request body that streams a payload containing an Attachment
+
+    The payload is serialized once with a placeholder for the attachment
+    content; iterating yields the JSON prefix, the base64 chunks and the
+    suffix. Defining __len__ lets requests send a Content-Length instead of
+    chunked transfer encoding.
+    """
+
+    def __init__(self, payload: Dict, key: str = "attachment"):
+        """
+        Args:
+            payload: Request payload whose `key` entry is an Attachment
+            key: Payload key holding the attachment
+        """
+        self.attachment: Attachment = payload[key]
+        placeholder_payload = dict(payload)
+        placeholder_payload[key] = self.attachment.to_payload(_PLACEHOLDER)
+        serialized = dumps(placeholder_payload)
+        self.prefix, self.suffix = serialized.split(_PLACEHOLDER.encode("utf-8"), 1)
+        self._length = None
+        encoded_size = self.attachment.encoded_size
+        if encoded_size is not None:
+            self._length = len(self.prefix) + encoded_size + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        yield from self.attachment.iter_base64()
+        yield self.suffix
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """Same chunks, with file reads and base64 encoding on a worker thread"""
+        yield self.prefix
+        if isinstance(self.attachment, CachedAttachment):
+            # Already encoded: slicing the cached buffer never blocks
+            for chunk in self.attachment.iter_base64():
+                yield chunk
+        else:
+            chunks = self.attachment.iter_base64()
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        yield self.suffix
+
+    @property
+    def length(self) -> Optional[int]:
+        """Total body size, or None when the attachment size is unknown"""
+        return self._length
+
+    def request_data(self):
+        """
+        Body to hand to requests: the sized body itself (Content-Length),
+        or a fresh generator (chunked) when the size is unknown; call it
+        again for every attempt
+        """
+        return self if self._length is not None else iter(self)
+
+    def __len__(self) -> int:
+        return self._length or 0
+
+
+def streaming_body(payload: Dict) -> Optional[StreamingJSONBody]:
+    """Streaming body for payloads carrying an Attachment, else None"""
+    if isinstance(payload.get("attachment"), Attachment):
+        return StreamingJSONBody(payload)
+    return None
@@ -0,0 +1,253 @@
+"""
+Coalescing application submissions into batch requests
+
+Where Knit or a local batching proxy accepts grouped submissions, a
+BatchCoalescer buffers applications per integration (and API key) for up to
+max_wait seconds or max_size applications, sends them as one POST and hands
+each caller its own response. ATS platforms opt in with a 'batch' block:
+
+    "batch": {"max_size": 25, "max_wait": 0.02}
+
+Batch protocol (one POST to batch_url, headers shared by every item sent
+once on the batch request):
+
+    {"requests": [{"headers": {...per-item headers...}, "body": {...payload...}}, ...]}
+
+answered with one entry per request, in order:
+
+    {"responses": [{"status": 200, "headers": {...}, "body": {...}}, ...]}
+
+A batch that fails as a whole (connection error, timeout) raises that error
+for every item; a non-2xx batch status becomes every item's status. A
+malformed entry (e.g. a 2xx whose body is not an object) fails only its own
+item, with requests.exceptions.ContentDecodingError.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from instrumentation import get_logger, log_event
+
+DEFAULT_MAX_SIZE = 25
+DEFAULT_MAX_WAIT = 0.02
+
+logger = get_logger("batching")
+
+
+class _Batch:
+    """Applications buffered for one (integration_id, API key)"""
+
+    def __init__(self, flush_at: float):
+        self.flush_at = flush_at
+        # (serialized payload, headers, (connect, read) timeout, future)
+        self.items: List[Tuple[bytes, Dict[str, str], Tuple[float, float], Future]] = []
+
+
+def _item_response(url: str, status: int, headers: Mapping[str, str],
+                   body: bytes) -> requests.Response:
+    """A requests.Response for one item, so callers handle it like a direct POST"""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.encoding = "utf-8"
+    response.reason = "OK" if status < 400 else "Batch item failed"
+    response.url = url
+    return response
+
+
+def _malformed_answer(answer) -> Optional[str]:
+    """Why one entry of a batch response can't be handed to its caller, if it can't"""
+    if not isinstance(answer, dict):
+        return f"expected an object, got {type(answer).__name__}"
+    status = answer.get("status", 200)
+    if not isinstance(status, int):
+        return f"status {status!r} is not an integer"
+    body = answer.get("body")
+    if status < 400 and not isinstance(body, dict):
+        # Callers read a successful body as the result object
+        return f"{status} body is {type(body).__name__}, not an object"
+    return None
+
+
+class BatchCoalescer:
+    """
+    Groups concurrent submissions per integration into batch requests
+
+    Thread-safe and shareable between creators: each caller blocks on its
+    own future while a small pool of sender threads posts full (or expired)
+    batches. Pays off when many submissions are in flight at once, e.g.
+    bulk_create_applications with many workers or a MultiTenantCreator.
+    """
+
+    def __init__(self, batch_url: str, ats_configs: Mapping[str, Mapping],
+                 session: Optional[requests.Session] = None,
+                 max_batches_in_flight: int = 4):
+        """
+        Args:
+            batch_url: Endpoint accepting the batch protocol
+            ats_configs: ATS configurations keyed by ATS name
+            session: Session to send batches on (defaults to a new one, closed by close())
+            max_batches_in_flight: Batches posted at once
+        """
+        self.batch_url = batch_url
+        self.ats_configs = ats_configs
+        self._owns_session = session is None
+        self.session = session if session is not None else requests.Session()
+        self._batches: Dict[Tuple[str, str], _Batch] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_batches_in_flight,
+                                            thread_name_prefix="batch")
+        self._flusher = threading.Thread(target=self._flush_expired, name="batch-flusher",
+                                         daemon=True)
+        self._flusher.start()
+
+    def enabled(self, ats_name: str) -> bool:
+        """Whether an ATS's submissions are coalesced (it has a 'batch' block)"""
+        config = self.ats_configs.get(ats_name)
+        return bool(config) and config.get("batch") is not None
+
+    def submit(self, ats_name: str, data: bytes, headers: Dict[str, str],
+               timeout: Tuple[float, float]) -> Future:
+        """
+        Add one serialized application to its integration's batch
+
+        Returns:
+            Future resolving to the item's requests.Response, or raising the
+            requests exception that failed the whole batch
+        """
+        settings = self.ats_configs[ats_name].get("batch") or {}
+        max_size = settings.get("max_size", DEFAULT_MAX_SIZE)
+        key = (headers.get("X-Knit-Integration-Id", ""), headers.get("Authorization", ""))
+        future = Future()
+        full = None
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchCoalescer is closed")
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(
+                    time.monotonic() + settings.get("max_wait", DEFAULT_MAX_WAIT))
+                self._cond.notify()
+            batch.items.append((data, headers, timeout, future))
+            if len(batch.items) >= max_size:
+                full = self._batches.pop(key)
+        if full is not None:
+            self._executor.submit(self._send, full)
+        return future
+
+    def withdraw(self, future: Future) -> bool:
+        """
+        Take a submitted item back out of its batch, if it has not been sent
+
+        Returns:
+            True if the item was removed (and its future cancelled); False
+            once its batch has been handed to a sender
+        """
+        with self._cond:
+            for key, batch in self._batches.items():
+                for position, item in enumerate(batch.items):
+                    if item[3] is future:
+                        del batch.items[position]
+                        if not batch.items:
+                            del self._batches[key]
+                        future.cancel()
+                        return True
+        return False
+
+    def post(self, ats_name: str, data: bytes, headers: Dict[str, str],
+             timeout: Tuple[float, float]) -> requests.Response:
+        """Blocking submit(): the item's response once its batch is answered"""
+        return self.submit(ats_name, data, headers, timeout).result()
+
+    def _flush_expired(self):
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                for key in [key for key, batch in self._batches.items() if batch.flush_at <= now]:
+                    self._executor.submit(self._send, self._batches.pop(key))
+                wait = min((batch.flush_at for batch in self._batches.values()), default=None)
+                self._cond.wait(None if wait is None else max(0.0, wait - now))
+
+    def _send(self, batch: _Batch):
+        try:
+            self._post(batch)
+        except Exception as e:
+            # Never leave a caller waiting on an unanswered future
+            for _, _, _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _post(self, batch: _Batch):
+        first_headers = batch.items[0][1]
+        shared = {name: value for name, value in first_headers.items()
+                  if all(headers.get(name) == value for _, headers, _, _ in batch.items)}
+        entries = []
+        for data, headers, _, _ in batch.items:
+            extra = {name: value for name, value in headers.items() if name not in shared}
+            entries.append(b'{"headers":' + json.dumps(extra).encode("utf-8")
+                           + b',"body":' + data + b"}")
+        body = b'{"requests":[' + b",".join(entries) + b"]}"
+        timeout = (max(timeout[0] for _, _, timeout, _ in batch.items),
+                   max(timeout[1] for _, _, timeout, _ in batch.items))
+        futures = [future for _, _, _, future in batch.items]
+
+        log_event(logger, logging.DEBUG, "batch.sending",
+                  integration=shared.get("X-Knit-Integration-Id"), size=len(futures))
+        try:
+            response = self.session.post(self.batch_url, data=body, headers=shared, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        if response.status_code >= 400:
+            # The batch failed as a whole; every item sees its status
+            for future in futures:
+                future.set_result(_item_response(self.batch_url, response.status_code,
+                                                 response.headers, response.content))
+            return
+        try:
+            answers = response.json()["responses"]
+            if len(answers) != len(futures):
+                raise ValueError(f"{len(answers)} responses for {len(futures)} requests")
+        except (ValueError, KeyError, TypeError) as e:
+            error = requests.exceptions.ContentDecodingError(f"Malformed batch response: {e}")
+            for future in futures:
+                future.set_exception(error)
+            return
+        for future, answer in zip(futures, answers):
+            error = _malformed_answer(answer)
+            if error is not None:
+                future.set_exception(requests.exceptions.ContentDecodingError(
+                    f"Malformed batch item: {error}"))
+                continue
+            future.set_result(_item_response(
+                self.batch_url, answer.get("status", 200),
+                answer.get("headers") or response.headers,
+                json.dumps(answer.get("body")).encode("utf-8")
+            ))
+
+    def pending(self) -> int:
+        """Applications buffered and not yet sent"""
+        with self._cond:
+            return sum(len(batch.items) for batch in self._batches.values())
+
+    def close(self):
+        """Send what is buffered, wait for in-flight batches and close the session"""
+        with self._cond:
+            self._closed = True
+            batches, self._batches = list(self._batches.values()), {}
+            self._cond.notify_all()
+        for batch in batches:
+            self._executor.submit(self._send, batch)
+        self._executor.shutdown(wait=True)
+        if self._owns_session:
+            self.session.close()
@@ -0,0 +1,71 @@
+"""
+Benchmark AsyncATSApplicationCreator against the local stub
+
+With a fixed stub latency, throughput ~ max_in_flight / latency shows how
+many Knit requests one event loop keeps in flight.
+
+Usage:
+    python benchmarks/bench_async.py [--rows 1000] [--latency 0.05] [--in-flight 200]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_apply import AsyncATSApplicationCreator  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+
+async def run(url: str, rows: int, in_flight: int) -> float:
+    applications = (
+        {
+            "ats_name": "workable",
+            "job_id": "2CA2D5B257",
+            "initial_stage_id": "applied",
+            "first_name": "Bench",
+            "last_name": str(i),
+            "email": f"bench{i}@example.com",
+            "phone": "9999999999"
+        }
+        for i in range(rows)
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        creator = AsyncATSApplicationCreator("bench-key",
+                                             config_file=os.path.join(ROOT, "ats_config.json"),
+                                             base_url=url, max_in_flight=in_flight)
+    async with creator:
+        start = time.perf_counter()
+        failures = 0
+        async for item in creator.iter_bulk_create_applications(applications):
+            failures += item["result"].get("success") is not True
+        elapsed = time.perf_counter() - start
+    if failures:
+        print(f"  ({failures} failed)")
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--in-flight", type=int, default=200)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency)
+    try:
+        rate = asyncio.run(run(url, args.rows, args.in_flight))
+    finally:
+        server.shutdown()
+
+    print(f"{args.rows} rows, {args.latency * 1000:.0f} ms latency, "
+          f"max_in_flight={args.in_flight}: {rate:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark concurrent bulk_create_applications against the local stub
+
+The stub sleeps for a fixed latency per request, so throughput should grow
+close to linearly with max_workers until a per-ATS max_concurrency cap binds.
+
+Usage:
+    python benchmarks/bench_bulk.py [--rows 200] [--latency 0.02] [--cap 4]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from apply import ATSApplicationCreator  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+
+def make_rows(count: int):
+    return [
+        {
+            "ats_name": "workable",
+            "job_id": "2CA2D5B257",
+            "initial_stage_id": "applied",
+            "first_name": "Bench",
+            "last_name": str(i),
+            "email": f"bench{i}@example.com",
+            "phone": "9999999999"
+        }
+        for i in range(count)
+    ]
+
+
+def run(url: str, config_file: str, rows: int, workers: int) -> float:
+    """Run one bulk batch and return applications per second"""
+    with ATSApplicationCreator("bench-key", config_file=config_file, base_url=url,
+                               pool_maxsize=max(workers, 10)) as creator:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            creator.bulk_create_applications(make_rows(rows), max_workers=workers)
+            elapsed = time.perf_counter() - start
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--cap", type=int, default=4)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "ats_config.json")) as f:
+        configs = json.load(f)
+    capped = dict(configs)
+    capped["workable"] = dict(configs["workable"], max_concurrency=args.cap)
+
+    server, url = start_stub_server(latency=args.latency)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            capped_file = os.path.join(tmp, "ats_config.json")
+            with open(capped_file, "w") as f:
+                json.dump(capped, f)
+
+            print(f"{args.rows} rows, {args.latency * 1000:.0f} ms stub latency")
+            print(f"{'workers':>8} {'uncapped':>12} {f'cap={args.cap}':>12}")
+            for workers in (1, 2, 4, 8, 16):
+                free = run(url, os.path.join(ROOT, "ats_config.json"), args.rows, workers)
+                limited = run(url, capped_file, args.rows, workers)
+                print(f"{workers:>8} {free:>10.1f}/s {limited:>10.1f}/s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark payload construction and serialization per application
+
+Compares the original per-call code path (fresh dicts, f-string headers,
+json.dumps) with the precompiled PayloadTemplate and compact encoder. No
+network involved: the numbers are pure client-side CPU per request.
+
+Usage:
+    python benchmarks/bench_payload.py [--iterations 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import ATSConfig  # noqa: E402
+from payloads import dumps, orjson, template_for  # noqa: E402
+
+APPLICATION = {
+    "job_id": "2CA2D5B257",
+    "initial_stage_id": "applied",
+    "first_name": "Bench",
+    "last_name": "Mark",
+    "email": "bench@example.com",
+    "phone": "9999999999",
+    "title": "Engineer",
+    "company": "Acme",
+    "degree": "BSc",
+    "city": "Berlin",
+    "country": "DE",
+    "metadata": {"referral": "bench"},
+    "source": "benchmark"
+}
+
+
+def baseline(config, api_key, job_id, initial_stage_id, first_name, last_name, email, phone,
+             title=None, company=None, degree=None, city=None, country=None,
+             metadata=None, source=None):
+    """The request-building code as it was before templates"""
+    payload = {"jobId": job_id, "initialStageId": initial_stage_id}
+    candidate = {
+        "firstName": first_name,
+        "lastName": last_name,
+        "phones": [{"type": "PERSONAL", "phoneNumber": phone}],
+        "emails": [{"type": "PERSONAL", "email": email}]
+    }
+    if title:
+        candidate["title"] = title
+    if company:
+        candidate["company"] = company
+    if degree:
+        candidate["education"] = [{"id": "1", "degree": degree, "currentlyPursuing": True,
+                                   "major": "General", "institute": "University"}]
+    if any([None, city, None, country, None]):
+        candidate["presentAddress"] = {"addressLine1": "", "city": city or "", "state": "",
+                                       "country": country or "", "zipCode": ""}
+    payload["candidate"] = candidate
+    if metadata:
+        payload["metaData"] = json.dumps(metadata)
+    if source:
+        payload["source"] = source
+    headers = {
+        "accept": "application/json",
+        "content-type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "X-Knit-Integration-Id": config["integration_id"]
+    }
+    return json.dumps(payload).encode("utf-8"), headers
+
+
+def compiled(config, api_key, job_id, initial_stage_id, first_name, last_name, email, phone,
+             title=None, company=None, degree=None, city=None, country=None,
+             metadata=None, source=None):
+    template = template_for(config)
+    payload = template.build(job_id, initial_stage_id, first_name, last_name, email, phone,
+                             title=title, company=company, degree=degree, city=city,
+                             country=country, metadata=metadata, source=source)
+    return dumps(payload), template.headers(api_key)
+
+
+def run(build, config, iterations: int) -> float:
+    """Build `iterations` requests and return payloads per second"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build(config, "bench-key", **APPLICATION)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    config = ATSConfig.from_dict("workable", {"integration_id": "bench",
+                                              "requires_candidate_object": True})
+    before = run(baseline, config, args.iterations)
+    after = run(compiled, config, args.iterations)
+    size_before = len(baseline(config, "bench-key", **APPLICATION)[0])
+    size_after = len(compiled(config, "bench-key", **APPLICATION)[0])
+
+    print(f"Iterations: {args.iterations} (encoder: {'orjson' if orjson else 'json'})")
+    print(f"  original:    {before:10.0f} payloads/s  {size_before} bytes")
+    print(f"  precompiled: {after:10.0f} payloads/s  {size_after} bytes")
+    print(f"  speedup:     {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
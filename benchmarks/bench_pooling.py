@@ -0,0 +1,67 @@
+"""
+Benchmark ATSApplicationCreator with and without connection pooling
+
+Runs against the local stub server, so the numbers show client-side
+connection overhead rather than Knit latency.
+
+Usage:
+    python benchmarks/bench_pooling.py [--requests 500]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from apply import ATSApplicationCreator  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+APPLICATION = {
+    "job_id": "2CA2D5B257",
+    "initial_stage_id": "applied",
+    "first_name": "Bench",
+    "last_name": "Mark",
+    "email": "bench@example.com",
+    "phone": "9999999999"
+}
+
+
+def run(url: str, count: int, keep_alive: bool) -> float:
+    """Submit `count` applications and return requests per second"""
+    with ATSApplicationCreator("bench-key",
+                               config_file=os.path.join(ROOT, "ats_config.json"),
+                               base_url=url,
+                               keep_alive=keep_alive) as creator:
+        # Silence the per-call status lines so they don't skew timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(count):
+                creator.create_application_from_dict("workable", APPLICATION)
+            elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server, url = start_stub_server()
+    try:
+        unpooled = run(url, args.requests, keep_alive=False)
+        pooled = run(url, args.requests, keep_alive=True)
+    finally:
+        server.shutdown()
+
+    print(f"Requests per run: {args.requests}")
+    print(f"  without pooling: {unpooled:8.1f} req/s")
+    print(f"  with pooling:    {pooled:8.1f} req/s")
+    print(f"  speedup:         {pooled / unpooled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark JobIndex build and query latency on a synthetic catalog
+
+Usage:
+    python benchmarks/bench_search.py [--jobs 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jobsearch import JobIndex  # noqa: E402
+
+WORDS = ("engineer nurse analyst senior junior software data security marketing "
+         "finance remote sales manager designer product support operations").split()
+DEPARTMENTS = ("IT", "Product", "Finance", "HR", "Marketing", "Healthcare", "Sales")
+STATUSES = ("OPEN", "DRAFT", "CLOSED")
+
+QUERIES = [
+    {},
+    {"text": "senior eng"},
+    {"text": "nurse", "filters": {"status": ["OPEN"], "department": ["IT", "HR"]}},
+    {"filters": {"location": ["City 7"]}},
+    {"text": "data", "page": 500},
+    {"text": "ref4242"},
+]
+
+
+def make_jobs(count: int):
+    rng = random.Random(42)
+    return [
+        {
+            "id": str(i),
+            "title": " ".join(rng.sample(WORDS, 3)),
+            "description": " ".join(rng.choices(WORDS, k=40)) + f" ref{i}",
+            "department": rng.choice(DEPARTMENTS),
+            "location": f"City {rng.randrange(300)}",
+            "status": rng.choice(STATUSES)
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs)
+    start = time.perf_counter()
+    index = JobIndex(jobs)
+    print(f"Indexed {args.jobs} jobs in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = index.search(**query)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  {str(query):70} {result['total']:7} hits  "
+              f"median {statistics.median(timings):6.2f} ms  max {max(timings):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
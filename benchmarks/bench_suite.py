@@ -0,0 +1,280 @@
+"""
+Benchmark and load-test suite against the local Knit stand-in
+
+Runs each workload in a fresh process against a stub server running in its
+own process, and reports throughput, p50/p99 application latency (including
+retries and rate-limit waits) and the workload process's peak RSS:
+
+    single       create_application called sequentially
+    bulk         bulk_create_applications with a thread pool
+    concurrent   AsyncATSApplicationCreator.bulk_create_applications
+    attachments  bulk with a resume file streamed per application
+    coalesced    bulk with submissions grouped into batch requests
+
+Results are written as JSON; pass an earlier file with --compare to print
+the change per workload.
+
+Usage:
+    python benchmarks/bench_suite.py [--rows 500] [--latency 0.02] [--error-rate 0.05]
+        [--throttle-rate 0.02] [--quota 200] [--output bench_results.json]
+        [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_server import start_stub_process  # noqa: E402
+
+WORKLOADS = ("single", "bulk", "concurrent", "attachments", "coalesced")
+
+ATS_NAME = "workable"
+
+# 0.1 ms to ~2 min, 2% apart: percentiles within ~1% of the exact value
+LATENCY_BUCKETS = tuple(0.0001 * 1.02 ** i for i in range(710))
+
+# (metric, higher is better) pairs shown by --compare
+COMPARED = (("throughput", True), ("p50_ms", False), ("p99_ms", False), ("peak_rss_mb", False))
+
+
+def make_rows(count: int, attachment_path: Optional[str] = None) -> List[Dict]:
+    rows = []
+    for i in range(count):
+        row = {
+            "ats_name": ATS_NAME,
+            "job_id": "2CA2D5B257",
+            "initial_stage_id": "applied",
+            "first_name": "Bench",
+            "last_name": str(i),
+            "email": f"bench{i}@example.com",
+            "phone": "9999999999"
+        }
+        if attachment_path:
+            row["attachment_path"] = attachment_path
+        rows.append(row)
+    return rows
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _summarize(name: str, seconds: float, results: List[Dict], metrics, retry_metrics: Dict,
+               baseline_rss: Optional[float]) -> Dict:
+    succeeded = sum(1 for result in results
+                    if result.get("success") is True or result.get("success") == "true")
+    latency = metrics.snapshot().get(ATS_NAME, {}).get("latency", {})
+    peak = peak_rss_mb()
+    return {
+        "workload": name,
+        "applications": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "seconds": round(seconds, 4),
+        "throughput": round(len(results) / seconds, 2) if seconds else None,
+        "p50_ms": round(latency.get("p50", 0.0) * 1000, 3),
+        "p99_ms": round(latency.get("p99", 0.0) * 1000, 3),
+        "retries": retry_metrics["total"]["retries"],
+        "baseline_rss_mb": round(baseline_rss, 1) if baseline_rss is not None else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None
+    }
+
+
+def run_workload(name: str, url: str, options: Dict) -> Dict:
+    """Run one workload in the current process and summarize it"""
+    from apply import ATSApplicationCreator
+    from batching import BatchCoalescer
+    from instrumentation import Metrics
+
+    config_file = options["config"]
+    rows = options["rows"]
+    workers = options["workers"]
+    metrics = Metrics(LATENCY_BUCKETS)
+    baseline_rss = peak_rss_mb()
+
+    if name == "concurrent":
+        from async_apply import AsyncATSApplicationCreator
+
+        async def run() -> Tuple[List[Dict], Dict]:
+            async with AsyncATSApplicationCreator("bench-key", config_file=config_file,
+                                                  base_url=url, max_in_flight=options["in_flight"],
+                                                  metrics=metrics) as creator:
+                items = await creator.bulk_create_applications(make_rows(rows))
+                return [item["result"] for item in items], creator.retry_metrics()
+
+        start = time.perf_counter()
+        results, retry_metrics = asyncio.run(run())
+        seconds = time.perf_counter() - start
+        return _summarize(name, seconds, results, metrics, retry_metrics, baseline_rss)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        attachment_path = None
+        if name == "attachments":
+            attachment_path = os.path.join(tmp, "resume.pdf")
+            with open(attachment_path, "wb") as f:
+                f.write(os.urandom(options["attachment_kb"] * 1024))
+
+        coalescer = None
+        if name == "coalesced":
+            with open(config_file, "r", encoding="utf-8") as f:
+                configs = json.load(f)
+            configs[ATS_NAME]["batch"] = {"max_size": options["batch_size"], "max_wait": 0.005}
+            config_file = os.path.join(tmp, "ats_config.json")
+            with open(config_file, "w", encoding="utf-8") as f:
+                json.dump(configs, f)
+
+        with ATSApplicationCreator("bench-key", config_file=config_file, base_url=url,
+                                   pool_maxsize=max(10, workers), metrics=metrics) as creator:
+            if name == "coalesced":
+                coalescer = creator.coalescer = BatchCoalescer(url, creator.ats_configs,
+                                                               session=creator.session)
+            start = time.perf_counter()
+            if name == "single":
+                results = [creator.create_application_from_dict(ATS_NAME, row)
+                           for row in make_rows(rows)]
+            else:
+                items = creator.bulk_create_applications(make_rows(rows, attachment_path),
+                                                         max_workers=workers)
+                results = [item["result"] for item in items]
+            seconds = time.perf_counter() - start
+            retry_metrics = creator.retry_metrics()
+            if coalescer is not None:
+                coalescer.close()
+    return _summarize(name, seconds, results, metrics, retry_metrics, baseline_rss)
+
+
+def _child(results: "multiprocessing.Queue", name: str, url: str, options: Dict):
+    try:
+        results.put(run_workload(name, url, options))
+    except Exception as e:
+        results.put({"workload": name, "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(name: str, url: str, options: Dict) -> Dict:
+    """Run a workload in a freshly spawned process so its peak RSS is its own"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_child, args=(results, name, url, options))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def server_stats(url: str, reset: bool = False) -> Dict:
+    stats_url = url.split("/v1.0/")[0] + "/stats" + ("?reset=1" if reset else "")
+    with urllib.request.urlopen(stats_url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: Dict, current: Dict):
+    print(f"\nCompared with {previous.get('commit') or 'previous run'} "
+          f"({previous.get('timestamp', '?')}):")
+    before = {result["workload"]: result for result in previous.get("results", [])}
+    for result in current["results"]:
+        old = before.get(result["workload"])
+        if not old or "error" in result or "error" in old:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED:
+            if old.get(metric) and result.get(metric) is not None:
+                change = (result[metric] - old[metric]) / old[metric] * 100
+                better = change > 0 if higher_is_better else change < 0
+                changes.append(f"{metric} {change:+.1f}%{'' if better or not change else ' !'}")
+        print(f"  {result['workload']:12} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"Comma-separated subset of {', '.join(WORKLOADS)}")
+    parser.add_argument("--rows", type=int, default=500, help="Applications per workload")
+    parser.add_argument("--workers", type=int, default=16, help="Threads for bulk workloads")
+    parser.add_argument("--in-flight", type=int, default=200, help="Async requests in flight")
+    parser.add_argument("--attachment-kb", type=int, default=512, help="Resume size")
+    parser.add_argument("--batch-size", type=int, default=25, help="Coalesced batch size")
+    parser.add_argument("--config", default=os.path.join(ROOT, "ats_config.json"))
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction answered 429")
+    parser.add_argument("--quota", type=int, help="Requests per second per integration")
+    parser.add_argument("--output", default="bench_results.json", help="Results file (JSON)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Unknown workloads: {sorted(unknown)}")
+
+    mock = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate, "quota": args.quota}
+    options = {"config": args.config, "rows": args.rows, "workers": args.workers,
+               "in_flight": args.in_flight, "attachment_kb": args.attachment_kb,
+               "batch_size": args.batch_size}
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": mock,
+        "options": {key: value for key, value in options.items() if key != "config"},
+        "results": []
+    }
+
+    server, url = start_stub_process(**mock)
+    try:
+        print(f"{'workload':12} {'apps/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+              f"{'ok':>6} {'failed':>6} {'retries':>7} {'peak MB':>8}")
+        for name in workloads:
+            server_stats(url, reset=True)
+            result = run_isolated(name, url, options)
+            if "error" not in result:
+                result["server"] = server_stats(url)["statuses"]
+                print(f"{name:12} {result['throughput']:>9.1f} {result['p50_ms']:>9.2f} "
+                      f"{result['p99_ms']:>9.2f} {result['succeeded']:>6} {result['failed']:>6} "
+                      f"{result['retries']:>7} {result['peak_rss_mb'] or 0:>8.1f}")
+            else:
+                print(f"{name:12} failed: {result['error']}")
+            report["results"].append(result)
+    finally:
+        server.terminate()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
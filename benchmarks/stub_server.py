@@ -0,0 +1,248 @@
+"""
+Local stand-in for the Knit application create endpoint
+
+Accepts any POST and answers with a Knit-style response so the client can be
+benchmarked without touching api.getknit.dev. Faults can be injected to load
+test the retry and rate-limit paths:
+
+    latency / jitter   fixed delay plus a uniform random extra per request
+    error_rate         fraction of requests answered with 503
+    throttle_rate      fraction answered with 429 + Retry-After
+    quota              requests per quota_window per X-Knit-Integration-Id;
+                       answers carry X-RateLimit-Remaining/Reset and excess
+                       requests get 429 until the window rolls over
+
+A POST whose body is {"requests": [...]} is answered as a batch (see
+batching.py): latency and quota apply once per batch, faults per item, and
+each item's status is counted.
+
+GET /stats returns request counts by status (GET /stats?reset=1 also clears
+them), so a benchmark can see what the server actually answered.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8765] [--latency 0.05] [--quota 20]
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+class StubKnitHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY
+    # Nagle + delayed ACK adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    throttle_rate = 0.0
+    quota: Optional[int] = None
+    quota_window = 1.0
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None,
+                   count: bool = True):
+        response = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(response)
+        if count:
+            self.server.count(status)
+
+    def do_GET(self):
+        if not self.path.startswith("/stats"):
+            self._send_json(404, {"success": False, "error": "not found"})
+            return
+        self._send_json(200, self.server.stats(reset="reset=1" in self.path))
+
+    def do_POST(self):
+        body = json.loads(self._read_body() or b"{}")
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        headers = {}
+        if self.quota is not None:
+            integration_id = self.headers.get("X-Knit-Integration-Id", "")
+            remaining, reset = self.server.take_quota(integration_id, self.quota, self.quota_window)
+            headers = {"X-RateLimit-Remaining": str(max(0, remaining)),
+                       "X-RateLimit-Reset": f"{reset:.3f}"}
+            if remaining < 0:
+                headers["Retry-After"] = f"{reset:.3f}"
+                self._send_json(429, {"success": False, "error": "quota exceeded"}, headers)
+                return
+
+        if isinstance(body.get("requests"), list):
+            answers = []
+            for item in body["requests"]:
+                status, payload, item_headers = self._answer(item.get("body") or {})
+                self.server.count(status)
+                answers.append({"status": status, "headers": item_headers, "body": payload})
+            self._send_json(200, {"responses": answers}, headers, count=False)
+            return
+
+        status, payload, extra_headers = self._answer(body)
+        self._send_json(status, payload, dict(headers, **extra_headers))
+
+    def _answer(self, body: Dict) -> Tuple[int, Dict, Dict[str, str]]:
+        """Status, body and extra headers for one application, with faults injected"""
+        roll = random.random()
+        if roll < self.error_rate:
+            return 503, {"success": False, "error": "injected failure"}, {}
+        if roll < self.error_rate + self.throttle_rate:
+            return 429, {"success": False, "error": "injected throttle"}, {"Retry-After": "0.05"}
+        return 200, {
+            "success": True,
+            "data": {
+                "applicationId": "stub-application",
+                "candidateId": "stub-candidate",
+                "jobId": body.get("jobId")
+            }
+        }, {}
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+
+class StubKnitServer(ThreadingHTTPServer):
+    # Room for hundreds of concurrent connects from the async/bulk benchmarks
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._statuses: Dict[int, int] = {}
+        self._windows: Dict[str, Tuple[float, int]] = {}
+
+    def count(self, status: int):
+        with self._lock:
+            self._statuses[status] = self._statuses.get(status, 0) + 1
+
+    def stats(self, reset: bool = False) -> Dict:
+        with self._lock:
+            statuses = {str(status): count for status, count in sorted(self._statuses.items())}
+            if reset:
+                self._statuses.clear()
+                self._windows.clear()
+        return {"statuses": statuses}
+
+    def take_quota(self, integration_id: str, quota: int, window: float) -> Tuple[int, float]:
+        """
+        Count one request against a fixed window quota
+
+        Returns:
+            (requests left in the window, negative when over quota;
+             seconds until the window resets)
+        """
+        now = time.monotonic()
+        with self._lock:
+            started, used = self._windows.get(integration_id, (now, 0))
+            if now - started >= window:
+                started, used = now, 0
+            used += 1
+            self._windows[integration_id] = (started, used)
+        return quota - used, max(0.001, started + window - now)
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                      latency: float = 0.0,
+                      jitter: float = 0.0,
+                      error_rate: float = 0.0,
+                      throttle_rate: float = 0.0,
+                      quota: Optional[int] = None,
+                      quota_window: float = 1.0) -> Tuple[StubKnitServer, str]:
+    """
+    Start the stub server on a background thread
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        latency: Seconds to sleep before answering each request
+        jitter: Extra seconds, uniformly random up to this, added to latency
+        error_rate: Fraction of requests answered with 503
+        throttle_rate: Fraction of requests answered with 429 + Retry-After
+        quota: Requests allowed per quota_window per integration (None = unlimited)
+        quota_window: Length of a quota window in seconds
+
+    Returns:
+        (server, url) - call server.shutdown() when done
+    """
+    handler = type("ConfiguredStubKnitHandler", (StubKnitHandler,), {
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "throttle_rate": throttle_rate,
+        "quota": quota,
+        "quota_window": quota_window
+    })
+    server = StubKnitServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_address[1]}/v1.0/ats.application.create"
+    return server, url
+
+
+def _serve(urls: "multiprocessing.Queue", options: Dict):
+    server, url = start_stub_server(**options)
+    urls.put(url)
+    threading.Event().wait()
+
+
+def start_stub_process(**options) -> Tuple[multiprocessing.Process, str]:
+    """
+    Start the stub server in a child process
+
+    Keeps the server's threads and buffers out of the benchmarked process's
+    CPU time and RSS. Takes the keyword arguments of start_stub_server.
+
+    Returns:
+        (process, url) - call process.terminate() when done
+    """
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(urls, options), daemon=True)
+    process.start()
+    return process, urls.get(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Knit application API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, help="Requests per window per integration")
+    parser.add_argument("--quota-window", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(port=args.port, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                    quota=args.quota, quota_window=args.quota_window)
+    print(f"Stub Knit API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
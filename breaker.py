@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from instrumentation import get_logger, log_event
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Responses that say the integration itself is unusable (bad credentials or
+# integration_id, upstream down), as opposed to one bad application
+DEFAULT_FAILURE_STATUSES = (401, 403, 404, 500, 502, 503, 504)
+
+logger = get_logger("breaker")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending while an integration's circuit is open"""
+
+    def __init__(self, ats_name: str, retry_in: float):
+        super().__init__(f"Circuit open for {ats_name}; not sending for another {retry_in:.1f}s")
+        self.ats_name = ats_name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one integration
+
+    Closed: requests flow and consecutive failures are counted. After
+    failure_threshold of them the breaker opens and every request is refused
+    at once for reset_timeout seconds. Then it half-opens and lets
+    half_open_max_calls probe requests through: a success closes it, a
+    failure opens it again.
+
+    Sans-IO like RetryCall: callers ask allow() before each attempt and
+    report the outcome with record_success() / record_failure().
+    """
+
+    def __init__(self, name: str = "",
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Args:
+            name: Label used in log events
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_max_calls: Probe requests allowed at once while half-open
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        previous, self.state = self.state, state
+        if state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        self._probes = 0
+        log_event(logger, logging.WARNING if state == STATE_OPEN else logging.INFO,
+                  "circuit." + state, integration=self.name, previous=previous,
+                  failures=self.failures)
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit half-opens (0 when not open)"""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> Optional[float]:
+        """
+        Ask to send one request
+
+        Returns:
+            None when the request may go ahead, otherwise the seconds until
+            the breaker will let a probe through
+        """
+        with self._lock:
+            if self.state == STATE_OPEN:
+                remaining = self.retry_in()
+                if remaining > 0:
+                    return remaining
+                self._transition(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    # Probes are in flight; wait for their verdict
+                    return min(1.0, self.reset_timeout)
+                self._probes += 1
+            return None
+
+    def cancel(self):
+        """Give back a go-ahead from allow() whose request was never sent"""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN or (
+                    self.state == STATE_CLOSED and self.failures >= self.failure_threshold):
+                self._transition(STATE_OPEN)
+
+    def reset(self):
+        """Force the breaker closed"""
+        with self._lock:
+            self.failures = 0
+            if self.state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": round(self.retry_in(), 3),
+                "times_opened": self.times_opened
+            }
+
+
+class CircuitBreakers:
+    """
+    Per-integration circuit breakers driven by ats_config.json
+
+    Each ATS may tune its breaker with a 'circuit_breaker' block:
+
+        "circuit_breaker": {"failure_threshold": 5, "reset_timeout": 30,
+                            "half_open_max_calls": 1,
+                            "failure_statuses": [401, 403, 404, 500, 502, 503, 504]}
+
+    Breakers are keyed on integration_id like rate-limit buckets, so ATS names
+    sharing an integration trip together. Connection errors and timeouts
+    always count as failures; other responses close a half-open breaker.
+    """
+
+    def __init__(self, ats_configs: Mapping[str, Mapping]):
+        """
+        Args:
+            ats_configs: ATS configurations keyed by ATS name
+        """
+        self.ats_configs = ats_configs
+        self._breakers: Dict[str, Tuple[Dict, CircuitBreaker]] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, ats_name: str) -> CircuitBreaker:
+        """Get (or create) the breaker for an ATS's integration"""
+        config = self.ats_configs[ats_name]
+        integration_id = config["integration_id"]
+        settings = config.get("circuit_breaker") or {}
+        entry = self._breakers.get(integration_id)
+        if entry is None or entry[0] != settings:
+            with self._lock:
+                entry = self._breakers.get(integration_id)
+                if entry is None or entry[0] != settings:
+                    # First use, or the circuit_breaker block was edited
+                    breaker = CircuitBreaker(
+                        integration_id,
+                        failure_threshold=settings.get("failure_threshold", 5),
+                        reset_timeout=settings.get("reset_timeout", 30.0),
+                        half_open_max_calls=settings.get("half_open_max_calls", 1)
+                    )
+                    entry = (settings, breaker)
+                    self._breakers[integration_id] = entry
+        return entry[1]
+
+    def check(self, ats_name: str):
+        """
+        Raises:
+            CircuitOpenError: The ATS's circuit refuses requests right now
+        """
+        retry_in = self.breaker(ats_name).allow()
+        if retry_in is not None:
+            raise CircuitOpenError(ats_name, retry_in)
+
+    def observe(self, ats_name: str, status_code: Optional[int] = None):
+        """
+        Feed an attempt's outcome to the ATS's breaker
+
+        Args:
+            ats_name: ATS the attempt was sent to
+            status_code: HTTP status, or None when no response arrived
+        """
+        breaker = self.breaker(ats_name)
+        failure_statuses = (self.ats_configs[ats_name].get("circuit_breaker") or {}).get(
+            "failure_statuses", DEFAULT_FAILURE_STATUSES)
+        if status_code is None or status_code in failure_statuses:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def cancel(self, ats_name: str):
+        """The request allowed by the last check() was not sent after all"""
+        self.breaker(ats_name).cancel()
+
+    def state(self, ats_name: str) -> Dict:
+        """Breaker snapshot for an ATS: state, failures, retry_in, times_opened"""
+        return dict(self.breaker(ats_name).snapshot(),
+                    integration_id=self.ats_configs[ats_name]["integration_id"])
+
+    def states(self, ats_names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Breaker snapshots keyed by ATS name (all configured ATS platforms by default)"""
+        names = list(ats_names) if ats_names is not None else list(self.ats_configs.keys())
+        return {name: self.state(name) for name in names}
+
+    def reset(self, ats_name: str):
+        """Close an ATS's circuit, e.g. after fixing its integration"""
+        self.breaker(ats_name).reset()
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from typing import Dict, List
+
+
+class Checkpoint:
+    """
+    Append-only progress log for resumable bulk runs
+
+    One JSON line per finished input row ({"row": n, "success": bool}).
+    Lines are buffered and written in batches with a single fsync, so
+    checkpointing costs one small append per batch rather than per row.
+    Rows must be recorded in input order (stream_bulk_create guarantees it),
+    which makes the resume point simply the last recorded row + 1.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, interval: float = 1.0):
+        """
+        Load any existing progress from path and open it for appending
+
+        Args:
+            path: Checkpoint log file
+            batch_size: Rows buffered before a forced commit
+            interval: Seconds after which buffered rows are committed anyway
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.next_row = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._buffer: List[str] = []
+        self._last_commit = time.monotonic()
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        # Byte offset just past the last complete line
+        complete = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write; that row is redone
+                    break
+                complete += len(line)
+                self.next_row = entry["row"] + 1
+                if entry["success"]:
+                    self.succeeded += 1
+                else:
+                    self.failed += 1
+            torn = f.seek(0, os.SEEK_END) > complete
+        if torn:
+            # Cut the torn tail so the next append starts on a fresh line
+            with open(self.path, "r+b") as f:
+                f.truncate(complete)
+                os.fsync(f.fileno())
+
+    @property
+    def summary(self) -> Dict:
+        """Outcome counts for every row recorded so far, including earlier runs"""
+        return {
+            "next_row": self.next_row,
+            "succeeded": self.succeeded,
+            "failed": self.failed
+        }
+
+    def record(self, row: int, success: bool):
+        """Buffer the outcome of one row"""
+        self._buffer.append(json.dumps({"row": row, "success": success}) + "\n")
+        self.next_row = row + 1
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def due(self) -> bool:
+        """Whether buffered rows should be committed now"""
+        return bool(self._buffer) and (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._last_commit >= self.interval
+        )
+
+    def commit(self):
+        """Durably append buffered rows (one write + fsync for the whole batch)"""
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        self.commit()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from instrumentation import get_logger, log_event
+from retry import RetryPolicy
+
+logger = get_logger("config")
+
+
+# Seconds between mtime checks; config edits reach every creator within this
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+class ConfigError(ValueError):
+    """Raised when ats_config.json contains an invalid ATS entry"""
+
+
+def _check(condition: bool, ats_name: str, message: str):
+    if not condition:
+        raise ConfigError(f"ATS '{ats_name}': {message}")
+
+
+@dataclass(frozen=True)
+class ATSConfig(Mapping):
+    """
+    Validated configuration of one ATS platform
+
+    Typed attributes for the known keys; also behaves as a read-only mapping
+    over the raw JSON entry, so config["integration_id"] and config.get(...)
+    keep working.
+    """
+
+    name: str
+    integration_id: str
+    requires_candidate_object: bool = False
+    notes: Optional[str] = None
+    max_concurrency: Optional[int] = None
+    rate_limit: Optional[Dict] = None
+    retry: Optional[Dict] = None
+    circuit_breaker: Optional[Dict] = None
+    timeout: Optional[Dict] = None
+    batch: Optional[Dict] = None
+    supports_idempotency_key: bool = False
+    supports_attachment_reference: bool = False
+    attachment_reference_field: str = "attachmentId"
+    unsupported_fields: Tuple[str, ...] = ()
+    required_fields: Tuple[str, ...] = ()
+    raw: Dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, name: str, raw: Dict) -> "ATSConfig":
+        """Validate one ats_config.json entry"""
+        _check(isinstance(raw, dict), name, "entry must be an object")
+        integration_id = raw.get("integration_id")
+        _check(isinstance(integration_id, str) and integration_id, name,
+               "integration_id must be a non-empty string")
+        for key in ("requires_candidate_object", "supports_idempotency_key",
+                    "supports_attachment_reference"):
+            _check(isinstance(raw.get(key, False), bool), name, f"{key} must be true or false")
+        _check(raw.get("notes") is None or isinstance(raw["notes"], str), name,
+               "notes must be a string")
+        max_concurrency = raw.get("max_concurrency")
+        _check(max_concurrency is None or (isinstance(max_concurrency, int) and max_concurrency > 0),
+               name, "max_concurrency must be a positive integer")
+        for key in ("rate_limit", "retry", "circuit_breaker", "timeout", "batch"):
+            _check(raw.get(key) is None or isinstance(raw[key], dict), name, f"{key} must be an object")
+        rate_limit = raw.get("rate_limit") or {}
+        for key in ("requests_per_second", "burst"):
+            value = rate_limit.get(key)
+            _check(value is None or (isinstance(value, (int, float)) and value > 0), name,
+                   f"rate_limit.{key} must be a positive number")
+        retry = raw.get("retry") or {}
+        max_attempts = retry.get("max_attempts")
+        _check(max_attempts is None or (isinstance(max_attempts, int) and max_attempts > 0),
+               name, "retry.max_attempts must be a positive integer")
+        for key in ("base_delay", "max_delay", "multiplier"):
+            value = retry.get(key)
+            _check(value is None or (isinstance(value, (int, float)) and value >= 0), name,
+                   f"retry.{key} must be a non-negative number")
+        retry_statuses = retry.get("retry_statuses")
+        _check(retry_statuses is None or (isinstance(retry_statuses, list)
+                                          and all(isinstance(s, int) for s in retry_statuses)),
+               name, "retry.retry_statuses must be a list of status codes")
+        _check(isinstance(retry.get("retry_on_timeout", False), bool), name,
+               "retry.retry_on_timeout must be true or false")
+        try:
+            # Unknown backoff/jitter names
+            RetryPolicy.from_config(retry)
+        except ValueError as e:
+            raise ConfigError(f"ATS '{name}': retry: {e}") from None
+        circuit_breaker = raw.get("circuit_breaker") or {}
+        for key in ("failure_threshold", "half_open_max_calls"):
+            value = circuit_breaker.get(key)
+            _check(value is None or (isinstance(value, int) and value > 0), name,
+                   f"circuit_breaker.{key} must be a positive integer")
+        reset_timeout = circuit_breaker.get("reset_timeout")
+        _check(reset_timeout is None or (isinstance(reset_timeout, (int, float)) and reset_timeout > 0),
+               name, "circuit_breaker.reset_timeout must be a positive number")
+        timeout = raw.get("timeout") or {}
+        for key in ("connect", "read", "total"):
+            value = timeout.get(key)
+            _check(value is None or (isinstance(value, (int, float)) and value > 0), name,
+                   f"timeout.{key} must be a positive number")
+        batch = raw.get("batch") or {}
+        max_size = batch.get("max_size")
+        _check(max_size is None or (isinstance(max_size, int) and max_size > 0), name,
+               "batch.max_size must be a positive integer")
+        max_wait = batch.get("max_wait")
+        _check(max_wait is None or (isinstance(max_wait, (int, float)) and max_wait >= 0), name,
+               "batch.max_wait must be a non-negative number")
+        # preflight imports this module, so its path parser is imported late
+        from preflight import resolve_field
+        for key in ("unsupported_fields", "required_fields"):
+            fields = raw.get(key, [])
+            _check(isinstance(fields, list) and all(isinstance(f, str) for f in fields),
+                   name, f"{key} must be a list of field names")
+            for path in fields:
+                try:
+                    resolve_field(path)
+                except ValueError as e:
+                    raise ConfigError(f"ATS '{name}': {key}: {e}") from None
+
+        return cls(
+            name=name,
+            integration_id=integration_id,
+            requires_candidate_object=raw.get("requires_candidate_object", False),
+            notes=raw.get("notes"),
+            max_concurrency=max_concurrency,
+            rate_limit=raw.get("rate_limit"),
+            retry=raw.get("retry"),
+            circuit_breaker=raw.get("circuit_breaker"),
+            timeout=raw.get("timeout"),
+            batch=raw.get("batch"),
+            supports_idempotency_key=raw.get("supports_idempotency_key", False),
+            supports_attachment_reference=raw.get("supports_attachment_reference", False),
+            attachment_reference_field=raw.get("attachment_reference_field", "attachmentId"),
+            unsupported_fields=tuple(raw.get("unsupported_fields", [])),
+            required_fields=tuple(raw.get("required_fields", [])),
+            raw=dict(raw)
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __hash__(self) -> int:
+        return id(self)
+
+
+class ConfigRegistry(Mapping):
+    """
+    Process-wide, hot-reloading view of ats_config.json
+
+    The file is parsed and validated once; every creator built from the same
+    path shares the result. Lookups check the file's mtime at most once per
+    check_interval, so the submit path costs a dict lookup, and an edit is
+    picked up within seconds without restarting. An edit that fails to parse
+    or validate is reported and the previous configuration stays active.
+
+    Behaves as a mapping of ATS name -> ATSConfig.
+    """
+
+    def __init__(self, path: str, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            path: Path to the JSON file containing ATS configurations
+
+        Raises:
+            OSError, json.JSONDecodeError, ConfigError: On the initial load
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self._configs: Dict[str, ATSConfig] = {}
+        self._mtime_ns = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[["ConfigRegistry"], None]] = []
+        self._load()
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+            with open(self.path, 'r') as f:
+                raw = json.load(f)
+            if not isinstance(raw, dict):
+                raise ConfigError("top level must be an object of ATS name -> configuration")
+            configs = {name: ATSConfig.from_dict(name, entry) for name, entry in raw.items()}
+        except FileNotFoundError:
+            log_event(logger, logging.ERROR, "config.error", path=self.path,
+                      error=f"Configuration file '{self.path}' not found! Please create it "
+                            f"manually with your ATS configurations.")
+            raise
+        except OSError as e:
+            log_event(logger, logging.ERROR, "config.error", path=self.path,
+                      error=f"Cannot read configuration file '{self.path}': {e}")
+            raise
+        except json.JSONDecodeError as e:
+            log_event(logger, logging.ERROR, "config.error", path=self.path,
+                      error=f"Invalid JSON in configuration file '{self.path}': {e}")
+            raise
+        except ConfigError as e:
+            log_event(logger, logging.ERROR, "config.error", path=self.path,
+                      error=f"Invalid configuration in '{self.path}': {e}")
+            raise
+
+        self._configs = configs
+        self._mtime_ns = stat.st_mtime_ns
+        self.version += 1
+        log_event(logger, logging.INFO, "config.loaded", path=self.path, count=len(configs),
+                  version=self.version)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the file if it changed on disk
+
+        Args:
+            force: Check the mtime now instead of waiting for check_interval
+
+        Returns:
+            True if a new configuration was loaded
+        """
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        with self._lock:
+            if not force and now < self._next_check:
+                return False
+            self._next_check = now + self.check_interval
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime_ns == self._mtime_ns:
+                return False
+            try:
+                self._load()
+            except (OSError, json.JSONDecodeError, ConfigError):
+                # Keep serving the last good configuration. The mtime is left
+                # alone so the file is read again on the next check, even if
+                # the fix lands within the same mtime tick.
+                return False
+        for listener in list(self._listeners):
+            listener(self)
+        return True
+
+    def on_reload(self, listener: Callable[["ConfigRegistry"], None]):
+        """Call listener(registry) after every successful reload"""
+        self._listeners.append(listener)
+
+    @property
+    def configs(self) -> Dict[str, ATSConfig]:
+        """Current snapshot of ATS name -> ATSConfig"""
+        self.refresh()
+        return self._configs
+
+    def __getitem__(self, ats_name: str) -> ATSConfig:
+        return self.configs[ats_name]
+
+    def __contains__(self, ats_name: object) -> bool:
+        return ats_name in self.configs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.configs)
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+
+_registries: Dict[str, ConfigRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path: str = "ats_config.json") -> ConfigRegistry:
+    """Shared ConfigRegistry for a config file (loaded on first use)"""
+    key = os.path.abspath(path)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = ConfigRegistry(path)
+                _registries[key] = registry
+    return registry
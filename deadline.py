@@ -0,0 +1,72 @@
+import time
+from typing import Optional, Tuple, Union
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a submission's time budget runs out before it could be sent"""
+
+
+class Deadline:
+    """
+    Point in time (monotonic) by which a call or batch must be done
+
+    Passed down from bulk_create_applications / create_application through
+    queue waits, rate-limit waits, retries and the socket timeouts of each
+    attempt, so every wait is capped by what is left of the budget.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, deadline: Union[None, float, "Deadline"]) -> Optional["Deadline"]:
+        """Accept a Deadline, a budget in seconds starting now, or None"""
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    @staticmethod
+    def earliest(*deadlines: Optional["Deadline"]) -> Optional["Deadline"]:
+        """The tightest of several optional deadlines"""
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        if not deadlines:
+            return None
+        return min(deadlines, key=lambda deadline: deadline.expires_at)
+
+    def remaining(self) -> float:
+        """Seconds left (0 once expired)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what: str = "request"):
+        """
+        Raises:
+            DeadlineExceeded: The deadline has passed
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded before {what}")
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.seconds:g}s, {self.remaining():.3f}s left)"
+
+
+def capped_timeout(timeout: Tuple[float, float],
+                   deadline: Optional[Deadline]) -> Tuple[float, float]:
+    """
+    (connect, read) timeout for one attempt, shortened to the time left
+
+    Raises:
+        DeadlineExceeded: Nothing is left of the deadline
+    """
+    if deadline is None:
+        return timeout
+    deadline.check()
+    remaining = deadline.remaining()
+    return min(timeout[0], remaining), min(timeout[1], remaining)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+STATUS_SENDING = "sending"
+STATUS_PENDING = "pending"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+
+def idempotency_key(ats_name: str, job_id: str, email: str, namespace: str = "") -> str:
+    """
+    Stable key for one candidate applying to one job in one ATS
+
+    Email is normalized (trimmed, lower-cased) so casing differences in the
+    input don't defeat deduplication. A namespace (e.g. a tenant id) keeps
+    keys of different Knit accounts apart in a shared SubmissionStore.
+    """
+    parts = [ats_name, str(job_id), (email or "").strip().lower()]
+    raw = "\x1f".join([namespace] + parts if namespace else parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SubmissionStore:
+    """
+    Local persistent record of application submissions, keyed by idempotency key
+
+    Backed by SQLite with the 32-byte key digest as the clustered primary key,
+    so lookups are a single index probe that stays effectively constant at
+    millions of rows. Safe to share between threads.
+
+    Outcomes:
+        sending   - claimed by a caller sending it right now; concurrent
+                    submissions of the key are refused until it completes
+                    (or the claim is older than claim_ttl, e.g. after a crash)
+        pending   - sent, outcome unknown (timeout, reset); resending is
+                    allowed and carries the same idempotency key
+        succeeded - created upstream; repeat submissions return the stored result
+        failed    - rejected upstream; repeat submissions are sent again
+    """
+
+    def __init__(self, path: str = "submissions.db", claim_ttl: float = 300.0):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+            claim_ttl: Seconds after which a 'sending' claim whose caller never
+                       completed it may be taken over
+        """
+        self.path = path
+        self.claim_ttl = claim_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                key BLOB PRIMARY KEY,
+                ats_name TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a submission
+
+        Returns:
+            Dict with status, result and updated_at, or None if never submitted
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result, updated_at FROM submissions WHERE key = ?",
+                (bytes.fromhex(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row[0],
+            "result": json.loads(row[1]) if row[1] else None,
+            "updated_at": row[2]
+        }
+
+    def begin(self, key: str, ats_name: str, job_id: str) -> Optional[Dict]:
+        """
+        Claim a submission for sending unless it already succeeded
+
+        The claim is atomic, also across processes sharing the database: of
+        several concurrent submissions of the same key exactly one is allowed
+        to send.
+
+        Returns:
+            None when the caller holds the claim and should send; otherwise
+            the stored result of a previous successful submission, or an
+            'in_progress' error result while another caller is sending it
+        """
+        key_bytes = bytes.fromhex(key)
+        while True:
+            now = time.time()
+            with self._lock:
+                claimed = self._conn.execute(
+                    "INSERT INTO submissions (key, ats_name, job_id, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO NOTHING",
+                    (key_bytes, ats_name, str(job_id), STATUS_SENDING, now)
+                ).rowcount
+                if not claimed:
+                    # Resend a failed or unknown outcome, or take over an abandoned claim
+                    claimed = self._conn.execute(
+                        "UPDATE submissions SET status = ?, updated_at = ? WHERE key = ? "
+                        "AND (status IN (?, ?) OR (status = ? AND updated_at < ?))",
+                        (STATUS_SENDING, now, key_bytes, STATUS_FAILED, STATUS_PENDING,
+                         STATUS_SENDING, now - self.claim_ttl)
+                    ).rowcount
+            if claimed:
+                return None
+            previous = self.get(key)
+            if previous is None or previous["status"] in (STATUS_FAILED, STATUS_PENDING):
+                # Completed or removed between the two statements; claim again
+                continue
+            if previous["status"] == STATUS_SUCCEEDED:
+                return previous["result"]
+            return {"success": False, "in_progress": True,
+                    "error": "Submission already in progress with the same idempotency key"}
+
+    def complete(self, key: str, result: Dict, definitive: bool = True):
+        """
+        Record the outcome of a submission
+
+        Args:
+            key: Idempotency key passed to begin()
+            result: Response dictionary returned to the caller
+            definitive: False when no response was received (timeout, reset),
+                        which leaves the submission pending
+        """
+        if result.get("success") == "true" or result.get("success") is True:
+            status = STATUS_SUCCEEDED
+        elif definitive:
+            status = STATUS_FAILED
+        else:
+            status = STATUS_PENDING
+        with self._lock:
+            self._conn.execute(
+                "UPDATE submissions SET status = ?, result = ?, updated_at = ? WHERE key = ?",
+                (status, json.dumps(result), time.time(), bytes.fromhex(key))
+            )
+
+    def release(self, key: str):
+        """Give up a claim without an outcome (nothing, or not knowingly, sent)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE submissions SET status = ?, updated_at = ? WHERE key = ? AND status = ?",
+                (STATUS_PENDING, time.time(), bytes.fromhex(key), STATUS_SENDING)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
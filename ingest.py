@@ -0,0 +1,228 @@
+"""
+Stream bulk applications from JSONL or CSV without loading the whole file
+
+Rows are read lazily, validated, submitted with a bounded number in flight,
+and results are appended to an output JSONL file in input order, so memory
+stays flat regardless of input size. With --checkpoint, progress is logged
+so a crashed run resumes at the first unfinished row.
+
+Usage:
+    python ingest.py applications.jsonl results.jsonl --workers 8 --checkpoint run.ckpt
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, IO, Iterable, Iterator, Optional, Tuple, Union
+
+from apply import ATSApplicationCreator
+from checkpoint import Checkpoint
+from instrumentation import configure_logging
+from preflight import validate_row
+
+
+# CSV cells that hold nested JSON (lists/objects)
+JSON_FIELDS = ("answers", "links", "metadata", "attachment",
+               "work_address", "permanent_address")
+
+# How many result lines to buffer between flushes of the output file
+FLUSH_EVERY = 100
+
+
+class MalformedRow:
+    """Stands in for an input row that could not be parsed"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def iter_jsonl(path: str, start_row: int = 0) -> Iterator[Tuple[int, Union[Dict, MalformedRow]]]:
+    """
+    Yield (row number, application dict) for each non-blank JSONL line
+
+    Rows before start_row are skipped without being parsed. A line that is
+    not a JSON object is yielded as a MalformedRow, so it fails on its own
+    instead of ending the run.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for row_number, line in enumerate(f):
+            if row_number < start_row:
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, MalformedRow(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(row, dict):
+                yield row_number, MalformedRow("Row is not a JSON object")
+                continue
+            yield row_number, row
+
+
+def _csv_value(field: str, value: str):
+    if value == "":
+        return None
+    if field in JSON_FIELDS and value[:1] in ("[", "{"):
+        return json.loads(value)
+    if field == "currently_pursuing":
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return value
+
+
+def iter_csv(path: str, start_row: int = 0) -> Iterator[Tuple[int, Union[Dict, MalformedRow]]]:
+    """
+    Yield (row number, application dict) for each CSV data row from start_row on
+
+    A row whose JSON cells don't parse is yielded as a MalformedRow.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f)):
+            if row_number < start_row:
+                continue
+            try:
+                yield row_number, {k: _csv_value(k, v) for k, v in row.items() if k}
+            except json.JSONDecodeError as e:
+                yield row_number, MalformedRow(f"Invalid JSON in CSV cell: {e}")
+
+
+def iter_rows(path: str, start_row: int = 0) -> Iterator[Tuple[int, Union[Dict, MalformedRow]]]:
+    """Pick a reader from the file extension (.csv, otherwise JSONL)"""
+    if path.lower().endswith(".csv"):
+        return iter_csv(path, start_row)
+    return iter_jsonl(path, start_row)
+
+
+def _process_row(creator: ATSApplicationCreator, row_number: int,
+                 row: Union[Dict, MalformedRow]) -> Dict:
+    if isinstance(row, MalformedRow):
+        return {"row": row_number, "ats_name": None,
+                "result": {"success": False, "error": row.error}}
+    error = validate_row(row, creator.ats_configs)
+    if error:
+        return {"row": row_number, "ats_name": row.get("ats_name"),
+                "result": {"success": False, "error": error}}
+    item = creator.submit_bulk_item(row)
+    return {"row": row_number, **item}
+
+
+def stream_bulk_create(creator: ATSApplicationCreator,
+                       rows: Iterable[Tuple[int, Union[Dict, MalformedRow]]],
+                       output: IO[str],
+                       max_workers: int = 1,
+                       checkpoint: Optional[Checkpoint] = None) -> Dict:
+    """
+    Submit applications as they are read and write results incrementally
+
+    At most 2 x max_workers rows are held in memory at once. Results are
+    written as JSONL lines ({"row", "ats_name", "result"}) in input order.
+    Rows that fail to parse (MalformedRow) get an error result and are
+    checkpointed like any other failed row.
+
+    With a checkpoint, each written row is recorded and committed in batches,
+    always after the output file is flushed, so the checkpoint never claims a
+    row whose result line was lost. Rows in flight when the run dies are sent
+    again on resume; pair with a dedup store to make that free.
+
+    Args:
+        creator: Client used to submit (its per-ATS caps and retries apply)
+        rows: Iterable of (row number, application dict), e.g. iter_rows(path)
+        output: Text file the result lines are appended to
+        max_workers: Number of applications in flight at once
+        checkpoint: Progress log to record finished rows in
+
+    Returns:
+        Summary dict with total, succeeded and failed counts
+    """
+    summary = {"total": 0, "succeeded": 0, "failed": 0}
+    window = max(1, max_workers) * 2
+    pending = deque()
+
+    def write(item: Dict):
+        summary["total"] += 1
+        success = item["result"].get("success")
+        if success is True or success == "true":
+            summary["succeeded"] += 1
+        else:
+            summary["failed"] += 1
+        output.write(json.dumps(item) + "\n")
+        if checkpoint is not None:
+            checkpoint.record(item["row"], success is True or success == "true")
+            if checkpoint.due():
+                output.flush()
+                checkpoint.commit()
+        elif summary["total"] % FLUSH_EVERY == 0:
+            output.flush()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for row_number, row in rows:
+                pending.append(executor.submit(_process_row, creator, row_number, row))
+                if len(pending) >= window:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        output.flush()
+        if checkpoint is not None:
+            checkpoint.commit()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream bulk applications from JSONL or CSV")
+    parser.add_argument("input", help="Applications file (.jsonl or .csv)")
+    parser.add_argument("output", help="Results file (JSONL, appended to)")
+    parser.add_argument("--workers", type=int, default=1, help="Applications in flight at once")
+    parser.add_argument("--config", default="ats_config.json", help="ATS configuration file")
+    parser.add_argument("--checkpoint", help="Progress log; an existing one resumes the run")
+    parser.add_argument("--verbose", action="store_true", help="Log every application")
+    parser.add_argument("--log-json", action="store_true", help="Log events as JSON lines")
+    parser.add_argument("--metrics", help="Write Prometheus metrics to this file at the end")
+    args = parser.parse_args()
+    if args.verbose or args.log_json:
+        configure_logging(logging.DEBUG if args.verbose else logging.INFO, json_lines=args.log_json)
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    api_key = os.getenv("KNIT_API_KEY")
+    if not api_key:
+        print("❌ Error: KNIT_API_KEY is not set")
+        sys.exit(1)
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    start_row = checkpoint.next_row if checkpoint else 0
+    if start_row:
+        print(f"↻ Resuming from row {start_row}")
+
+    try:
+        with ATSApplicationCreator(api_key, config_file=args.config,
+                                   pool_maxsize=max(10, args.workers)) as creator:
+            with open(args.output, "a", encoding="utf-8") as output:
+                summary = stream_bulk_create(creator, iter_rows(args.input, start_row), output,
+                                             max_workers=args.workers, checkpoint=checkpoint)
+            if args.metrics:
+                with open(args.metrics, "w", encoding="utf-8") as f:
+                    f.write(creator.prometheus_metrics())
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    print(f"\n✓ Processed {summary['total']} rows: "
+          f"{summary['succeeded']} succeeded, {summary['failed']} failed")
+    if checkpoint is not None:
+        totals = checkpoint.summary
+        print(f"  All runs: {totals['succeeded']} succeeded, {totals['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
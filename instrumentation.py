@@ -0,0 +1,256 @@
+"""
+Structured log events and in-process metrics
+
+Every module logs under the 'knit' logger with an event name and a dict of
+fields instead of printing. The logger has a NullHandler and events are only
+built when a handler is listening, so by default a call does no I/O at all.
+configure_logging() attaches a console handler (the human-readable lines the
+CLI used to print) or a JSON-lines handler for log shippers.
+
+Metrics keeps per-ATS outcome counters and latency histograms in memory and
+renders them as Prometheus text for scraping or a dict snapshot for code.
+"""
+import json
+import logging
+import sys
+import threading
+from bisect import bisect_left
+from typing import Dict, IO, List, Optional, Tuple
+
+LOGGER_NAME = "knit"
+
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+OUTCOME_CREATED = "created"
+OUTCOME_REJECTED = "rejected"
+OUTCOME_ERROR = "error"
+OUTCOME_DEDUPLICATED = "deduplicated"
+OUTCOME_IN_PROGRESS = "in_progress"
+OUTCOME_CIRCUIT_OPEN = "circuit_open"
+
+# Histogram bucket upper bounds in seconds: 1ms to ~2min, 25% apart, so a
+# quantile read off the buckets is within about 12% of the true value
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(0.001 * 1.25 ** i for i in range(53))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Console rendering of the events the CLI shows; others print as key=value
+CONSOLE_FORMATS = {
+    "config.loaded": "✓ Loaded configurations for {count} ATS platforms",
+    "config.error": "\n❌ Error: {error}",
+    "application.deduplicated": "\n↩ Application to {ats} job {job_id} already created, skipping",
+    "application.in_progress": "\n⏳ Application to {ats} job {job_id} is being sent "
+                               "by another caller, skipping",
+    "application.sending": "\n🚀 Creating application in {ats}...\n   Job ID: {job_id}",
+    "application.created": "✓ Application created in {ats} for job {job_id}: "
+                           "application {application_id}, candidate {candidate_id} "
+                           "({latency_ms:.0f} ms)",
+    "application.rejected": "⚠ Application creation returned: {result}",
+    "application.error": "✗ Error creating application: {error}",
+    "application.circuit_open": "⛔ Not sent to {ats}: circuit open for another {retry_in:.1f}s",
+    "request.retry": "   ↻ Retrying {ats} (attempt {attempt}) in {delay:.1f}s",
+    "preflight.summary": "\n🔎 Pre-flight: {valid}/{total} applications valid",
+    "bulk.started": "\n🔄 Creating {count} applications...",
+    "bulk.deferred": "   ⏸ {count} applications waiting {wait:.1f}s for open circuits",
+    "jobsync.failed": "⚠ Job sync failed for {integration_id}: {error}",
+    "jobsync.error": "❌ Job sync error for {integration_id}: {error}",
+    "circuit.open": "⛔ Circuit opened for {integration} after {failures} failures",
+    "circuit.half_open": "   Circuit half-open for {integration}, probing",
+    "circuit.closed": "✓ Circuit closed for {integration}",
+}
+
+
+def get_logger(module: str) -> logging.Logger:
+    """Logger for a module, under the 'knit' hierarchy"""
+    return logging.getLogger(f"{LOGGER_NAME}.{module}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """
+    Emit a structured event if anything is listening at level
+
+    The fields travel on the record as 'event' and 'fields' so handlers can
+    format them; nothing is formatted or written when the level is disabled.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"event": event, "fields": fields})
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Human-readable lines for known events, key=value for the rest"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", None)
+        if event is None:
+            return super().format(record)
+        fields = record.fields
+        template = CONSOLE_FORMATS.get(event)
+        if template is not None:
+            try:
+                return template.format(**fields)
+            except (KeyError, ValueError):
+                pass
+        return event + " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event and the event fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", record.getMessage())
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: int = logging.INFO, json_lines: bool = False,
+                      stream: Optional[IO[str]] = None) -> logging.Handler:
+    """
+    Send 'knit' events to a stream (stdout by default)
+
+    Args:
+        level: Lowest level emitted (DEBUG adds per-request events)
+        json_lines: Emit JSON lines instead of console text
+        stream: Where to write
+
+    Returns:
+        The handler, so callers can remove it again
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JSONFormatter() if json_lines else ConsoleFormatter())
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (not thread-safe; Metrics locks around it)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    Thread-safe per-ATS application counters and latency histograms
+
+    Shared by every creator it is passed to, like a RateLimiter.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._outcomes: Dict[Tuple[str, str], int] = {}
+        self._latency: Dict[str, LatencyHistogram] = {}
+
+    def record(self, ats_name: str, outcome: str, seconds: Optional[float] = None):
+        """
+        Count one application and, for requests that were sent, its latency
+
+        Args:
+            ats_name: ATS the application was for
+            outcome: created, rejected, error, deduplicated, in_progress or
+                     circuit_open
+            seconds: End-to-end latency including retries
+        """
+        with self._lock:
+            key = (ats_name, outcome)
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+            if seconds is not None:
+                histogram = self._latency.get(ats_name)
+                if histogram is None:
+                    histogram = self._latency[ats_name] = LatencyHistogram(self.buckets)
+                histogram.observe(seconds)
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            {ats_name: {"outcomes": {outcome: count}, "latency": {"count",
+             "sum", "p50", "p95", "p99"}}} with latencies in seconds
+        """
+        with self._lock:
+            per_ats: Dict[str, Dict] = {}
+            for (ats_name, outcome), count in self._outcomes.items():
+                per_ats.setdefault(ats_name, {"outcomes": {}})["outcomes"][outcome] = count
+            for ats_name, histogram in self._latency.items():
+                latency = {"count": histogram.count, "sum": histogram.sum}
+                for q in QUANTILES:
+                    latency[f"p{round(q * 100)}"] = histogram.quantile(q)
+                per_ats.setdefault(ats_name, {"outcomes": {}})["latency"] = latency
+            return per_ats
+
+    def prometheus(self, retry_metrics: Optional[Dict] = None) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        Args:
+            retry_metrics: RetryMetrics.snapshot() to export alongside
+
+        Returns:
+            knit_applications_total{ats,outcome}, the
+            knit_application_latency_seconds{ats} histogram and, when given,
+            knit_retries_total{ats} / knit_retry_budget_exhausted_total{ats}
+        """
+        lines = [
+            "# HELP knit_applications_total Applications by ATS and outcome",
+            "# TYPE knit_applications_total counter"
+        ]
+        with self._lock:
+            for (ats_name, outcome), count in sorted(self._outcomes.items()):
+                lines.append(f'knit_applications_total{{ats="{ats_name}",outcome="{outcome}"}} {count}')
+
+            lines.append("# HELP knit_application_latency_seconds Application create latency "
+                         "including retries")
+            lines.append("# TYPE knit_application_latency_seconds histogram")
+            for ats_name, histogram in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'knit_application_latency_seconds_bucket'
+                                 f'{{ats="{ats_name}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'knit_application_latency_seconds_bucket'
+                             f'{{ats="{ats_name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'knit_application_latency_seconds_sum{{ats="{ats_name}"}} '
+                             f'{histogram.sum:.6f}')
+                lines.append(f'knit_application_latency_seconds_count{{ats="{ats_name}"}} '
+                             f'{histogram.count}')
+
+        if retry_metrics is not None:
+            per_ats = sorted(retry_metrics["per_ats"].items())
+            lines.append("# HELP knit_retries_total Retried requests by ATS")
+            lines.append("# TYPE knit_retries_total counter")
+            for ats_name, stats in per_ats:
+                lines.append(f'knit_retries_total{{ats="{ats_name}"}} {stats["retries"]}')
+            lines.append("# HELP knit_retry_budget_exhausted_total Retries refused by the budget")
+            lines.append("# TYPE knit_retry_budget_exhausted_total counter")
+            for ats_name, stats in per_ats:
+                lines.append(f'knit_retry_budget_exhausted_total{{ats="{ats_name}"}} '
+                             f'{stats["budget_exhausted"]}')
+        return "\n".join(lines) + "\n"
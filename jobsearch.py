@@ -0,0 +1,227 @@
+"""
+In-memory search index over a job catalog
+
+An inverted index over title/description words plus facets for department,
+location and status. Postings that match many jobs are bitsets (Python
+ints: AND/OR and popcount run in C over the whole catalog at once); rare
+ones are sets of positions, so unique words don't cost a catalog-sized
+bitset each. Facet values are always bitsets. Filtering 100k jobs takes
+milliseconds without scanning them.
+"""
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Union
+
+FACETS = ("department", "location", "status")
+
+# Postings matching at least 1/DENSE_RATIO of the jobs are stored as bitsets
+DENSE_RATIO = 64
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Either a bitset over job positions or a set of positions
+Match = Union[int, FrozenSet[int]]
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class JobIndex:
+    """
+    Searchable, faceted view of a list of jobs
+
+    Built once per catalog snapshot; results keep the order of the input
+    jobs. Immutable, so one index can serve every session concurrently.
+    """
+
+    def __init__(self, jobs: Iterable[Dict]):
+        """
+        Args:
+            jobs: Jobs as stored in the JobCatalog
+        """
+        self.jobs: List[Dict] = list(jobs)
+        self._size = len(self.jobs)
+        self._all = (1 << self._size) - 1
+
+        positions: Dict[str, List[int]] = {}
+        facet_positions: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for position, job in enumerate(self.jobs):
+            for token in set(tokenize(job.get("title")) + tokenize(job.get("description"))):
+                positions.setdefault(token, []).append(position)
+            for facet in FACETS:
+                value = job.get(facet)
+                if value:
+                    facet_positions[facet].setdefault(value, []).append(position)
+
+        self._postings = {token: self._posting(p) for token, p in positions.items()}
+        self._vocabulary = sorted(self._postings)
+        # Facets have few distinct values, so every value gets a bitset and
+        # counting one is a single popcount
+        self._facets = {
+            facet: {value: self._bitset(p) for value, p in values.items()}
+            for facet, values in facet_positions.items()
+        }
+        # Position -> facet value, for counting facets over small results
+        self._facet_of = {facet: [job.get(facet) for job in self.jobs] for facet in FACETS}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _bitset(self, positions: Iterable[int]) -> int:
+        buffer = bytearray((self._size + 7) // 8)
+        for position in positions:
+            buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, "little")
+
+    def _posting(self, positions: List[int]) -> Match:
+        if len(positions) * DENSE_RATIO >= self._size:
+            return self._bitset(positions)
+        return frozenset(positions)
+
+    def _bytes(self, mask: int) -> bytes:
+        return mask.to_bytes((self._size + 7) // 8, "little")
+
+    def _and(self, a: Match, b: Match) -> Match:
+        if isinstance(a, int) and isinstance(b, int):
+            return a & b
+        if isinstance(a, int):
+            a, b = b, a
+        if not isinstance(b, int):
+            return a & b
+        bits = self._bytes(b)
+        return frozenset(p for p in a if bits[p >> 3] >> (p & 7) & 1)
+
+    def _or(self, a: Match, b: Match) -> Match:
+        if not isinstance(a, int) and not isinstance(b, int):
+            return a | b
+        if not isinstance(a, int):
+            a = self._bitset(a)
+        if not isinstance(b, int):
+            b = self._bitset(b)
+        return a | b
+
+    def _count(self, match: Match) -> int:
+        return _popcount(match) if isinstance(match, int) else len(match)
+
+    def _match_token(self, token: str) -> Match:
+        """Jobs containing a word starting with token (search-as-you-type)"""
+        dense = 0
+        sparse = set()
+        start = bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            posting = self._postings[word]
+            if isinstance(posting, int):
+                dense |= posting
+            else:
+                sparse.update(posting)
+        if dense:
+            return dense | self._bitset(sparse) if sparse else dense
+        return frozenset(sparse)
+
+    def _match(self, text: Optional[str], filters: Dict[str, List[str]],
+               skip_facet: Optional[str] = None) -> Match:
+        match: Match = self._all
+        for token in tokenize(text):
+            match = self._and(match, self._match_token(token))
+            if not self._count(match):
+                return frozenset()
+        for facet, selected in filters.items():
+            if facet == skip_facet:
+                continue
+            # Values within a facet are OR'd, facets are AND'd
+            values = self._facets[facet]
+            facet_match: Match = frozenset()
+            for value in selected:
+                facet_match = self._or(facet_match, values.get(value, frozenset()))
+            match = self._and(match, facet_match)
+        return match
+
+    def _facet_counts(self, facet: str, match: Match) -> Dict[str, int]:
+        if not isinstance(match, int):
+            facet_of = self._facet_of[facet]
+            counts = Counter(facet_of[p] for p in match)
+            counts.pop(None, None)
+            return dict(counts)
+        counts = {}
+        for value, posting in self._facets[facet].items():
+            count = _popcount(match & posting)
+            if count:
+                counts[value] = count
+        return counts
+
+    def _page(self, match: Match, offset: int, limit: int) -> List[int]:
+        """Positions [offset, offset + limit) of a match, in catalog order"""
+        if not isinstance(match, int):
+            return sorted(match)[offset:offset + limit]
+        bits = bin(match)[:1:-1]  # least significant bit first
+        # Binary-search the first position past `offset` set bits
+        low, high = 0, len(bits)
+        while low < high:
+            middle = (low + high) // 2
+            if bits.count("1", 0, middle) <= offset:
+                low = middle + 1
+            else:
+                high = middle
+        index = bits.find("1", low - 1)
+        positions = []
+        while index != -1 and len(positions) < limit:
+            positions.append(index)
+            index = bits.find("1", index + 1)
+        return positions
+
+    def facet_values(self, facet: str) -> List[str]:
+        """All values of a facet, sorted"""
+        return sorted(self._facets[facet])
+
+    def search(self, text: Optional[str] = None,
+               filters: Optional[Dict[str, Iterable[str]]] = None,
+               page: int = 1,
+               page_size: int = 20) -> Dict:
+        """
+        Query the index
+
+        Args:
+            text: Free text; every word must prefix-match a title/description word
+            filters: Facet name -> accepted values, e.g. {"status": ["OPEN"]}
+            page: 1-based page number (clamped to the available pages)
+            page_size: Jobs per page
+
+        Returns:
+            {"jobs": [...], "total", "page", "pages",
+             "facets": {facet: {value: count}}} where each facet's counts
+            honour the text and every other facet's filter
+        """
+        filters = {facet: list(values) for facet, values in (filters or {}).items() if values}
+        unknown = set(filters) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown facets: {sorted(unknown)}. Available: {list(FACETS)}")
+
+        match = self._match(text, filters)
+        total = self._count(match)
+        pages = max(1, -(-total // page_size))
+        page = min(max(1, page), pages)
+        positions = self._page(match, (page - 1) * page_size, page_size) if total else []
+
+        facet_counts = {}
+        for facet in FACETS:
+            # Counting against the other filters keeps alternatives visible
+            base = match if facet not in filters else self._match(text, filters, skip_facet=facet)
+            facet_counts[facet] = self._facet_counts(facet, base)
+
+        return {
+            "jobs": [self.jobs[position] for position in positions],
+            "total": total,
+            "page": page,
+            "pages": pages,
+            "facets": facet_counts
+        }
@@ -0,0 +1,426 @@
+"""
+Job catalog sync: jobs, stages and questions per integration, cached locally
+
+JobSyncer pulls from the Knit API in the background and writes to a
+JobCatalog (SQLite). The UI and create_application callers only ever read
+the catalog, so a page load never waits on the network.
+
+Refreshes are incremental: the jobs list is requested with If-None-Match
+(ETag) and an updated-since filter, and only changed jobs have their stages
+and questions fetched again. An integration is refreshed once its entries
+are older than the TTL; every full_refresh_interval a full listing runs
+instead, which also drops jobs that disappeared upstream.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from instrumentation import get_logger, log_event
+
+logger = get_logger("jobsync")
+
+
+KNIT_API_BASE = "https://api.getknit.dev/v1.0"
+JOBS_URL = f"{KNIT_API_BASE}/ats.jobs.list"
+JOB_STAGES_URL = f"{KNIT_API_BASE}/ats.job.stages.list"
+JOB_QUESTIONS_URL = f"{KNIT_API_BASE}/ats.job.questions.list"
+
+# Query parameter carrying the incremental-sync watermark
+UPDATED_SINCE_PARAM = "updatedAfter"
+
+# Seconds before an integration's cached jobs are refreshed
+DEFAULT_TTL = 15 * 60
+
+# Seconds between full listings (which also prune deleted jobs)
+DEFAULT_FULL_REFRESH_INTERVAL = 24 * 60 * 60
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _first_name(value) -> Optional[str]:
+    """First entry of a Knit list field (dicts with a name, or strings)"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        return value.get("name")
+    return value
+
+
+def _format_location(value) -> Optional[str]:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        parts = [value.get(key) for key in ("city", "state", "country")]
+        return ", ".join(part for part in parts if part) or value.get("name")
+    return value
+
+
+def normalize_job(raw: Dict, stages: List[Dict], questions: List[Dict]) -> Dict:
+    """Knit job + its stages/questions in the shape the portal renders"""
+    job = {
+        "id": str(raw["id"]),
+        "title": raw.get("title") or raw.get("name") or "",
+        "status": raw.get("status") or "NOT_SPECIFIED",
+        "location": _format_location(raw.get("location") or raw.get("locations")) or "",
+        "department": _first_name(raw.get("department") or raw.get("departments")),
+        "created_at": raw.get("createdAt") or raw.get("created_at"),
+        "updated_at": raw.get("updatedAt") or raw.get("updated_at"),
+        "stages": [
+            {"id": str(stage["id"]), "text": stage.get("text") or stage.get("name") or ""}
+            for stage in stages
+        ],
+        "questions": [
+            {
+                "id": str(question["id"]),
+                "title": question.get("title") or question.get("question") or "",
+                "type": question.get("type"),
+                "required": bool(question.get("required"))
+            }
+            for question in questions
+        ]
+    }
+    if raw.get("description"):
+        job["description"] = raw["description"]
+    if raw.get("salary_range"):
+        job["salary_range"] = raw["salary_range"]
+    return job
+
+
+class JobCatalog:
+    """
+    Local cache of job catalogs, keyed by integration id
+
+    Backed by SQLite so the catalog survives restarts and can be shared by
+    several processes; reads are served from an in-memory copy that is
+    replaced whenever the catalog is written. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = "jobs.db",
+                 ttl: float = DEFAULT_TTL,
+                 full_refresh_interval: float = DEFAULT_FULL_REFRESH_INTERVAL):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway catalog)
+            ttl: Seconds before an integration is due for a refresh
+            full_refresh_interval: Seconds between full (pruning) refreshes
+        """
+        self.path = path
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, List[Dict]] = {}
+        # (version, job count per integration id)
+        self._counts: Optional[Tuple[int, Dict[str, int]]] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                integration_id TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (integration_id, job_id)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                integration_id TEXT PRIMARY KEY,
+                etag TEXT,
+                updated_since TEXT,
+                synced_at REAL NOT NULL,
+                full_synced_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def jobs(self, integration_id: str) -> List[Dict]:
+        """Cached jobs of an integration (never touches the network)"""
+        jobs = self._jobs.get(integration_id)
+        if jobs is None:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT data FROM jobs WHERE integration_id = ? ORDER BY job_id",
+                    (integration_id,)
+                ).fetchall()
+                jobs = [json.loads(row[0]) for row in rows]
+                self._jobs[integration_id] = jobs
+        return jobs
+
+    def counts(self) -> Dict[str, int]:
+        """Number of cached jobs per integration id, without loading any job"""
+        counts = self._counts
+        if counts is None or counts[0] != self.version:
+            with self._lock:
+                version = self.version
+                rows = self._conn.execute(
+                    "SELECT integration_id, COUNT(*) FROM jobs GROUP BY integration_id"
+                ).fetchall()
+                counts = self._counts = (version, dict(rows))
+        return dict(counts[1])
+
+    def job(self, integration_id: str, job_id: str) -> Optional[Dict]:
+        """One cached job, or None"""
+        for job in self.jobs(integration_id):
+            if job["id"] == str(job_id):
+                return job
+        return None
+
+    def state(self, integration_id: str) -> Optional[Dict]:
+        """
+        Returns:
+            Dict with etag, updated_since, synced_at and full_synced_at, or
+            None if the integration was never synced
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, updated_since, synced_at, full_synced_at FROM sync_state "
+                "WHERE integration_id = ?", (integration_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "updated_since": row[1], "synced_at": row[2], "full_synced_at": row[3]}
+
+    def is_due(self, integration_id: str) -> bool:
+        """Whether the integration's cache has outlived the TTL"""
+        state = self.state(integration_id)
+        return state is None or time.time() - state["synced_at"] >= self.ttl
+
+    def needs_full_refresh(self, integration_id: str) -> bool:
+        state = self.state(integration_id)
+        return state is None or time.time() - state["full_synced_at"] >= self.full_refresh_interval
+
+    def seed(self, integration_id: str, jobs: Iterable[Dict]):
+        """Load placeholder jobs for an integration that has never been synced"""
+        with self._lock:
+            synced = self._conn.execute(
+                "SELECT 1 FROM sync_state WHERE integration_id = ?", (integration_id,)
+            ).fetchone()
+            cached = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE integration_id = ? LIMIT 1", (integration_id,)
+            ).fetchone()
+            if synced or cached:
+                return
+            self._conn.executemany(
+                "INSERT INTO jobs (integration_id, job_id, data, synced_at) VALUES (?, ?, ?, 0)",
+                [(integration_id, str(job["id"]), json.dumps(job)) for job in jobs]
+            )
+            self._invalidate(integration_id)
+
+    def store(self, integration_id: str, jobs: List[Dict], etag: Optional[str],
+              updated_since: str, full: bool):
+        """
+        Write one refresh in a single transaction
+
+        Args:
+            jobs: Normalized jobs that were new or changed
+            etag: ETag of the jobs listing, if the API sent one
+            updated_since: Watermark for the next incremental refresh
+            full: The listing was complete; jobs not in it are removed
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO jobs (integration_id, job_id, data, synced_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(integration_id, job_id) DO UPDATE SET "
+                    "data = excluded.data, synced_at = excluded.synced_at",
+                    [(integration_id, job["id"], json.dumps(job), now) for job in jobs]
+                )
+                if full:
+                    self._conn.execute(
+                        "DELETE FROM jobs WHERE integration_id = ? AND synced_at < ?",
+                        (integration_id, now)
+                    )
+                self._conn.execute(
+                    "INSERT INTO sync_state (integration_id, etag, updated_since, synced_at, full_synced_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(integration_id) DO UPDATE SET etag = excluded.etag, "
+                    "updated_since = excluded.updated_since, synced_at = excluded.synced_at, "
+                    "full_synced_at = CASE WHEN ? THEN excluded.full_synced_at "
+                    "ELSE sync_state.full_synced_at END",
+                    (integration_id, etag, updated_since, now, now if full else 0, full)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._invalidate(integration_id)
+
+    def touch(self, integration_id: str):
+        """Mark an integration fresh without changes (the API answered 304)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sync_state SET synced_at = ? WHERE integration_id = ?",
+                (time.time(), integration_id)
+            )
+
+    def _invalidate(self, integration_id: str):
+        self._jobs.pop(integration_id, None)
+        self.version += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobSyncer:
+    """Refresh a JobCatalog from the Knit API, on demand or from a background thread"""
+
+    def __init__(self, api_key: str, catalog: JobCatalog,
+                 session: Optional[requests.Session] = None,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 page_size: int = 100):
+        """
+        Args:
+            api_key: Your Knit API key
+            catalog: Catalog to write to
+            session: requests.Session to reuse (one is created when omitted)
+            timeout: (connect, read) timeout for every API call
+            page_size: Jobs requested per page
+        """
+        self.api_key = api_key
+        self.catalog = catalog
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.page_size = page_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get(self, url: str, integration_id: str, params: Dict,
+             etag: Optional[str] = None) -> requests.Response:
+        headers = {
+            "accept": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "X-Knit-Integration-Id": integration_id
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _job_details(self, integration_id: str, raw: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """Stages and questions of a job (embedded in the listing or fetched)"""
+        details = []
+        for key, url in (("stages", JOB_STAGES_URL), ("questions", JOB_QUESTIONS_URL)):
+            if isinstance(raw.get(key), list):
+                details.append(raw[key])
+                continue
+            response = self._get(url, integration_id, {"jobId": raw["id"]})
+            details.append((response.json().get("data") or {}).get(key) or [])
+        return details[0], details[1]
+
+    def sync(self, integration_id: str, full: Optional[bool] = None) -> Dict:
+        """
+        Refresh one integration now
+
+        Args:
+            integration_id: Knit integration to refresh
+            full: Force (True) or skip (False) a full listing; by default one
+                  runs when the last is older than full_refresh_interval
+
+        Returns:
+            {"integration_id", "status": "updated" | "not_modified", "jobs": changed count}
+
+        Raises:
+            requests.exceptions.RequestException: The catalog is left untouched
+        """
+        state = self.catalog.state(integration_id)
+        if full is None:
+            full = self.catalog.needs_full_refresh(integration_id)
+        started = _utc_now()
+
+        params = {"pageSize": self.page_size}
+        etag = None
+        if not full and state:
+            etag = state["etag"]
+            if state["updated_since"]:
+                params[UPDATED_SINCE_PARAM] = state["updated_since"]
+
+        jobs, new_etag = [], None
+        cursor = None
+        while True:
+            if cursor:
+                params["cursor"] = cursor
+            response = self._get(JOBS_URL, integration_id, params, etag if cursor is None else None)
+            if response.status_code == 304:
+                self.catalog.touch(integration_id)
+                return {"integration_id": integration_id, "status": "not_modified", "jobs": 0}
+            if cursor is None:
+                new_etag = response.headers.get("ETag")
+            body = response.json()
+            for raw in (body.get("data") or {}).get("jobs") or []:
+                stages, questions = self._job_details(integration_id, raw)
+                jobs.append(normalize_job(raw, stages, questions))
+            cursor = (body.get("pagination") or {}).get("next")
+            if not cursor:
+                break
+
+        self.catalog.store(integration_id, jobs, new_etag, started, full)
+        return {"integration_id": integration_id, "status": "updated", "jobs": len(jobs)}
+
+    def sync_due(self, integration_ids: Iterable[str]) -> List[Dict]:
+        """Refresh every integration whose cache outlived the TTL; failures keep the cache"""
+        results = []
+        for integration_id in integration_ids:
+            try:
+                if not self.catalog.is_due(integration_id):
+                    continue
+                results.append(self.sync(integration_id))
+            except (requests.exceptions.RequestException, ValueError) as e:
+                log_event(logger, logging.WARNING, "jobsync.failed",
+                          integration_id=integration_id, error=str(e))
+                results.append({"integration_id": integration_id, "status": "failed", "error": str(e)})
+            except Exception as e:
+                # A changed Knit payload or a database error: not transient, so
+                # make it loud, but keep syncing the other integrations
+                error = f"{type(e).__name__}: {e}"
+                log_event(logger, logging.ERROR, "jobsync.error",
+                          integration_id=integration_id, error=error)
+                results.append({"integration_id": integration_id, "status": "failed", "error": error})
+        return results
+
+    def start(self, integration_ids: Iterable[str], interval: float = 60.0) -> threading.Thread:
+        """
+        Keep the catalog fresh from a daemon thread
+
+        Args:
+            integration_ids: Integrations to keep in sync
+            interval: Seconds between checks for integrations due a refresh
+        """
+        integration_ids = list(integration_ids)
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.sync_due(integration_ids)
+                except Exception as e:
+                    # Never let the thread die silently and leave the catalog stale
+                    log_event(logger, logging.ERROR, "jobsync.error", integration_id="*",
+                              error=f"{type(e).__name__}: {e}")
+                self._stop.wait(interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="job-sync", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
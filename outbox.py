@@ -0,0 +1,272 @@
+"""
+Durable local queue of outbound applications
+
+Applications are enqueued with one SQLite INSERT, so the caller returns in
+well under a millisecond and nothing is lost if the process dies before the
+Knit call is made. Workers (see outbox_worker.py) lease rows for a limited
+time; a worker that crashes simply stops renewing its leases and the rows
+become available to the others once they expire. Finishing a row is fenced
+on the lease owner, so a worker whose lease was taken over cannot overwrite
+the new outcome.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from attachments import Attachment
+
+
+STATUS_QUEUED = "queued"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+DEFAULT_LEASE_SECONDS = 60.0
+
+
+def is_success(result: Dict) -> bool:
+    success = result.get("success")
+    return success is True or success == "true"
+
+
+def is_transient(result: Dict) -> bool:
+    """
+    Whether a failed result may succeed if the row is sent again later
+
+    Only failures the creators flag explicitly count: no response at all
+    (connection error, timeout), 5xx, 429, an open circuit, a deadline that
+    ran out and a duplicate still in flight. Everything else - other 4xx
+    rejections, unsuccessful 2xx bodies, local errors such as a missing
+    attachment file - is definitive.
+    """
+    if any(result.get(flag) for flag in ("no_response", "circuit_open",
+                                          "deadline_exceeded", "in_progress")):
+        return True
+    status = result.get("status_code")
+    return status is not None and (status == 429 or status >= 500)
+
+
+def outbox_row(ats_name: str, application: Dict) -> Dict:
+    """
+    Turn create_application arguments into a storable bulk row
+
+    An Attachment read from a file is stored as its 'attachment_path', so the
+    worker streams it from disk; other Attachments (bytes, uploads) cannot be
+    persisted and must be passed as a ready attachment dict instead.
+
+    Raises:
+        ValueError: The attachment cannot be stored
+    """
+    row = {key: value for key, value in application.items() if value is not None}
+    attachment = row.get("attachment")
+    if isinstance(attachment, Attachment):
+        if not attachment._path:
+            raise ValueError("Only file-backed attachments can be queued; "
+                             "save the upload to disk or pass an attachment dict")
+        del row["attachment"]
+        row["attachment_path"] = os.path.abspath(attachment._path)
+    row["ats_name"] = ats_name
+    return row
+
+
+class Outbox:
+    """
+    SQLite-backed outbound queue shared by any number of local processes
+
+    Each row is queued -> leased -> done/failed. 'available_at' is when a
+    queued row may next be tried, or when a leased row's lease runs out, so
+    both ready and abandoned rows come from a single index range. Safe to
+    share between threads; every process opens its own Outbox on the file.
+    """
+
+    def __init__(self, path: str = "outbox.db"):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                     timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ats_name TEXT NOT NULL,
+                application TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                available_at REAL NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, available_at)"
+        )
+
+    def enqueue(self, row: Dict) -> int:
+        """
+        Queue one bulk row (a dict with 'ats_name' and application data)
+
+        Returns:
+            Outbox id of the row
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (ats_name, application, status, available_at, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (row["ats_name"], json.dumps(row), STATUS_QUEUED, now, now, now)
+            )
+        return cursor.lastrowid
+
+    def enqueue_many(self, rows: Iterable[Dict]) -> int:
+        """Queue an iterable of bulk rows in one transaction; returns the count"""
+        now = time.time()
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for row in rows:
+                    self._conn.execute(
+                        "INSERT INTO outbox (ats_name, application, status, available_at, "
+                        "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (row["ats_name"], json.dumps(row), STATUS_QUEUED, now, now, now)
+                    )
+                    count += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def lease(self, owner: str, limit: int,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[Dict]:
+        """
+        Claim up to limit rows that are due, oldest first
+
+        Includes leased rows whose lease expired (their worker died or hung);
+        each claim counts as an attempt.
+
+        Returns:
+            Dicts with id, ats_name, application (the bulk row) and attempts
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes can't
+            # both read the same due rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, ats_name, application, attempts FROM outbox "
+                    "WHERE status IN (?, ?) AND available_at <= ? ORDER BY id LIMIT ?",
+                    (STATUS_QUEUED, STATUS_LEASED, now, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, lease_owner = ?, available_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(STATUS_LEASED, owner, now + lease_seconds, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {"id": row[0], "ats_name": row[1], "application": json.loads(row[2]),
+             "attempts": row[3] + 1}
+            for row in rows
+        ]
+
+    def extend(self, ids: List[int], owner: str,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Renew the leases owner still holds on ids; returns how many were renewed"""
+        if not ids:
+            return 0
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.executemany(
+                "UPDATE outbox SET available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                [(now + lease_seconds, now, row_id, STATUS_LEASED, owner) for row_id in ids]
+            )
+        return cursor.rowcount
+
+    def _finish(self, row_id: int, owner: str, status: str, result: Dict,
+                available_at: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET status = ?, result = ?, available_at = ?, "
+                "lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, json.dumps(result), available_at, now, row_id, STATUS_LEASED, owner)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, row_id: int, owner: str, result: Dict) -> bool:
+        """
+        Record the final outcome of a leased row (done on success, else failed)
+
+        Returns:
+            False if owner no longer holds the lease (the outcome is dropped)
+        """
+        status = STATUS_DONE if is_success(result) else STATUS_FAILED
+        return self._finish(row_id, owner, status, result, time.time())
+
+    def retry(self, row_id: int, owner: str, result: Dict, delay: float) -> bool:
+        """Put a leased row back in the queue, due again after delay seconds"""
+        return self._finish(row_id, owner, STATUS_QUEUED, result, time.time() + delay)
+
+    def get(self, row_id: int) -> Optional[Dict]:
+        """
+        Returns:
+            Dict with id, ats_name, status, attempts, result and updated_at,
+            or None for an unknown id
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, ats_name, status, attempts, result, updated_at "
+                "FROM outbox WHERE id = ?", (row_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "ats_name": row[1],
+            "status": row[2],
+            "attempts": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "updated_at": row[5]
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts per status"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        counts = {status: 0 for status in (STATUS_QUEUED, STATUS_LEASED, STATUS_DONE, STATUS_FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def purge(self, older_than: float = 0.0) -> int:
+        """Delete done/failed rows last updated more than older_than seconds ago"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status IN (?, ?) AND updated_at <= ?",
+                (STATUS_DONE, STATUS_FAILED, time.time() - older_than)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
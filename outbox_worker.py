@@ -0,0 +1,246 @@
+"""
+Worker processes that drain the outbound application queue
+
+Each process leases a handful of rows at a time from the shared Outbox and
+submits them through its own creator. The per-ATS rate limits are split
+evenly between the processes, so together they stay within each quota.
+
+Usage:
+    python outbox_worker.py enqueue applications.jsonl
+    python outbox_worker.py work --processes 4 --concurrency 8 --drain
+    python outbox_worker.py stats
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from apply import ATSApplicationCreator
+from idempotency import SubmissionStore
+from instrumentation import configure_logging
+from outbox import DEFAULT_LEASE_SECONDS, Outbox, is_success, is_transient
+from preflight import validate_row
+from ratelimit import RateLimiter
+
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Backoff between attempts of a failed row: 2, 4, 8 ... seconds, capped
+MAX_RETRY_DELAY = 300.0
+
+
+class OutboxWorker:
+    """
+    Drains an Outbox through a creator with a fixed number of rows in flight
+
+    Rows go through creator.submit_bulk_item, so per-ATS max_concurrency,
+    rate limits and retries apply exactly as for bulk runs. Rows that fail
+    pre-flight validation or are rejected outright (4xx other than 429) fail
+    at once; transient failures (no response, 5xx, 429, open circuit,
+    deadline) are retried with exponential backoff until max_attempts.
+    """
+
+    def __init__(self, outbox: Outbox, creator: ATSApplicationCreator,
+                 concurrency: int = 8,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 poll_interval: float = 0.5,
+                 owner: Optional[str] = None,
+                 call_deadline: Optional[float] = None):
+        """
+        Args:
+            outbox: Queue to drain
+            creator: Client the rows are submitted through
+            concurrency: Rows in flight at once
+            lease_seconds: How long a claimed row stays reserved without renewal
+            max_attempts: Tries per row before it is marked failed
+            poll_interval: Seconds between polls when the queue is empty
+            owner: Lease owner id (defaults to host:pid:random)
+            call_deadline: Seconds each row may take, slot and rate-limit
+                           waits included; a row that runs out of time is
+                           retried like any other transient failure
+        """
+        self.outbox = outbox
+        self.creator = creator
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.call_deadline = call_deadline
+        self.counts = {"succeeded": 0, "failed": 0, "retried": 0, "lost": 0}
+        self._counts_lock = threading.Lock()
+
+    def _count(self, outcome: str):
+        with self._counts_lock:
+            self.counts[outcome] += 1
+
+    def _process(self, item: Dict):
+        row = item["application"]
+        error = validate_row(row, self.creator.ats_configs)
+        if error:
+            result = {"success": False, "error": error}
+        else:
+            result = self.creator.submit_bulk_item(row, self.call_deadline)["result"]
+
+        if (error or is_success(result) or not is_transient(result)
+                or item["attempts"] >= self.max_attempts):
+            recorded = self.outbox.complete(item["id"], self.owner, result)
+            outcome = "succeeded" if is_success(result) else "failed"
+        else:
+            delay = min(MAX_RETRY_DELAY, 2.0 ** item["attempts"])
+            recorded = self.outbox.retry(item["id"], self.owner, result, delay)
+            outcome = "retried"
+        # A lost lease means another worker owns the row now
+        self._count(outcome if recorded else "lost")
+
+    def run(self, stop: Optional[threading.Event] = None, drain: bool = False) -> Dict:
+        """
+        Work until stop is set (or, with drain, until nothing is due)
+
+        Returns:
+            Counts of succeeded, failed, retried and lost rows
+        """
+        stop = stop or threading.Event()
+        in_flight = {}
+        renew_every = self.lease_seconds / 3
+        last_renewal = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix="outbox") as executor:
+            while not stop.is_set() or in_flight:
+                if not stop.is_set():
+                    for item in self.outbox.lease(self.owner, self.concurrency - len(in_flight),
+                                                  self.lease_seconds):
+                        in_flight[executor.submit(self._process, item)] = item["id"]
+
+                if not in_flight:
+                    if drain:
+                        break
+                    stop.wait(self.poll_interval)
+                    continue
+
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del in_flight[future]
+                    future.result()
+
+                # Heartbeat: keep slow rows (rate limited, retrying) leased
+                if in_flight and time.monotonic() - last_renewal >= renew_every:
+                    self.outbox.extend(list(in_flight.values()), self.owner, self.lease_seconds)
+                    last_renewal = time.monotonic()
+        return dict(self.counts)
+
+
+def _work_process(args: argparse.Namespace, api_key: str, share: float, drain: bool) -> Dict:
+    if args.verbose or args.log_json:
+        configure_logging(logging.DEBUG if args.verbose else logging.INFO, json_lines=args.log_json)
+    outbox = Outbox(args.db)
+    dedup_store = SubmissionStore(args.dedup) if args.dedup else None
+    try:
+        with ATSApplicationCreator(api_key, config_file=args.config,
+                                   pool_maxsize=max(10, args.concurrency),
+                                   dedup_store=dedup_store) as creator:
+            # Each process gets its share of every ATS quota
+            creator.rate_limiter = RateLimiter(creator.ats_configs, share=share)
+            worker = OutboxWorker(outbox, creator, concurrency=args.concurrency,
+                                  lease_seconds=args.lease, max_attempts=args.max_attempts,
+                                  call_deadline=args.deadline)
+            counts = worker.run(drain=drain)
+    except KeyboardInterrupt:
+        counts = {}
+    finally:
+        outbox.close()
+        if dedup_store is not None:
+            dedup_store.close()
+    print(f"✓ Worker {os.getpid()}: {counts}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable outbound application queue")
+    parser.add_argument("--db", default="outbox.db", help="Outbox database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue applications from JSONL or CSV")
+    enqueue.add_argument("input", help="Applications file (.jsonl or .csv)")
+
+    work = commands.add_parser("work", help="Drain the queue")
+    work.add_argument("--processes", type=int, default=1, help="Worker processes")
+    work.add_argument("--concurrency", type=int, default=8, help="Rows in flight per process")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                      help="Lease length in seconds")
+    work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work.add_argument("--drain", action="store_true", help="Exit once nothing is due")
+    work.add_argument("--deadline", type=float, help="Seconds each application may take")
+    work.add_argument("--config", default="ats_config.json", help="ATS configuration file")
+    work.add_argument("--dedup", help="SubmissionStore database shared by the workers")
+    work.add_argument("--verbose", action="store_true", help="Log every application")
+    work.add_argument("--log-json", action="store_true", help="Log events as JSON lines")
+
+    purge = commands.add_parser("purge", help="Delete finished rows")
+    purge.add_argument("--older-than", type=float, default=0.0, help="Seconds")
+
+    commands.add_parser("stats", help="Show row counts per status")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        from ingest import MalformedRow, iter_rows
+        outbox = Outbox(args.db)
+        malformed = []
+
+        def parsed_rows():
+            for row_number, row in iter_rows(args.input):
+                if isinstance(row, MalformedRow):
+                    malformed.append((row_number, row.error))
+                else:
+                    yield row
+
+        count = outbox.enqueue_many(parsed_rows())
+        print(f"✓ Queued {count} applications")
+        for row_number, error in malformed:
+            print(f"⚠ Skipped row {row_number}: {error}")
+    elif args.command == "work":
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        api_key = os.getenv("KNIT_API_KEY")
+        if not api_key:
+            print("❌ Error: KNIT_API_KEY is not set")
+            sys.exit(1)
+        processes = max(1, args.processes)
+        if processes == 1:
+            _work_process(args, api_key, 1.0, args.drain)
+        else:
+            workers = [multiprocessing.Process(target=_work_process,
+                                               args=(args, api_key, 1.0 / processes, args.drain))
+                       for _ in range(processes)]
+            for process in workers:
+                process.start()
+            try:
+                for process in workers:
+                    process.join()
+            except KeyboardInterrupt:
+                for process in workers:
+                    process.join()
+        outbox = Outbox(args.db)
+    elif args.command == "purge":
+        outbox = Outbox(args.db)
+        print(f"✓ Deleted {outbox.purge(args.older_than)} rows")
+    else:
+        outbox = Outbox(args.db)
+    print(f"  Outbox: {outbox.stats()}")
+    outbox.close()
+
+
+if __name__ == "__main__":
+    main()
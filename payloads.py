@@ -0,0 +1,228 @@
+import json
+import weakref
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+from config import ATSConfig
+
+
+def dumps(payload: Dict) -> bytes:
+    """Serialize a payload to compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def build_candidate(first_name: str,
+                    last_name: str,
+                    email: str,
+                    phone: str,
+                    title: str = None,
+                    company: str = None,
+                    degree: str = None,
+                    major: str = None,
+                    institute: str = None,
+                    currently_pursuing: bool = None,
+                    address_line1: str = None,
+                    city: str = None,
+                    state: str = None,
+                    country: str = None,
+                    zip_code: str = None,
+                    work_address: Dict = None,
+                    permanent_address: Dict = None,
+                    links: List[Dict] = None) -> Dict:
+    """Generate candidate object with provided details"""
+    candidate = {
+        "firstName": first_name,
+        "lastName": last_name,
+        "phones": [{"type": "PERSONAL", "phoneNumber": phone}],
+        "emails": [{"type": "PERSONAL", "email": email}]
+    }
+
+    # Add optional fields
+    if title:
+        candidate["title"] = title
+    if company:
+        candidate["company"] = company
+    if links:
+        candidate["links"] = links
+
+    # Add education if provided
+    if degree or major or institute:
+        candidate["education"] = [{
+            "id": "1",
+            "degree": degree or "bachelors degree",
+            "currentlyPursuing": currently_pursuing if currently_pursuing is not None else True,
+            "major": major or "General",
+            "institute": institute or "University"
+        }]
+
+    # Add addresses
+    if address_line1 or city or state or country or zip_code:
+        candidate["presentAddress"] = {
+            "addressLine1": address_line1 or "",
+            "city": city or "",
+            "state": state or "",
+            "country": country or "",
+            "zipCode": zip_code or ""
+        }
+
+    if work_address:
+        candidate["workAddress"] = work_address
+
+    if permanent_address:
+        candidate["permanentAddress"] = permanent_address
+
+    return candidate
+
+
+def _drop_tree(paths) -> Dict:
+    """Nest dotted payload paths, e.g. {"candidate": {"title": None}, "answers": None}"""
+    tree = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        node = tree
+        for part in parents:
+            node = node.setdefault(part, {})
+            if node is None:
+                # The whole parent is dropped already
+                break
+        else:
+            node[leaf] = None
+    return tree
+
+
+def _without(value, tree: Dict):
+    """Copy of a payload object without the paths in tree (callers' dicts are not modified)"""
+    if isinstance(value, str) and value[:1] == "{":
+        # metaData may be given as an already-serialized JSON object
+        try:
+            return json.dumps(_without(json.loads(value), tree))
+        except ValueError:
+            return value
+    if not isinstance(value, dict):
+        return value
+    value = dict(value)
+    for key, subtree in tree.items():
+        if key not in value:
+            continue
+        if subtree is None:
+            del value[key]
+        else:
+            value[key] = _without(value[key], subtree)
+    return value
+
+
+class PayloadTemplate:
+    """
+    Payload builder precompiled from one ATS's configuration
+
+    Everything that only depends on the config is resolved once: whether a
+    candidate object is required, which fields the ATS does not support
+    ('unsupported_fields', e.g. "answers", "candidate.presentAddress.zipCode"
+    or "metaData.countryCodeId", at any depth) and the static request headers.
+    """
+
+    def __init__(self, config: ATSConfig):
+        self.config = config
+        self.requires_candidate_object = config.requires_candidate_object
+        self.drop_fields = _drop_tree(config.unsupported_fields)
+        self.static_headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "X-Knit-Integration-Id": config.integration_id
+        }
+        self._headers: Dict[str, Dict[str, str]] = {}
+
+    def headers(self, api_key: str) -> Dict[str, str]:
+        """Request headers for an API key (a fresh copy the caller may extend)"""
+        headers = self._headers.get(api_key)
+        if headers is None:
+            headers = dict(self.static_headers, Authorization="Bearer " + api_key)
+            self._headers[api_key] = headers
+        return headers.copy()
+
+    def build(self,
+              job_id: str,
+              initial_stage_id: str,
+              first_name: str,
+              last_name: str,
+              email: str,
+              phone: str,
+              candidate_id: str = None,
+              title: str = None,
+              company: str = None,
+              degree: str = None,
+              major: str = None,
+              institute: str = None,
+              currently_pursuing: bool = None,
+              address_line1: str = None,
+              city: str = None,
+              state: str = None,
+              country: str = None,
+              zip_code: str = None,
+              work_address: Dict = None,
+              permanent_address: Dict = None,
+              links: List[Dict] = None,
+              answers: Optional[List[Dict]] = None,
+              metadata: Optional[Dict] = None,
+              attachment=None,
+              source: str = None) -> Dict:
+        """Build the application payload, leaving out fields the ATS doesn't support"""
+        payload = {
+            "jobId": job_id,
+            "initialStageId": initial_stage_id
+        }
+
+        # Add candidate ID or candidate object
+        if candidate_id:
+            payload["candidateId"] = candidate_id
+
+        # Add candidate object (required for some ATS or if candidateId not provided)
+        if not candidate_id or self.requires_candidate_object:
+            candidate = build_candidate(
+                first_name, last_name, email, phone, title, company,
+                degree, major, institute, currently_pursuing,
+                address_line1, city, state, country, zip_code,
+                work_address, permanent_address, links
+            )
+            payload["candidate"] = candidate
+
+        # Add optional fields
+        if answers:
+            payload["answers"] = answers
+        if metadata:
+            payload["metaData"] = metadata
+        if attachment:
+            payload["attachment"] = attachment
+        if source:
+            payload["source"] = source
+
+        for field, subtree in self.drop_fields.items():
+            if field not in payload:
+                continue
+            if subtree is None:
+                del payload[field]
+            else:
+                payload[field] = _without(payload[field], subtree)
+        # Serialized last so nested metaData keys can be dropped first
+        if isinstance(payload.get("metaData"), dict):
+            payload["metaData"] = json.dumps(payload["metaData"])
+        return payload
+
+
+# Compiled templates, dropped automatically when a reloaded config replaces them
+_templates: "weakref.WeakKeyDictionary[ATSConfig, PayloadTemplate]" = weakref.WeakKeyDictionary()
+
+
+def template_for(config: ATSConfig) -> PayloadTemplate:
+    """Compiled PayloadTemplate for an ATS configuration"""
+    template = _templates.get(config)
+    if template is None:
+        template = PayloadTemplate(config)
+        _templates[config] = template
+    return template
@@ -0,0 +1,258 @@
+"""
+Local pre-flight validation of applications against each ATS's capabilities
+
+Capabilities come from two ats_config.json keys holding payload paths:
+
+    "unsupported_fields": ["answers", "candidate.title"]   dropped before sending
+    "required_fields": ["metaData.countryCodeId"]          must be present
+
+A bulk batch is validated column-wise per ATS before any network I/O: rows
+are grouped by ats_name and each compiled check runs once over its group,
+so rows Knit would reject never cost an API call.
+"""
+import json
+import logging
+import weakref
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from config import ATSConfig, ConfigError
+from instrumentation import get_logger, log_event
+
+logger = get_logger("preflight")
+
+# Row keys every application needs regardless of ATS
+REQUIRED_FIELDS = ("ats_name", "job_id", "initial_stage_id",
+                   "first_name", "last_name", "email", "phone")
+
+# Payload path -> application row key(s) it is built from
+PAYLOAD_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "jobId": ("job_id",),
+    "initialStageId": ("initial_stage_id",),
+    "candidateId": ("candidate_id",),
+    "answers": ("answers",),
+    "metaData": ("metadata",),
+    "attachment": ("attachment",),
+    "source": ("source",),
+    "candidate.firstName": ("first_name",),
+    "candidate.lastName": ("last_name",),
+    "candidate.phones": ("phone",),
+    "candidate.emails": ("email",),
+    "candidate.title": ("title",),
+    "candidate.company": ("company",),
+    "candidate.links": ("links",),
+    "candidate.education": ("degree", "major", "institute"),
+    "candidate.presentAddress": ("address_line1", "city", "state", "country", "zip_code"),
+    "candidate.presentAddress.addressLine1": ("address_line1",),
+    "candidate.presentAddress.city": ("city",),
+    "candidate.presentAddress.state": ("state",),
+    "candidate.presentAddress.country": ("country",),
+    "candidate.presentAddress.zipCode": ("zip_code",),
+    "candidate.workAddress": ("work_address",),
+    "candidate.permanentAddress": ("permanent_address",),
+}
+
+RowCheck = Callable[[Dict], bool]
+
+
+def _nested(value, keys: List[str]):
+    for key in keys:
+        if isinstance(value, str) and value[:1] == "{":
+            # metaData may be given as an already-serialized JSON object
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return None
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def resolve_field(path: str) -> Tuple[Tuple[str, ...], List[str]]:
+    """
+    Split a payload path into the row key(s) it is built from and the keys
+    below them (e.g. "metaData.countryCodeId" -> (("metadata",), ["countryCodeId"]))
+
+    Raises:
+        ValueError: The path does not start with a known payload field
+    """
+    parts = path.split(".")
+    for split in range(len(parts), 0, -1):
+        columns = PAYLOAD_COLUMNS.get(".".join(parts[:split]))
+        if columns is not None:
+            return columns, parts[split:]
+    raise ValueError(f"unknown payload field '{path}'")
+
+
+def _presence_check(ats_name: str, path: str) -> RowCheck:
+    """Compile a payload path into a predicate: is it set in an application row?"""
+    try:
+        columns, rest = resolve_field(path)
+    except ValueError as e:
+        raise ConfigError(f"ATS '{ats_name}': {e}") from None
+    if not rest:
+        if len(columns) == 1:
+            column = columns[0]
+            return lambda row: bool(row.get(column))
+        return lambda row: any(row.get(column) for column in columns)
+    column = columns[0]
+    return lambda row: bool(_nested(row.get(column), rest))
+
+
+class Capabilities:
+    """Pre-flight checks compiled once from one ATS's configuration"""
+
+    def __init__(self, config: ATSConfig):
+        self.config = config
+        self.requires_candidate_object = config.requires_candidate_object
+        self.required = [(path, _presence_check(config.name, path)) for path in config.required_fields]
+        self.unsupported = [(path, _presence_check(config.name, path))
+                            for path in config.unsupported_fields]
+
+    def sends_candidate(self, row: Dict) -> bool:
+        """Whether the payload for this row carries a candidate object"""
+        return not row.get("candidate_id") or self.requires_candidate_object
+
+    def check(self, rows: List[Dict]) -> Tuple[List[List[str]], List[List[str]]]:
+        """
+        Validate rows bound for this ATS
+
+        Returns:
+            (errors, warnings): one list of messages per row
+        """
+        errors: List[List[str]] = [[] for _ in rows]
+        warnings: List[List[str]] = [[] for _ in rows]
+        if not self.required and not self.unsupported:
+            return errors, warnings
+
+        with_candidate = [self.sends_candidate(row) for row in rows]
+        name = self.config.name
+        for path, present in self.required:
+            # candidate.* requirements only apply when a candidate object is sent
+            conditional = path.startswith("candidate.")
+            for i, row in enumerate(rows):
+                if (not conditional or with_candidate[i]) and not present(row):
+                    errors[i].append(f"{name}: {path} is required")
+        for path, present in self.unsupported:
+            for i, row in enumerate(rows):
+                if present(row):
+                    warnings[i].append(f"{name}: {path} is not supported and will be dropped")
+        return errors, warnings
+
+
+# Compiled per ATSConfig; a config reload compiles fresh checks
+_capabilities: "weakref.WeakKeyDictionary[ATSConfig, Capabilities]" = weakref.WeakKeyDictionary()
+
+
+def capabilities_for(config: ATSConfig) -> Capabilities:
+    """Compiled Capabilities for an ATS configuration"""
+    capabilities = _capabilities.get(config)
+    if capabilities is None:
+        capabilities = Capabilities(config)
+        _capabilities[config] = capabilities
+    return capabilities
+
+
+class PreflightReport:
+    """Outcome of validating a batch: per-row errors/warnings plus batch totals"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.errors: Dict[int, List[str]] = {}
+        self.warnings: Dict[int, List[str]] = {}
+
+    def _add(self, target: Dict[int, List[str]], index: int, messages: List[str]):
+        if messages:
+            target.setdefault(index, []).extend(messages)
+
+    def is_valid(self, index: int) -> bool:
+        return index not in self.errors
+
+    @property
+    def valid_count(self) -> int:
+        return self.total - len(self.errors)
+
+    def error_result(self, index: int) -> Dict:
+        """Result recorded for a row rejected before sending"""
+        errors = self.errors[index]
+        return {"success": False, "error": "Pre-flight validation failed: " + "; ".join(errors),
+                "preflight_errors": errors}
+
+    @staticmethod
+    def _count(messages: Dict[int, List[str]]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for row_messages in messages.values():
+            for message in row_messages:
+                counts[message] = counts.get(message, 0) + 1
+        return counts
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            {"total", "valid", "invalid", "errors": {message: rows},
+             "warnings": {message: rows}}
+        """
+        return {
+            "total": self.total,
+            "valid": self.valid_count,
+            "invalid": len(self.errors),
+            "errors": self._count(self.errors),
+            "warnings": self._count(self.warnings)
+        }
+
+    def log_summary(self):
+        """Log the summary as a 'preflight.summary' event (a warning if any row is invalid)"""
+        summary = self.summary()
+        log_event(logger, logging.WARNING if summary["invalid"] else logging.INFO,
+                  "preflight.summary", **summary)
+
+
+def validate_batch(applications: Iterable[Dict], ats_configs: Mapping[str, ATSConfig]) -> PreflightReport:
+    """
+    Validate a batch of application rows locally
+
+    Args:
+        applications: Dicts containing 'ats_name' and application data
+        ats_configs: ATS configurations keyed by ATS name (e.g. a ConfigRegistry)
+
+    Returns:
+        PreflightReport indexed by position in applications
+    """
+    rows = applications if isinstance(applications, list) else list(applications)
+    report = PreflightReport(len(rows))
+
+    for field in REQUIRED_FIELDS:
+        for index, row in enumerate(rows):
+            if not row.get(field):
+                report._add(report.errors, index, [f"Missing required field: {field}"])
+
+    groups: Dict[str, List[int]] = {}
+    for index, row in enumerate(rows):
+        if row.get("ats_name"):
+            groups.setdefault(row["ats_name"], []).append(index)
+
+    configs = ats_configs.configs if hasattr(ats_configs, "configs") else ats_configs
+    for ats_name, indexes in groups.items():
+        config = configs.get(ats_name)
+        if config is None:
+            for index in indexes:
+                report._add(report.errors, index, [f"ATS '{ats_name}' not found in configuration"])
+            continue
+        errors, warnings = capabilities_for(config).check([rows[i] for i in indexes])
+        for index, row_errors, row_warnings in zip(indexes, errors, warnings):
+            report._add(report.errors, index, row_errors)
+            report._add(report.warnings, index, row_warnings)
+    return report
+
+
+def validate_row(row: Dict, ats_configs: Mapping[str, ATSConfig]) -> Optional[str]:
+    """
+    Pre-flight check for a single row
+
+    Returns:
+        Error message, or None if the row looks submittable
+    """
+    report = validate_batch([row], ats_configs)
+    if report.is_valid(0):
+        return None
+    return "; ".join(report.errors[0])
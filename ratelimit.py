@@ -0,0 +1,305 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+from deadline import Deadline, DeadlineExceeded
+
+
+# Fraction of an advertised quota we aim to use, so bulk runs stay just under it
+QUOTA_HEADROOM = 0.9
+
+# Lowest send rate (requests/second) adaptive throttling will back off to
+MIN_RATE = 0.1
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds to wait
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP-date
+        now: Current wall-clock time (defaults to time.time())
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now if now is not None else time.time()))
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    """First present header among names (headers may be case-sensitive dicts)"""
+    lowered = None
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            if lowered is None:
+                lowered = {k.lower(): v for k, v in headers.items()}
+            value = lowered.get(name.lower())
+        if value is not None:
+            return value
+    return None
+
+
+def _reset_seconds(value: Optional[str], now: float) -> Optional[float]:
+    """Rate-limit reset headers are either seconds-from-now or an epoch timestamp"""
+    if value is None:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    # Anything larger than a day is an absolute epoch timestamp
+    if reset > 86400:
+        reset -= now
+    return max(0.0, reset)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose rate can be adjusted at runtime
+
+    reserve() never blocks: it claims the next send slot and returns how long
+    the caller must wait, so it works for both threads and asyncio.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Sustained requests per second (None = unlimited until throttled)
+            burst: Maximum tokens that can accumulate (defaults to max(1, rate))
+        """
+        self.configured_rate = rate
+        self.rate = rate if rate else float("inf")
+        self.burst = burst if burst else max(1.0, rate or 1.0)
+        # throttle() shrinks burst with the rate; recover() grows it back up to this
+        self.configured_burst = self.burst
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Observed send rate, used to seed throttling for unconfigured limits
+        self._window_start = self._updated
+        self._window_count = 0
+        self._observed_rate = 0.0
+
+    def _refill(self, now: float):
+        if self.rate != float("inf"):
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        else:
+            self.tokens = self.burst
+        self._updated = now
+
+        if now - self._window_start >= 1.0:
+            self._observed_rate = self._window_count / (now - self._window_start)
+            self._window_start = now
+            self._window_count = 0
+
+    def reserve(self) -> float:
+        """
+        Claim one send slot
+
+        Returns:
+            Seconds the caller must wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._window_count += 1
+
+            wait = max(0.0, self.paused_until - now)
+            if self.rate == float("inf"):
+                return wait
+
+            # Tokens may go negative: later callers queue up behind earlier ones
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def delay(self) -> float:
+        """Seconds a reserve() made now would have to wait, without claiming anything"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.paused_until - now)
+            if self.rate != float("inf") and self.tokens < 1:
+                wait = max(wait, (1 - self.tokens) / self.rate)
+            return wait
+
+    def cancel(self):
+        """Give back a slot claimed by reserve() that will not be used"""
+        with self._lock:
+            # The window may have rolled over since the reserve()
+            self._window_count = max(0, self._window_count - 1)
+            if self.rate != float("inf"):
+                self.tokens += 1
+
+    def pause(self, seconds: float):
+        """Hold every send until `seconds` from now"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def set_rate(self, rate: float):
+        """Change the sustained rate, never above the configured limit"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.configured_rate:
+                rate = min(rate, self.configured_rate)
+            self.rate = max(MIN_RATE, rate)
+            self.tokens = min(self.tokens, self.burst)
+
+    def throttle(self):
+        """Multiplicative decrease after a 429"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                # Concurrent 429s from the same throttling episode count once
+                return
+            self._refill(now)
+            current = self.rate
+            if current == float("inf"):
+                current = max(1.0, self._observed_rate, self._window_count)
+            self.rate = max(MIN_RATE, current / 2)
+            self.burst = max(1.0, min(self.burst, self.rate))
+            self.tokens = min(self.tokens, 0.0)
+
+    def recover(self):
+        """Additive increase back toward the configured rate after a success"""
+        with self._lock:
+            if self.rate == float("inf"):
+                return
+            ceiling = self.configured_rate or float("inf")
+            if self.rate < ceiling:
+                self.rate = min(ceiling, self.rate + max(0.1, self.rate * 0.05))
+                # Full burst again once the configured rate is back
+                self.burst = (self.configured_burst if self.rate >= ceiling
+                              else min(self.configured_burst, max(1.0, self.rate)))
+
+
+class RateLimiter:
+    """
+    Per-integration token buckets driven by ats_config.json
+
+    Each ATS may declare a 'rate_limit' block:
+
+        "rate_limit": {"requests_per_second": 5, "burst": 10}
+
+    Buckets are keyed on integration_id, so ATS names sharing an integration
+    share its quota. Responses feed back through observe(): 429s pause the
+    bucket for Retry-After and halve its rate, and rate-limit headers
+    (X-RateLimit-Remaining / X-RateLimit-Reset) pace sends to use just under
+    the advertised quota.
+    """
+
+    def __init__(self, ats_configs: Mapping[str, Mapping], share: float = 1.0):
+        """
+        Args:
+            ats_configs: ATS configurations keyed by ATS name
+            share: Fraction of each quota this limiter may use, e.g. 1/N when
+                   N worker processes send against the same quotas
+        """
+        self.ats_configs = ats_configs
+        self.share = share
+        self._buckets: Dict[str, Tuple[Dict, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, ats_name: str) -> TokenBucket:
+        """Get (or create) the bucket for an ATS's integration"""
+        config = self.ats_configs[ats_name]
+        integration_id = config["integration_id"]
+        limits = config.get("rate_limit") or {}
+        entry = self._buckets.get(integration_id)
+        if entry is None or entry[0] != limits:
+            with self._lock:
+                entry = self._buckets.get(integration_id)
+                if entry is None or entry[0] != limits:
+                    # First use, or the rate_limit block was edited
+                    rate = limits.get("requests_per_second")
+                    burst = limits.get("burst")
+                    bucket = TokenBucket(rate * self.share if rate else None,
+                                         max(1.0, burst * self.share) if burst else None)
+                    entry = (limits, bucket)
+                    self._buckets[integration_id] = entry
+        return entry[1]
+
+    def reserve(self, ats_name: str, deadline: Optional[Deadline] = None) -> float:
+        """
+        Claim a send slot for an ATS and return the seconds to wait first
+
+        Raises:
+            DeadlineExceeded: The wait would outlast the deadline (the slot is given back)
+        """
+        bucket = self.bucket(ats_name)
+        delay = bucket.reserve()
+        if deadline is not None and delay > 0 and delay >= deadline.remaining():
+            bucket.cancel()
+            raise DeadlineExceeded(f"Rate limit for {ats_name} needs a {delay:.1f}s wait, "
+                                   f"only {deadline.remaining():.1f}s left")
+        return delay
+
+    def delay(self, ats_name: str) -> float:
+        """Seconds until an ATS could be sent a request without waiting (0 = now)"""
+        return self.bucket(ats_name).delay()
+
+    def cancel(self, ats_name: str):
+        """Give back a slot claimed by reserve() whose request was not sent"""
+        self.bucket(ats_name).cancel()
+
+    def acquire(self, ats_name: str, deadline: Optional[Deadline] = None):
+        """Block the calling thread until an ATS may be sent another request"""
+        delay = self.reserve(ats_name, deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    def observe(self, ats_name: str, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Adapt an ATS's send rate from a response
+
+        Args:
+            ats_name: ATS the request was sent to
+            status_code: HTTP status of the response
+            headers: Response headers
+
+        Returns:
+            Seconds to wait before retrying when throttled (429), else None
+        """
+        bucket = self.bucket(ats_name)
+        now = time.time()
+
+        remaining = _header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _reset_seconds(_header(headers, "X-RateLimit-Reset", "RateLimit-Reset"), now)
+        if remaining is not None and reset:
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                remaining = None
+            if remaining is not None:
+                if remaining <= 0:
+                    bucket.pause(reset)
+                else:
+                    bucket.set_rate(remaining / reset * QUOTA_HEADROOM * self.share)
+
+        if status_code == 429:
+            retry_after = parse_retry_after(_header(headers, "Retry-After"), now)
+            if retry_after is None:
+                retry_after = reset if reset else 1.0
+            bucket.throttle()
+            bucket.pause(retry_after)
+            return retry_after
+
+        if status_code < 400 and remaining is None:
+            bucket.recover()
+        return None
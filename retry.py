@@ -0,0 +1,298 @@
+import random
+import threading
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from deadline import Deadline
+
+
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy:
+    """
+    How often and how patiently to retry one ATS
+
+    Configured per ATS with an optional 'retry' block in ats_config.json:
+
+        "retry": {
+            "max_attempts": 4,
+            "backoff": "exponential",
+            "base_delay": 0.5,
+            "max_delay": 20,
+            "jitter": "full",
+            "retry_statuses": [429, 500, 502, 503, 504]
+        }
+    """
+
+    BACKOFFS = ("exponential", "linear", "constant")
+    JITTERS = ("full", "equal", "none")
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 backoff: str = "exponential",
+                 base_delay: float = 0.5,
+                 max_delay: float = 20.0,
+                 multiplier: float = 2.0,
+                 jitter: str = "full",
+                 retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+                 retry_on_timeout: bool = False):
+        """
+        Args:
+            max_attempts: Total attempts including the first one
+            backoff: Delay curve - exponential, linear or constant
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound for any single delay
+            multiplier: Growth factor for exponential backoff
+            jitter: full (0..delay), equal (delay/2..delay) or none
+            retry_statuses: HTTP status codes worth retrying
+            retry_on_timeout: Retry read timeouts too (the application may
+                              already have been created upstream)
+        """
+        if backoff not in self.BACKOFFS:
+            raise ValueError(f"Unknown backoff '{backoff}'. Available: {list(self.BACKOFFS)}")
+        if jitter not in self.JITTERS:
+            raise ValueError(f"Unknown jitter '{jitter}'. Available: {list(self.JITTERS)}")
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_on_timeout = retry_on_timeout
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict], default: Optional["RetryPolicy"] = None) -> "RetryPolicy":
+        """Build a policy from a 'retry' config block, falling back to default's values"""
+        base = default or cls()
+        config = config or {}
+        return cls(
+            max_attempts=config.get("max_attempts", base.max_attempts),
+            backoff=config.get("backoff", base.backoff),
+            base_delay=config.get("base_delay", base.base_delay),
+            max_delay=config.get("max_delay", base.max_delay),
+            multiplier=config.get("multiplier", base.multiplier),
+            jitter=config.get("jitter", base.jitter),
+            retry_statuses=config.get("retry_statuses", base.retry_statuses),
+            retry_on_timeout=config.get("retry_on_timeout", base.retry_on_timeout)
+        )
+
+    def delay(self, retry_number: int) -> float:
+        """
+        Seconds to wait before a retry
+
+        Args:
+            retry_number: 1 for the first retry, 2 for the second, ...
+        """
+        if self.backoff == "exponential":
+            delay = self.base_delay * self.multiplier ** (retry_number - 1)
+        elif self.backoff == "linear":
+            delay = self.base_delay * retry_number
+        else:
+            delay = self.base_delay
+        delay = min(delay, self.max_delay)
+
+        if self.jitter == "full":
+            return random.uniform(0, delay)
+        if self.jitter == "equal":
+            return delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries so an outage can't multiply outbound traffic
+
+    Every first attempt deposits `ratio` tokens and every retry spends one,
+    so retries stay below ratio x requests. A small floor of retries per
+    second keeps low-traffic periods from being starved.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0,
+                 max_balance: float = 100.0):
+        """
+        Args:
+            ratio: Retries allowed per original request (0.2 = at most 20% extra traffic)
+            min_retries_per_second: Retries always allowed regardless of traffic
+            max_balance: Cap on banked retry tokens
+        """
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_balance = max_balance
+        self._balance = min(max_balance, min_retries_per_second)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self.max_balance,
+                            self._balance + (now - self._updated) * self.min_retries_per_second)
+        self._updated = now
+
+    def record_request(self):
+        """Deposit for one original (non-retry) request"""
+        with self._lock:
+            self._refill()
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry; False when the budget is exhausted"""
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryMetrics:
+    """Thread-safe retry counters, overall and per ATS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, ats_name: str, attempts: int, added_latency: float, budget_exhausted: bool):
+        with self._lock:
+            stats = self._stats.setdefault(ats_name, {
+                "requests": 0, "retries": 0, "budget_exhausted": 0, "added_latency_seconds": 0.0
+            })
+            stats["requests"] += 1
+            stats["retries"] += attempts - 1
+            stats["budget_exhausted"] += int(budget_exhausted)
+            stats["added_latency_seconds"] += added_latency
+
+    @staticmethod
+    def _summarize(stats: Dict[str, float]) -> Dict[str, float]:
+        requests = stats["requests"]
+        return dict(
+            stats,
+            retry_rate=stats["retries"] / requests if requests else 0.0,
+            avg_added_latency_seconds=stats["added_latency_seconds"] / requests if requests else 0.0
+        )
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            {"total": {...}, "per_ats": {ats_name: {...}}} where each entry has
+            requests, retries, budget_exhausted, added_latency_seconds,
+            retry_rate (retries per request) and avg_added_latency_seconds
+        """
+        with self._lock:
+            total = {"requests": 0, "retries": 0, "budget_exhausted": 0, "added_latency_seconds": 0.0}
+            for stats in self._stats.values():
+                for key in total:
+                    total[key] += stats[key]
+            return {
+                "total": self._summarize(total),
+                "per_ats": {name: self._summarize(stats) for name, stats in self._stats.items()}
+            }
+
+
+class RetryCall:
+    """
+    Retry bookkeeping for a single application submission
+
+    Sans-IO so the blocking and asyncio clients share it: the caller sends,
+    asks retry_delay() whether and how long to wait, and calls finish().
+    """
+
+    def __init__(self, engine: "RetryEngine", ats_name: str, policy: RetryPolicy,
+                 deadline: Optional[Deadline] = None):
+        self.engine = engine
+        self.ats_name = ats_name
+        self.policy = policy
+        self.deadline = deadline
+        self.attempt = 0
+        self.budget_exhausted = False
+        self.deadline_exceeded = False
+        self._started = time.monotonic()
+        self._attempt_started = self._started
+
+    def start_attempt(self):
+        """Mark the start of an attempt (call right before sending)"""
+        self.attempt += 1
+        self._attempt_started = time.monotonic()
+
+    def retry_delay(self, status_code: Optional[int] = None, transient_error: bool = False,
+                    timed_out: bool = False, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Decide whether the last attempt should be retried
+
+        Args:
+            status_code: HTTP status of the response, if one was received
+            transient_error: The attempt failed with a connection error/reset
+            timed_out: The attempt failed with a read timeout
+            retry_after: Server-requested wait already enforced by the rate limiter
+
+        Returns:
+            Seconds to sleep before the next attempt, or None to stop retrying
+            (including when the wait would outlast the call's deadline)
+        """
+        if status_code is not None:
+            retryable = status_code in self.policy.retry_statuses
+        else:
+            retryable = transient_error or (timed_out and self.policy.retry_on_timeout)
+        if not retryable or self.attempt >= self.policy.max_attempts:
+            return None
+        # The rate limiter is already holding sends until Retry-After passes
+        delay = 0.0 if retry_after is not None else self.policy.delay(self.attempt)
+        if self.deadline is not None and max(delay, retry_after or 0.0) >= self.deadline.remaining():
+            self.deadline_exceeded = True
+            return None
+        if not self.engine.budget.try_spend():
+            self.budget_exhausted = True
+            return None
+        return delay
+
+    def finish(self):
+        """Record metrics once the call is done (successfully or not)"""
+        if not self.attempt:
+            # Refused before sending (open circuit, deadline); nothing to count
+            return
+        # Latency added by retrying = everything before the final attempt
+        added = self._attempt_started - self._started
+        self.engine.metrics.record(self.ats_name, self.attempt, added, self.budget_exhausted)
+
+
+class RetryEngine:
+    """Per-ATS retry policies sharing one global retry budget and metrics"""
+
+    def __init__(self, ats_configs: Mapping[str, Mapping],
+                 default_policy: Optional[RetryPolicy] = None,
+                 budget: Optional[RetryBudget] = None,
+                 metrics: Optional[RetryMetrics] = None):
+        """
+        Args:
+            ats_configs: ATS configurations keyed by ATS name
+            default_policy: Policy for ATS platforms without a 'retry' block
+            budget: Retry budget to share (e.g. across several creators)
+            metrics: Metrics collector to share
+        """
+        self.ats_configs = ats_configs
+        self.default_policy = default_policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.metrics = metrics or RetryMetrics()
+        self._policies: Dict[str, Tuple[Optional[Dict], RetryPolicy]] = {}
+
+    def policy(self, ats_name: str) -> RetryPolicy:
+        """Retry policy for an ATS (parsed once from its 'retry' block)"""
+        retry_config = self.ats_configs[ats_name].get("retry")
+        entry = self._policies.get(ats_name)
+        if entry is None or entry[0] != retry_config:
+            # First use, or the retry block was edited
+            entry = (retry_config, RetryPolicy.from_config(retry_config, self.default_policy))
+            self._policies[ats_name] = entry
+        return entry[1]
+
+    def start(self, ats_name: str, deadline: Optional[Deadline] = None) -> RetryCall:
+        """
+        Begin a submission: deposit into the budget and return its bookkeeping
+
+        Args:
+            ats_name: ATS the application is sent to
+            deadline: No retry is scheduled that would finish after this
+        """
+        self.budget.record_request()
+        return RetryCall(self, ats_name, self.policy(ats_name), deadline)
@@ -2,8 +2,12 @@ import streamlit as st
 import json
 from datetime import datetime
 from apply import ATSApplicationCreator
-import base64
+from attachments import Attachment
+from jobsearch import JobIndex
+from jobsync import JobCatalog, JobSyncer
+from submission_queue import QueueFull, SubmissionQueue
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -99,11 +103,18 @@ if 'selected_job' not in st.session_state:
     st.session_state.selected_job = None
 if 'view' not in st.session_state:
     st.session_state.view = 'ats_list'
+if 'job_page' not in st.session_state:
+    st.session_state.job_page = 1
+if 'ats_page' not in st.session_state:
+    st.session_state.ats_page = 1
 
+JOBS_PER_PAGE = 20
+ATS_PER_PAGE = 9
 
-# Load jobs data from environment or config
-@st.cache_data
-def load_jobs_data():
+
+# Platforms shown in the portal; their sample jobs are served until the
+# first catalog sync replaces them
+def demo_catalog():
     return {
         "bamboohr_ats": {
             "integration_id": "mg_d8SfAvVUwjyJHrffzeAnAC",
@@ -228,6 +239,235 @@ def load_jobs_data():
 # Get API Key from environment
 API_KEY = os.getenv('KNIT_API_KEY', 'YOUR_API_KEY')
 
+
+# One creator per server process: config is parsed once (and hot-reloaded)
+# and the connection pool is reused across submissions
+@st.cache_resource
+def get_creator(api_key):
+    return ATSApplicationCreator(api_key)
+
+
+# Seconds a submission may take before it gives up, time spent queued included
+SUBMISSION_DEADLINE = 120
+
+
+# Submissions are sent by a bounded pool of background workers, so a slow
+# ATS never blocks the script thread; the page polls for the outcome
+@st.cache_resource
+def get_submission_queue(api_key):
+    return SubmissionQueue(get_creator(api_key), max_workers=8, deadline=SUBMISSION_DEADLINE)
+
+
+# Jobs, stages and questions are synced from Knit in the background;
+# page loads only read the local catalog
+@st.cache_resource
+def get_job_catalog(api_key):
+    catalog = JobCatalog("jobs.db")
+    platforms = demo_catalog()
+    for ats_info in platforms.values():
+        catalog.seed(ats_info['integration_id'], ats_info['jobs'])
+    if api_key and api_key != 'YOUR_API_KEY':
+        JobSyncer(api_key, catalog).start(ats_info['integration_id'] for ats_info in platforms.values())
+    return catalog
+
+
+# Platforms with their job counts, from one GROUP BY over the catalog; job
+# lists are only loaded (into the search index) for the platform being browsed
+def load_jobs_data():
+    counts = get_job_catalog(API_KEY).counts()
+    platforms = {}
+    for ats_key, ats_info in demo_catalog().items():
+        ats_info = dict(ats_info, job_count=counts.get(ats_info['integration_id'], 0))
+        del ats_info['jobs']
+        platforms[ats_key] = ats_info
+    return platforms
+
+
+# Search index per catalog snapshot; rebuilt only when a sync changes the catalog
+@st.cache_resource(max_entries=32)
+def get_job_index(integration_id, catalog_version):
+    return JobIndex(get_job_catalog(API_KEY).jobs(integration_id))
+
+
+def reset_job_page():
+    st.session_state.job_page = 1
+
+
+# One page of search results per (catalog snapshot, query, filters, page);
+# paging back and forth re-renders from cache
+@st.cache_data(max_entries=256)
+def search_jobs(integration_id, catalog_version, query, filters, page):
+    index = get_job_index(integration_id, catalog_version)
+    return index.search(query, filters, page=page, page_size=JOBS_PER_PAGE)
+
+
+def set_page(state_key, page):
+    st.session_state[state_key] = page
+
+
+def pagination_controls(page, pages, state_key):
+    """Previous/next buttons; inside a fragment they rerun only that fragment"""
+    if pages <= 1:
+        return
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Previous", key=f"prev_{state_key}", disabled=page <= 1, use_container_width=True,
+                  on_click=set_page, args=(state_key, page - 1))
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>Page {page} of {pages}</p>", unsafe_allow_html=True)
+    with col3:
+        st.button("Next →", key=f"next_{state_key}", disabled=page >= pages, use_container_width=True,
+                  on_click=set_page, args=(state_key, page + 1))
+
+
+# Fragments: paging and filtering rerun only the list, not the whole script
+@st.fragment
+def render_ats_grid(jobs_data):
+    platforms = list(jobs_data.items())
+    pages = max(1, -(-len(platforms) // ATS_PER_PAGE))
+    page = min(max(1, st.session_state.ats_page), pages)
+    start = (page - 1) * ATS_PER_PAGE
+
+    cols = st.columns(3)
+
+    for idx, (ats_key, ats_info) in enumerate(platforms[start:start + ATS_PER_PAGE]):
+        with cols[idx % 3]:
+            job_count = ats_info['job_count']
+
+            st.markdown(f"""
+                <div class="ats-card">
+                    <h1>{ats_info['icon']}</h1>
+                    <h3>{ats_info['name']}</h3>
+                    <p><strong>{job_count}</strong> Jobs Available</p>
+                </div>
+            """, unsafe_allow_html=True)
+
+            if st.button(f"Explore Jobs →", key=f"view_{ats_key}"):
+                st.session_state.selected_ats = ats_key
+                st.session_state.view = 'job_list'
+                st.session_state.job_page = 1
+                st.rerun()
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+    pagination_controls(page, pages, 'ats_page')
+
+
+def render_job_card(job):
+    st.markdown(f"""
+        <div class="job-card">
+            <h2>💼 {job['title']}</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+
+    with col1:
+        if job.get('department'):
+            st.markdown(f'<span class="info-badge">🏢 {job["department"]}</span>', unsafe_allow_html=True)
+        st.markdown(f'<span class="info-badge">📍 {job["location"]}</span>', unsafe_allow_html=True)
+
+    with col2:
+        status_color = "🟢" if job['status'] == "OPEN" else "🟡"
+        st.markdown(f'<span class="info-badge">{status_color} {job["status"]}</span>', unsafe_allow_html=True)
+
+    with col3:
+        if st.button("Apply Now →", key=f"apply_{job['id']}", use_container_width=True):
+            st.session_state.selected_job = job
+            st.session_state.view = 'application_form'
+            st.rerun()
+
+    # Only show description if it exists and is not None/empty
+    if job.get('description') and job['description'].strip():
+        with st.expander("📄 View Job Description"):
+            st.write(job['description'])
+
+    # Only show salary if it exists
+    if job.get('salary_range'):
+        st.markdown(f"**💰 Salary Range:** {job['salary_range']}")
+
+    st.markdown("---")
+
+
+@st.fragment
+def render_job_results(ats_key, ats_info):
+    # Search and facet filters run against the in-memory index, one page at a time
+    integration_id = ats_info['integration_id']
+    catalog_version = get_job_catalog(API_KEY).version
+    index = get_job_index(integration_id, catalog_version)
+    facets = ('department', 'location', 'status')
+    query = st.session_state.get(f"search_{ats_key}", "")
+    filters = {facet: st.session_state.get(f"{facet}_{ats_key}", []) for facet in facets}
+    results = search_jobs(integration_id, catalog_version, query, filters, st.session_state.job_page)
+    st.session_state.job_page = results['page']
+
+    search_col, *facet_cols = st.columns([3, 2, 2, 2])
+    with search_col:
+        st.text_input("🔍 Search", key=f"search_{ats_key}", placeholder="Title or keywords",
+                      on_change=reset_job_page)
+    for facet_col, facet in zip(facet_cols, facets):
+        with facet_col:
+            counts = results['facets'][facet]
+            st.multiselect(facet.title(), index.facet_values(facet), key=f"{facet}_{ats_key}",
+                           format_func=lambda value, counts=counts: f"{value} ({counts.get(value, 0)})",
+                           on_change=reset_job_page)
+    st.caption(f"{results['total']} matching jobs")
+    st.markdown("---")
+
+    if ats_info['job_count'] == 0:
+        st.info("🔍 No jobs available for this ATS platform at the moment. Check back later!")
+    elif results['total'] == 0:
+        st.info("🔍 No jobs match your search. Try fewer keywords or filters.")
+    else:
+        for job in results['jobs']:
+            render_job_card(job)
+
+        pagination_controls(results['page'], results['pages'], 'job_page')
+
+
+# Polls only while the submission is pending; once it is final a full rerun
+# renders the outcome outside this fragment, so polling stops
+@st.fragment(run_every=2)
+def poll_submission_status(submission_id):
+    submission = get_submission_queue(API_KEY).status(submission_id)
+    if submission is None or submission['status'] == 'done':
+        st.rerun()
+    waited = time.time() - submission['submitted_at']
+    st.info(f"🔄 Submitting your application... ({submission['status']}, {waited:.0f}s)")
+    st.caption(f"Submission ID: {submission_id}")
+
+
+def render_submission_status(submission_id):
+    submission = get_submission_queue(API_KEY).status(submission_id)
+    if submission is None:
+        st.warning("⌛ This submission is no longer tracked. Check the ATS for its status.")
+        return
+    if submission['status'] != 'done':
+        poll_submission_status(submission_id)
+        return
+
+    result = submission['result']
+    if result.get('success') == 'true' or result.get('success') == True:
+        st.markdown("""
+            <div class="success-box">
+                <h1>🎉 Success!</h1>
+                <h3>Your application has been submitted successfully!</h3>
+                <p>We'll review your application and get back to you soon.</p>
+                <p style="margin-top: 15px;">Click the <strong>← Back</strong> button above to apply for more jobs.</p>
+            </div>
+        """, unsafe_allow_html=True)
+
+        if result.get('data'):
+            with st.expander("📋 View Application Details"):
+                st.json(result['data'])
+    else:
+        st.error(f"❌ Application submission failed!")
+        st.error(f"**Error:** {result.get('error', 'Unknown error occurred')}")
+        with st.expander("🔍 View Full Error Response"):
+            st.json(result)
+    st.caption(f"Submission ID: {submission_id}")
+
+
 # Sidebar
 with st.sidebar:
     st.image("https://img.icons8.com/fluency/96/000000/briefcase.png", width=80)
@@ -244,7 +484,7 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📊 Quick Stats")
     jobs_data = load_jobs_data()
-    total_jobs = sum(len(ats['jobs']) for ats in jobs_data.values())
+    total_jobs = sum(ats['job_count'] for ats in jobs_data.values())
     total_ats = len(jobs_data)
 
     col1, col2 = st.columns(2)
@@ -265,26 +505,7 @@ if st.session_state.view == 'ats_list':
     st.markdown('<p class="header-text">🚀 Choose Your ATS Platform</p>', unsafe_allow_html=True)
     st.markdown("### Discover opportunities across multiple platforms")
 
-    cols = st.columns(3)
-
-    for idx, (ats_key, ats_info) in enumerate(jobs_data.items()):
-        with cols[idx % 3]:
-            job_count = len(ats_info['jobs'])
-
-            st.markdown(f"""
-                <div class="ats-card">
-                    <h1>{ats_info['icon']}</h1>
-                    <h3>{ats_info['name']}</h3>
-                    <p><strong>{job_count}</strong> Jobs Available</p>
-                </div>
-            """, unsafe_allow_html=True)
-
-            if st.button(f"Explore Jobs →", key=f"view_{ats_key}"):
-                st.session_state.selected_ats = ats_key
-                st.session_state.view = 'job_list'
-                st.rerun()
-
-            st.markdown("<br>", unsafe_allow_html=True)
+    render_ats_grid(jobs_data)
 
 # View: Job List
 elif st.session_state.view == 'job_list':
@@ -299,46 +520,9 @@ elif st.session_state.view == 'job_list':
             st.rerun()
 
     st.markdown(f'<p class="header-text">{ats_info["icon"]} {ats_info["name"]}</p>', unsafe_allow_html=True)
-    st.markdown(f"### 💼 {len(ats_info['jobs'])} Open Positions")
-    st.markdown("---")
-
-    if len(ats_info['jobs']) == 0:
-        st.info("🔍 No jobs available for this ATS platform at the moment. Check back later!")
-    else:
-        for job in ats_info['jobs']:
-            st.markdown(f"""
-                <div class="job-card">
-                    <h2>💼 {job['title']}</h2>
-                </div>
-            """, unsafe_allow_html=True)
+    st.markdown(f"### 💼 {ats_info['job_count']} Open Positions")
 
-            col1, col2, col3 = st.columns([2, 2, 1])
-
-            with col1:
-                if job.get('department'):
-                    st.markdown(f'<span class="info-badge">🏢 {job["department"]}</span>', unsafe_allow_html=True)
-                st.markdown(f'<span class="info-badge">📍 {job["location"]}</span>', unsafe_allow_html=True)
-
-            with col2:
-                status_color = "🟢" if job['status'] == "OPEN" else "🟡"
-                st.markdown(f'<span class="info-badge">{status_color} {job["status"]}</span>', unsafe_allow_html=True)
-
-            with col3:
-                if st.button("Apply Now →", key=f"apply_{job['id']}", use_container_width=True):
-                    st.session_state.selected_job = job
-                    st.session_state.view = 'application_form'
-                    st.rerun()
-
-            # Only show description if it exists and is not None/empty
-            if job.get('description') and job['description'].strip():
-                with st.expander("📄 View Job Description"):
-                    st.write(job['description'])
-
-            # Only show salary if it exists
-            if job.get('salary_range'):
-                st.markdown(f"**💰 Salary Range:** {job['salary_range']}")
-
-            st.markdown("---")
+    render_job_results(ats_key, ats_info)
 
 # View: Application Form
 elif st.session_state.view == 'application_form':
@@ -497,28 +681,18 @@ elif st.session_state.view == 'application_form':
                     st.error(f"  • {error}")
             else:
                 try:
-                    # Convert resume to base64
-                    resume_data = None
-                    cover_letter_data = None
-
-                    if resume:
-                        resume_bytes = resume.read()
-                        resume_data = {
-                            "filename": resume.name,
-                            "content": base64.b64encode(resume_bytes).decode('utf-8'),
-                            "content_type": resume.type
-                        }
-
-                    if cover_letter:
-                        cover_letter_bytes = cover_letter.read()
-                        cover_letter_data = {
-                            "filename": cover_letter.name,
-                            "content": base64.b64encode(cover_letter_bytes).decode('utf-8'),
-                            "content_type": cover_letter.type
-                        }
+                    # Resume is base64-encoded in chunks while the request is sent.
+                    # The application endpoint takes a single attachment, so the
+                    # cover letter is not uploaded.
+                    # The upload is copied because a background worker sends
+                    # it after this script run has finished.
+                    resume_attachment = Attachment(
+                        resume.getvalue(),
+                        filename=resume.name,
+                        content_type=resume.type
+                    )
 
-                    # Initialize ATS creator
-                    creator = ATSApplicationCreator(API_KEY)
+                    submission_queue = get_submission_queue(API_KEY)
 
                     # Get initial stage ID
                     initial_stage_id = job['stages'][0]['id'] if job.get('stages') and len(job['stages']) > 0 else "1"
@@ -540,39 +714,22 @@ elif st.session_state.view == 'application_form':
                         "state": state if state else None,
                         "country": country if country else None,
                         "zip_code": zip_code if zip_code else None,
-                        "answers": answers if answers else None
+                        "answers": answers if answers else None,
+                        "attachment": resume_attachment
                     }
 
-                    # Show spinner while submitting
-                    with st.spinner('🔄 Submitting your application...'):
-                        # Create application
-                        result = creator.create_application(
-                            ats_name=ats_key,
-                            job_id=job['id'],
-                            initial_stage_id=initial_stage_id,
-                            **application_data
-                        )
-
-                    # Show result
-                    if result.get('success') == 'true' or result.get('success') == True:
-                        st.markdown("""
-                            <div class="success-box">
-                                <h1>🎉 Success!</h1>
-                                <h3>Your application has been submitted successfully!</h3>
-                                <p>We'll review your application and get back to you soon.</p>
-                                <p style="margin-top: 15px;">Click the <strong>← Back</strong> button above to apply for more jobs.</p>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-                        if result.get('data'):
-                            with st.expander("📋 View Application Details"):
-                                st.json(result['data'])
-                    else:
-                        st.error(f"❌ Application submission failed!")
-                        st.error(f"**Error:** {result.get('error', 'Unknown error occurred')}")
-                        with st.expander("🔍 View Full Error Response"):
-                            st.json(result)
+                    # Queue the application and return straight away; the
+                    # status below polls until it has been sent
+                    submission_id = submission_queue.submit(
+                        ats_key,
+                        job_id=job['id'],
+                        initial_stage_id=initial_stage_id,
+                        **application_data
+                    )
+                    st.session_state.submission = {"id": submission_id, "job_id": job['id']}
 
+                except QueueFull:
+                    st.error("❌ Too many applications are being submitted right now. Please try again in a minute.")
                 except FileNotFoundError:
                     st.error("❌ Configuration file 'ats_config.json' not found. Please create it first.")
                 except Exception as e:
@@ -580,6 +737,10 @@ elif st.session_state.view == 'application_form':
                     with st.expander("🔍 View Error Details"):
                         st.exception(e)
 
+    submission = st.session_state.get('submission')
+    if submission and submission['job_id'] == job['id']:
+        render_submission_status(submission['id'])
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,127 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from apply import ATSApplicationCreator
+from deadline import Deadline
+
+
+STATUS_QUEUED = "queued"
+STATUS_SENDING = "sending"
+STATUS_DONE = "done"
+
+
+class QueueFull(RuntimeError):
+    """Raised when too many submissions are already waiting"""
+
+
+class SubmissionQueue:
+    """
+    Submit applications in the background and poll for the outcome
+
+    submit() returns a submission id immediately; a bounded pool of workers
+    sends the applications through a shared creator, so the caller (e.g. a
+    Streamlit script thread) never waits on the Knit round trip. Finished
+    submissions are kept for `retention` seconds for polling.
+    """
+
+    def __init__(self, creator: ATSApplicationCreator,
+                 max_workers: int = 8,
+                 max_pending: int = 256,
+                 retention: float = 3600.0,
+                 deadline: Optional[float] = None):
+        """
+        Args:
+            creator: Client the workers submit through (shared pool, retries, limits)
+            max_workers: Applications in flight at once
+            max_pending: Queued + in-flight submissions before submit() refuses
+            retention: Seconds a finished submission stays available to status()
+            deadline: Seconds from submit() until an application gives up,
+                      time spent queued included (None = no limit)
+        """
+        self.creator = creator
+        self.max_pending = max_pending
+        self.retention = retention
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="submission")
+        self._lock = threading.Lock()
+        self._submissions: Dict[str, Dict] = {}
+        self._pending = 0
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [submission_id for submission_id, record in self._submissions.items()
+                   if record["finished_at"] is not None and record["finished_at"] < cutoff]
+        for submission_id in expired:
+            del self._submissions[submission_id]
+
+    def submit(self, ats_name: str, **application) -> str:
+        """
+        Queue one application
+
+        Args:
+            ats_name: Name of the ATS platform
+            **application: Arguments of ATSApplicationCreator.create_application
+
+        Returns:
+            Submission id to pass to status()
+
+        Raises:
+            QueueFull: max_pending submissions are already waiting
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} submissions already pending")
+            self._pending += 1
+            submission_id = uuid.uuid4().hex
+            self._submissions[submission_id] = {
+                "id": submission_id,
+                "ats_name": ats_name,
+                "job_id": application.get("job_id"),
+                "status": STATUS_QUEUED,
+                "result": None,
+                "submitted_at": time.time(),
+                "finished_at": None
+            }
+        # The clock starts now, so time spent queued counts against the deadline
+        deadline = Deadline(self.deadline) if self.deadline is not None else None
+        self._executor.submit(self._run, submission_id, ats_name, application, deadline)
+        return submission_id
+
+    def _run(self, submission_id: str, ats_name: str, application: Dict,
+             deadline: Optional[Deadline]):
+        record = self._submissions[submission_id]
+        record["status"] = STATUS_SENDING
+        try:
+            result = self.creator.create_application(ats_name=ats_name, deadline=deadline,
+                                                     **application)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        with self._lock:
+            record["result"] = result
+            record["finished_at"] = time.time()
+            record["status"] = STATUS_DONE
+            self._pending -= 1
+
+    def status(self, submission_id: str) -> Optional[Dict]:
+        """
+        Returns:
+            Copy of the submission record (id, ats_name, job_id, status,
+            result, submitted_at, finished_at), or None if unknown/expired
+        """
+        with self._lock:
+            record = self._submissions.get(submission_id)
+            return dict(record) if record is not None else None
+
+    @property
+    def pending(self) -> int:
+        """Submissions queued or in flight"""
+        return self._pending
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; with wait, finish what is queued"""
+        self._executor.shutdown(wait=wait)
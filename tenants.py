@@ -0,0 +1,460 @@
+"""
+Submitting applications on behalf of many Knit accounts
+
+MultiTenantCreator keeps one lightweight ATSApplicationCreator per tenant
+(its own API key, rate limits and circuit breakers) on top of what every
+tenant shares: one pooled requests session, the process-wide config
+registry, the retry budget, metrics and, optionally, a dedup store,
+attachment cache and tracer.
+
+Submissions wait in per-tenant queues served by a fixed pool of workers in
+smooth weighted round-robin order, so one tenant's huge bulk job gets its
+weighted share of the workers while the other tenants keep flowing. A
+tenant whose next submission would have to wait for its rate limit or a
+'max_concurrency' slot steps aside until it could be sent, instead of
+holding a shared worker.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from apply import ATSApplicationCreator, DEFAULT_TIMEOUT, KNIT_APPLICATION_URL
+from attachments import AttachmentCache
+from batching import BatchCoalescer
+from config import get_registry
+from deadline import Deadline
+from idempotency import SubmissionStore
+from instrumentation import Metrics, get_logger, log_event
+from preflight import validate_batch
+from retry import RetryEngine
+from tracing import Tracer, time_connections
+
+logger = get_logger("tenants")
+
+# Seconds a tenant steps aside when its ATS has no free 'max_concurrency' slot
+SLOT_RETRY_DELAY = 0.02
+
+
+class FairQueue:
+    """
+    Per-tenant FIFO queues served by smooth weighted round-robin
+
+    Each get() credits every tenant that has work with its weight, serves
+    the tenant with the most credit and charges it the total weight of the
+    tenants that were waiting. While tenants stay busy each gets
+    weight / sum(weights) of the items, interleaved rather than in bursts;
+    idle tenants don't bank credit. A tenant can be held back with defer(),
+    which counts as idle until its not-before time. Thread-safe.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, Deque[Any]] = {}
+        self._weights: Dict[str, int] = {}
+        self._credit: Dict[str, int] = {}
+        self._not_before: Dict[str, float] = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def set_weight(self, tenant_id: str, weight: int):
+        """Register a tenant, or change its weight"""
+        if weight < 1:
+            raise ValueError("weight must be a positive integer")
+        with self._cond:
+            self._weights[tenant_id] = weight
+            self._queues.setdefault(tenant_id, deque())
+            self._credit.setdefault(tenant_id, 0)
+
+    def remove(self, tenant_id: str) -> List[Any]:
+        """Unregister a tenant and return the items it still had queued"""
+        with self._cond:
+            items = list(self._queues.pop(tenant_id, ()))
+            self._weights.pop(tenant_id, None)
+            self._credit.pop(tenant_id, None)
+            self._not_before.pop(tenant_id, None)
+            self._size -= len(items)
+            return items
+
+    def put(self, tenant_id: str, item: Any):
+        """
+        Raises:
+            KeyError: Unknown tenant
+            RuntimeError: The queue is closed
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Queue is closed")
+            self._queues[tenant_id].append(item)
+            self._size += 1
+            self._cond.notify()
+
+    def defer(self, tenant_id: str, item: Any, delay: float) -> bool:
+        """
+        Put an item taken by get() back at the head of its tenant's queue and
+        skip that tenant for delay seconds
+
+        Returns:
+            False if the tenant was removed in the meantime (item dropped)
+        """
+        with self._cond:
+            queue = self._queues.get(tenant_id)
+            if queue is None:
+                return False
+            queue.appendleft(item)
+            self._size += 1
+            self._not_before[tenant_id] = max(self._not_before.get(tenant_id, 0.0),
+                                              time.monotonic() + delay)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, Any]]:
+        """
+        Take the next item in weighted round-robin order
+
+        Returns:
+            (tenant_id, item), or None on timeout or once the queue is closed
+            and empty
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if not self._size and self._closed:
+                    return None
+                now = time.monotonic()
+                ready = [tenant_id for tenant_id, queue in self._queues.items()
+                         if queue and self._not_before.get(tenant_id, 0.0) <= now]
+                if ready:
+                    break
+                # Nothing queued, or every tenant with work is deferred
+                wake = min((self._not_before.get(tenant_id, 0.0)
+                            for tenant_id, queue in self._queues.items() if queue), default=None)
+                if end is not None:
+                    if now >= end:
+                        return None
+                    wake = end if wake is None else min(wake, end)
+                self._cond.wait(None if wake is None else wake - now)
+            total = 0
+            chosen = None
+            for tenant_id in ready:
+                self._credit[tenant_id] += self._weights[tenant_id]
+                total += self._weights[tenant_id]
+                if chosen is None or self._credit[tenant_id] > self._credit[chosen]:
+                    chosen = tenant_id
+            self._credit[chosen] -= total
+            queue = self._queues[chosen]
+            item = queue.popleft()
+            self._size -= 1
+            if not queue:
+                self._credit[chosen] = 0
+            return chosen, item
+
+    def weight(self, tenant_id: str) -> Optional[int]:
+        with self._cond:
+            return self._weights.get(tenant_id)
+
+    def pending(self, tenant_id: Optional[str] = None) -> int:
+        """Items queued for one tenant, or for all of them"""
+        with self._cond:
+            if tenant_id is None:
+                return self._size
+            return len(self._queues.get(tenant_id, ()))
+
+    def close(self):
+        """Refuse new items; get() returns None once the rest are taken"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class MultiTenantCreator:
+    """
+    Create applications for many tenants, each with its own Knit API key,
+    through one shared connection pool and worker pool
+
+    Usage:
+        with MultiTenantCreator(max_workers=16) as client:
+            client.add_tenant("acme", ACME_KEY, weight=2)
+            client.add_tenant("globex", GLOBEX_KEY)
+            future = client.submit("globex", {"ats_name": "workable", ...})
+            results = client.bulk_create_applications("acme", rows)
+    """
+
+    def __init__(self, config_file: str = "ats_config.json",
+                 base_url: str = KNIT_APPLICATION_URL,
+                 max_workers: int = 16,
+                 pool_maxsize: Optional[int] = None,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retry_engine: Optional[RetryEngine] = None,
+                 dedup_store: Optional[SubmissionStore] = None,
+                 attachment_cache: Optional[AttachmentCache] = None,
+                 metrics: Optional[Metrics] = None,
+                 tracer: Optional[Tracer] = None,
+                 batch_url: Optional[str] = None):
+        """
+        Args:
+            config_file: Path to JSON file containing ATS configurations
+            base_url: Application create endpoint (override for stubs/proxies)
+            max_workers: Applications in flight at once, across all tenants
+            pool_maxsize: Connections kept open per host (defaults to max_workers)
+            timeout: Seconds, or (connect, read) tuple, for ATS platforms
+                     without a 'timeout' block
+            retry_engine: RetryEngine whose budget all tenants share
+            dedup_store: SubmissionStore shared by all tenants (keys are
+                         namespaced by tenant id)
+            attachment_cache: AttachmentCache shared by all tenants (remote
+                              file references stay per tenant)
+            metrics: Metrics shared by all tenants
+            tracer: Tracer for every tenant's calls
+            batch_url: Batch endpoint; submissions to ATS platforms with a
+                       'batch' block are coalesced per tenant and integration
+        """
+        self.config_file = config_file
+        self.base_url = base_url
+        self.timeout = timeout
+        self.ats_configs = get_registry(config_file)
+        self.retry_engine = retry_engine or RetryEngine(self.ats_configs)
+        self.dedup_store = dedup_store
+        self.attachment_cache = attachment_cache
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer
+
+        # One pool for every tenant; the bearer token is set per request
+        self.session = ATSApplicationCreator._build_session(
+            pool_connections=10, pool_maxsize=pool_maxsize or max_workers, pool_block=False
+        )
+        if tracer is not None:
+            for adapter in self.session.adapters.values():
+                time_connections(adapter)
+        self.coalescer = (BatchCoalescer(batch_url, self.ats_configs, session=self.session)
+                          if batch_url else None)
+
+        self._tenants: Dict[str, ATSApplicationCreator] = {}
+        self._completed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._queue = FairQueue()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"tenant-worker-{i}", daemon=True)
+            for i in range(max(1, max_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def add_tenant(self, tenant_id: str, api_key: str, weight: int = 1) -> ATSApplicationCreator:
+        """
+        Register a tenant, or update its API key and weight
+
+        Args:
+            tenant_id: Name the tenant's submissions are queued under
+            api_key: The tenant's Knit API key
+            weight: Share of the workers the tenant gets while others are busy
+
+        Returns:
+            The tenant's creator (sharing this client's pool and resources)
+        """
+        with self._lock:
+            creator = self._tenants.get(tenant_id)
+            if creator is None:
+                creator = ATSApplicationCreator(
+                    api_key, config_file=self.config_file, base_url=self.base_url,
+                    timeout=self.timeout, session=self.session,
+                    retry_engine=self.retry_engine, dedup_store=self.dedup_store,
+                    attachment_cache=self.attachment_cache, metrics=self.metrics,
+                    tracer=self.tracer, coalescer=self.coalescer
+                )
+                creator.tenant_id = tenant_id
+                self._tenants[tenant_id] = creator
+                self._completed[tenant_id] = 0
+            else:
+                creator.api_key = api_key
+            self._queue.set_weight(tenant_id, weight)
+        return creator
+
+    def remove_tenant(self, tenant_id: str):
+        """Unregister a tenant; its queued submissions are cancelled"""
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+            self._completed.pop(tenant_id, None)
+            for future, _, _, _ in self._queue.remove(tenant_id):
+                future.cancel()
+
+    def creator(self, tenant_id: str) -> ATSApplicationCreator:
+        """
+        Raises:
+            KeyError: Unknown tenant
+        """
+        return self._tenants[tenant_id]
+
+    def submit(self, tenant_id: str, application: Dict,
+               deadline: Optional[Union[float, Deadline]] = None,
+               call_deadline: Optional[float] = None) -> Future:
+        """
+        Queue one application for a tenant
+
+        Args:
+            tenant_id: Tenant to submit as
+            application: Dict containing 'ats_name' and application data
+            deadline: Seconds (or a Deadline) from now, time queued included
+            call_deadline: Seconds from when a worker picks the row up
+
+        Returns:
+            Future resolving to a dict with 'ats_name' and 'result' (failures
+            become error results, as in bulk_create_applications)
+
+        Raises:
+            KeyError: Unknown tenant
+        """
+        if tenant_id not in self._tenants:
+            raise KeyError(f"Unknown tenant '{tenant_id}'")
+        future = Future()
+        self._queue.put(tenant_id, (future, application, Deadline.coerce(deadline), call_deadline))
+        return future
+
+    def _send_delay(self, creator: ATSApplicationCreator, application: Dict
+                    ) -> Tuple[float, Optional[threading.BoundedSemaphore]]:
+        """
+        Whether a row could be sent right now without blocking a worker
+
+        Returns:
+            (seconds to wait, None) when the ATS's rate limit or
+            'max_concurrency' cap would make the worker wait, else
+            (0, the acquired slot or None)
+        """
+        ats_name = application.get("ats_name")
+        if ats_name not in creator.ats_configs:
+            # Left to submit_bulk_item to report
+            return 0.0, None
+        delay = creator.rate_limiter.delay(ats_name)
+        if delay > 0:
+            return delay, None
+        semaphore = creator._integration_semaphore(ats_name)
+        if semaphore is None:
+            return 0.0, None
+        if not semaphore.acquire(blocking=False):
+            return SLOT_RETRY_DELAY, None
+        return 0.0, semaphore
+
+    def _work(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            tenant_id, task = entry
+            future, application, deadline, call_deadline = task
+            if future.cancelled():
+                continue
+            slot = None
+            try:
+                creator = self._tenants[tenant_id]
+                delay, slot = self._send_delay(creator, application)
+            except BaseException as e:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+                continue
+            if delay > 0 and (deadline is None or delay < deadline.remaining()):
+                # Serve other tenants meanwhile; a row that would outlive its
+                # deadline is submitted now and fails fast instead
+                if not self._queue.defer(tenant_id, task, delay):
+                    # The tenant was removed meanwhile
+                    future.cancel()
+                continue
+            if not future.set_running_or_notify_cancel():
+                if slot is not None:
+                    slot.release()
+                continue
+            try:
+                row_deadline = Deadline.earliest(deadline, Deadline.coerce(call_deadline))
+                item = creator.submit_bulk_item(application, row_deadline, slot)
+            except BaseException as e:
+                future.set_exception(e)
+                continue
+            with self._lock:
+                if tenant_id in self._completed:
+                    self._completed[tenant_id] += 1
+            future.set_result(item)
+
+    def create_application(self, tenant_id: str, ats_name: str,
+                           deadline: Optional[Union[float, Deadline]] = None,
+                           **application) -> Dict:
+        """
+        Create one application for a tenant and wait for the result
+
+        Takes the arguments of ATSApplicationCreator.create_application. The
+        call queues behind other work of the same tenant only.
+
+        Returns:
+            Response dictionary from the API
+        """
+        return self.submit(tenant_id, dict(application, ats_name=ats_name),
+                           deadline).result()["result"]
+
+    def bulk_create_applications(self, tenant_id: str, applications: List[Dict],
+                                 preflight: bool = True,
+                                 deadline: Optional[Union[float, Deadline]] = None,
+                                 call_deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Create a tenant's applications on the shared workers
+
+        Args:
+            tenant_id: Tenant to submit as
+            applications: List of dicts, each containing 'ats_name' and application data
+            preflight: Validate the batch before sending anything
+            deadline: Seconds (or a Deadline) for the whole batch (optional)
+            call_deadline: Seconds for each row, from when it is picked up (optional)
+
+        Returns:
+            List of response dictionaries, in the same order as applications
+        """
+        results: List[Optional[Dict]] = [None] * len(applications)
+        pending = list(range(len(applications)))
+        if preflight:
+            report = validate_batch(applications, self.ats_configs)
+            report.log_summary()
+            for index in report.errors:
+                results[index] = {"ats_name": applications[index].get("ats_name"),
+                                  "result": report.error_result(index)}
+            pending = [index for index in pending if report.is_valid(index)]
+
+        log_event(logger, logging.INFO, "bulk.started", count=len(pending), tenant=tenant_id)
+        deadline = Deadline.coerce(deadline)
+        futures = [(index, self.submit(tenant_id, applications[index], deadline, call_deadline))
+                   for index in pending]
+        for index, future in futures:
+            results[index] = future.result()
+        return results
+
+    def pending(self, tenant_id: Optional[str] = None) -> int:
+        """Applications queued (not yet picked up) for one tenant, or all"""
+        return self._queue.pending(tenant_id)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per tenant: weight, queued and completed submissions"""
+        with self._lock:
+            return {tenant_id: {"weight": self._queue.weight(tenant_id),
+                                "pending": self._queue.pending(tenant_id),
+                                "completed": self._completed[tenant_id]}
+                    for tenant_id in self._tenants}
+
+    def close(self, wait: bool = True):
+        """
+        Stop accepting submissions; the workers finish the queued ones
+
+        Args:
+            wait: Block until they are done, then close the connection pool
+        """
+        self._queue.close()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+            if self.coalescer is not None:
+                self.coalescer.close()
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,73 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from batching import BatchCoalescer, _item_response
+
+CONFIGS = {"greenhouse": {"integration_id": "int-1", "batch": {"max_size": 3, "max_wait": 5.0}}}
+HEADERS = {"X-Knit-Integration-Id": "int-1", "Authorization": "Bearer key"}
+TIMEOUT = (1.0, 1.0)
+
+
+class StubSession:
+    """Answers every batch with the queued per-item answers"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.batches = []
+        self.sent = threading.Event()
+
+    def post(self, url, data, headers, timeout):
+        self.batches.append(json.loads(data)["requests"])
+        self.sent.set()
+        body = json.dumps({"responses": self.answers[:len(self.batches[-1])]}).encode("utf-8")
+        return _item_response(url, 200, {}, body)
+
+    def close(self):
+        pass
+
+
+def test_items_get_their_own_responses():
+    session = StubSession([{"status": 200, "body": {"success": True, "n": n}} for n in range(3)])
+    coalescer = BatchCoalescer("http://stub/batch", CONFIGS, session=session)
+    futures = [coalescer.submit("greenhouse", b'{"n":%d}' % n, HEADERS, TIMEOUT) for n in range(3)]
+    assert [future.result(timeout=5).json()["n"] for future in futures] == [0, 1, 2]
+    assert [item["body"] for item in session.batches[0]] == [{"n": 0}, {"n": 1}, {"n": 2}]
+    coalescer.close()
+
+
+def test_malformed_answer_fails_only_its_item():
+    session = StubSession([{"status": 200, "body": None},
+                           {"status": 200, "body": {"success": True}},
+                           None])
+    coalescer = BatchCoalescer("http://stub/batch", CONFIGS, session=session)
+    futures = [coalescer.submit("greenhouse", b"{}", HEADERS, TIMEOUT) for _ in range(3)]
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        futures[0].result(timeout=5)
+    assert futures[1].result(timeout=5).json() == {"success": True}
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        futures[2].result(timeout=5)
+    coalescer.close()
+
+
+def test_withdrawn_item_is_never_sent():
+    session = StubSession([{"status": 200, "body": {"success": True}}])
+    coalescer = BatchCoalescer("http://stub/batch", CONFIGS, session=session)
+    future = coalescer.submit("greenhouse", b"{}", HEADERS, TIMEOUT)
+    assert coalescer.withdraw(future)
+    assert future.cancelled()
+    assert coalescer.pending() == 0
+    coalescer.close()
+    assert session.batches == []
+
+
+def test_sent_item_cannot_be_withdrawn():
+    session = StubSession([{"status": 200, "body": {"success": True}}] * 3)
+    coalescer = BatchCoalescer("http://stub/batch", CONFIGS, session=session)
+    futures = [coalescer.submit("greenhouse", b"{}", HEADERS, TIMEOUT) for _ in range(3)]
+    assert session.sent.wait(5)
+    assert not coalescer.withdraw(futures[0])
+    assert futures[0].result(timeout=5).status_code == 200
+    coalescer.close()
@@ -0,0 +1,46 @@
+from checkpoint import Checkpoint
+
+
+def test_resume_after_clean_close(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    with Checkpoint(path) as checkpoint:
+        for row in range(5):
+            checkpoint.record(row, success=row != 2)
+    resumed = Checkpoint(path)
+    assert resumed.summary == {"next_row": 5, "succeeded": 4, "failed": 1}
+    resumed.close()
+
+
+def test_uncommitted_rows_are_redone(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    checkpoint = Checkpoint(path, batch_size=100)
+    checkpoint.record(0, True)
+    checkpoint.commit()
+    checkpoint.record(1, True)
+    # Crash before the second commit
+    checkpoint._file.close()
+    assert Checkpoint(path).next_row == 1
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b'{"row": 0, "success": true}\n'
+                     b'{"row": 1, "success": false}\n'
+                     b'{"row": 2, "succ')
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.summary == {"next_row": 2, "succeeded": 1, "failed": 1}
+    checkpoint.record(2, True)
+    checkpoint.close()
+
+    lines = path.read_bytes().splitlines()
+    assert lines[-1] == b'{"row": 2, "success": true}'
+    assert Checkpoint(str(path)).summary == {"next_row": 3, "succeeded": 2, "failed": 1}
+
+
+def test_complete_json_without_newline_is_torn(tmp_path):
+    path = tmp_path / "run.ckpt"
+    path.write_bytes(b'{"row": 0, "success": true}\n{"row": 1, "success": true}')
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.next_row == 1
+    checkpoint.close()
+    assert path.read_bytes() == b'{"row": 0, "success": true}\n'
@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from config import ATSConfig, ConfigError, ConfigRegistry
+
+ENTRY = {"integration_id": "int-1"}
+
+
+@pytest.mark.parametrize("retry", [
+    {"backoff": "fibonacci"},
+    {"jitter": "lots"},
+    {"max_attempts": 0},
+    {"max_attempts": "3"},
+    {"base_delay": -1},
+    {"retry_statuses": [503, "504"]},
+    {"retry_on_timeout": "yes"},
+])
+def test_invalid_retry_block_is_rejected(retry):
+    with pytest.raises(ConfigError):
+        ATSConfig.from_dict("test", dict(ENTRY, retry=retry))
+
+
+def test_valid_retry_block():
+    retry = {"max_attempts": 4, "backoff": "linear", "base_delay": 0.2, "jitter": "none",
+             "retry_statuses": [429, 503]}
+    assert ATSConfig.from_dict("test", dict(ENTRY, retry=retry)).retry == retry
+
+
+def test_bad_reload_keeps_last_good_config(tmp_path):
+    path = tmp_path / "ats_config.json"
+    path.write_text(json.dumps({"greenhouse": dict(ENTRY, retry={"max_attempts": 2})}))
+    registry = ConfigRegistry(str(path), check_interval=0)
+    version = registry.version
+
+    path.write_text(json.dumps({"greenhouse": dict(ENTRY, retry={"jitter": "lots"})}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry["greenhouse"].retry == {"max_attempts": 2}
+    assert registry.version == version
+
+    path.write_text(json.dumps({"greenhouse": dict(ENTRY, retry={"max_attempts": 5})}))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert registry["greenhouse"].retry == {"max_attempts": 5}
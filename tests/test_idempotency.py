@@ -0,0 +1,62 @@
+import threading
+
+from idempotency import STATUS_PENDING, STATUS_SENDING, SubmissionStore, idempotency_key
+
+KEY = idempotency_key("greenhouse", "job-1", "Ada@Example.com ")
+
+
+def test_key_normalizes_email():
+    assert KEY == idempotency_key("greenhouse", "job-1", "ada@example.com")
+    assert KEY != idempotency_key("greenhouse", "job-1", "ada@example.com", "tenant-a")
+
+
+def test_concurrent_begin_claims_once(tmp_path):
+    path = str(tmp_path / "submissions.db")
+    # Separate connections, as with several worker processes
+    stores = [SubmissionStore(path) for _ in range(4)]
+    barrier = threading.Barrier(16)
+    results = []
+
+    def begin(store):
+        barrier.wait()
+        results.append(store.begin(KEY, "greenhouse", "job-1"))
+
+    threads = [threading.Thread(target=begin, args=(stores[i % 4],)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(None) == 1
+    refused = [result for result in results if result is not None]
+    assert all(result["in_progress"] and result["success"] is False for result in refused)
+    assert stores[0].get(KEY)["status"] == STATUS_SENDING
+    for store in stores:
+        store.close()
+
+
+def test_succeeded_result_is_returned(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+    store.complete(KEY, {"success": True, "data": {"applicationId": "a1"}})
+    assert store.begin(KEY, "greenhouse", "job-1") == {"success": True,
+                                                       "data": {"applicationId": "a1"}}
+
+
+def test_failed_and_pending_can_be_claimed_again(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+    store.complete(KEY, {"success": False, "error": "timeout"}, definitive=False)
+    assert store.get(KEY)["status"] == STATUS_PENDING
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+    store.complete(KEY, {"success": False, "error": "422"})
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+
+
+def test_release_and_expired_claims(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"), claim_ttl=0.0)
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+    # A claim older than claim_ttl is taken over (its caller crashed)
+    assert store.begin(KEY, "greenhouse", "job-1") is None
+    store.release(KEY)
+    assert store.get(KEY)["status"] == STATUS_PENDING
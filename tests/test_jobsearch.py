@@ -0,0 +1,99 @@
+import pytest
+
+from jobsearch import JobIndex
+
+DEPARTMENTS = ["Engineering", "Sales", "Support"]
+LOCATIONS = ["Remote", "Berlin", "Austin", "Lagos"]
+
+
+def make_jobs(count=300):
+    jobs = []
+    for i in range(count):
+        if i % 15 == 0:
+            title = f"Senior Engineer {i}"
+        elif i % 3 == 0:
+            title = f"Engineer {i}"
+        else:
+            title = f"Account Manager {i}"
+        jobs.append({
+            "id": str(i),
+            "title": title,
+            "description": "Python and SQL" if i % 7 == 0 else "Customer focused",
+            "department": DEPARTMENTS[i % 3],
+            "location": LOCATIONS[i % 4],
+            "status": "OPEN" if i % 10 else "DRAFT",
+        })
+    return jobs
+
+
+def expected(jobs, predicate):
+    return [job for job in jobs if predicate(job)]
+
+
+@pytest.fixture(scope="module")
+def jobs():
+    return make_jobs()
+
+
+@pytest.fixture(scope="module")
+def index(jobs):
+    return JobIndex(jobs)
+
+
+def test_pages_cover_every_match_in_order(jobs, index):
+    matches = expected(jobs, lambda job: job["location"] in ("Remote", "Lagos"))
+    filters = {"location": ["Remote", "Lagos"]}
+    first = index.search(filters=filters, page=1, page_size=40)
+    assert first["total"] == len(matches) == 150
+    assert first["pages"] == 4
+    seen = []
+    for page in range(1, first["pages"] + 1):
+        seen += index.search(filters=filters, page=page, page_size=40)["jobs"]
+    assert seen == matches
+
+
+def test_page_is_clamped(index):
+    last = index.search(page=99, page_size=50)
+    assert last["page"] == last["pages"] == 6
+    assert len(last["jobs"]) == 50
+    assert index.search(page=0)["page"] == 1
+
+
+def test_text_prefix_match_and_rare_words(jobs, index):
+    result = index.search("senior eng", page_size=1000)
+    assert result["jobs"] == expected(jobs, lambda job: job["title"].startswith("Senior Engineer"))
+    # A word in a single title is a sparse posting
+    result = index.search("engineer 297")
+    assert [job["id"] for job in result["jobs"]] == ["297"]
+    assert index.search("nothing-like-this")["total"] == 0
+
+
+def test_facet_counts_honour_other_filters(jobs, index):
+    result = index.search("python", {"department": ["Engineering"], "status": ["OPEN"]})
+    python_jobs = expected(jobs, lambda job: job["description"] == "Python and SQL")
+    matches = [job for job in python_jobs
+               if job["department"] == "Engineering" and job["status"] == "OPEN"]
+    assert result["total"] == len(matches)
+    # The department facet ignores its own filter, so other departments stay visible
+    open_python = [job for job in python_jobs if job["status"] == "OPEN"]
+    for department in DEPARTMENTS:
+        count = sum(job["department"] == department for job in open_python)
+        assert result["facets"]["department"].get(department, 0) == count
+    # Other facets count only what the full query matches
+    assert sum(result["facets"]["location"].values()) == len(matches)
+    assert result["facets"]["status"] == {
+        "OPEN": len(matches),
+        "DRAFT": sum(job["department"] == "Engineering" and job["status"] == "DRAFT"
+                     for job in python_jobs),
+    }
+
+
+def test_values_within_a_facet_are_ored(jobs, index):
+    result = index.search(filters={"department": ["Sales", "Support"]}, page_size=1000)
+    assert result["jobs"] == expected(jobs, lambda job: job["department"] in ("Sales", "Support"))
+    assert index.facet_values("location") == sorted(LOCATIONS)
+
+
+def test_unknown_facet_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search(filters={"salary": ["high"]})
@@ -0,0 +1,30 @@
+import pytest
+
+from outbox import is_transient
+
+
+@pytest.mark.parametrize("result", [
+    {"success": False, "error": "Connection refused", "no_response": True},
+    {"success": False, "error": "503 Server Error", "status_code": 503},
+    {"success": False, "error": "429 Too Many Requests", "status_code": 429},
+    {"success": False, "error": "circuit open", "circuit_open": True},
+    {"success": False, "error": "Deadline of 5s exceeded", "deadline_exceeded": True},
+    {"success": False, "error": "Submission already in progress", "in_progress": True},
+])
+def test_transient_failures(result):
+    assert is_transient(result)
+
+
+@pytest.mark.parametrize("result", [
+    {"success": False, "error": "422 Unprocessable Entity", "status_code": 422,
+     "response": {"error": "missing field"}},
+    {"success": False, "error": "400 Bad Request", "status_code": 400},
+    # Local errors: missing attachment file, unknown ATS, bad payload
+    {"success": False, "error": "[Errno 2] No such file or directory: 'resume.pdf'"},
+    {"success": False, "error": "ATS 'nope' not found in configuration"},
+    # Knit answered 2xx but refused the application
+    {"success": False, "error": "Candidate already applied"},
+    {"success": "false", "error": {"msg": "invalid stage"}},
+])
+def test_definitive_failures(result):
+    assert not is_transient(result)
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from config import ATSConfig, ConfigError
+from payloads import PayloadTemplate
+
+APPLICANT = dict(job_id="job-1", initial_stage_id="stage-1", first_name="Ada",
+                 last_name="Lovelace", email="ada@example.com", phone="555-0100")
+
+
+def template(unsupported_fields, **raw) -> PayloadTemplate:
+    return PayloadTemplate(ATSConfig.from_dict("test", dict(
+        integration_id="int-1", unsupported_fields=unsupported_fields, **raw)))
+
+
+def test_drops_top_level_and_candidate_fields():
+    payload = template(["answers", "candidate.title"]).build(
+        **APPLICANT, title="Engineer", company="Acme", answers=[{"id": "q1"}], source="portal")
+    assert "answers" not in payload
+    assert "title" not in payload["candidate"]
+    assert payload["candidate"]["company"] == "Acme"
+    assert payload["source"] == "portal"
+
+
+def test_drops_nested_fields():
+    metadata = {"countryCodeId": 44, "referrer": "fair"}
+    work_address = {"city": "London", "zipCode": "N1"}
+    payload = template(["candidate.presentAddress.zipCode", "candidate.workAddress.zipCode",
+                        "metaData.countryCodeId"]).build(
+        **APPLICANT, city="Paris", zip_code="75001", work_address=work_address, metadata=metadata)
+    assert payload["candidate"]["presentAddress"]["city"] == "Paris"
+    assert "zipCode" not in payload["candidate"]["presentAddress"]
+    assert payload["candidate"]["workAddress"] == {"city": "London"}
+    assert json.loads(payload["metaData"]) == {"referrer": "fair"}
+    # The caller's dicts are left alone
+    assert metadata == {"countryCodeId": 44, "referrer": "fair"}
+    assert work_address == {"city": "London", "zipCode": "N1"}
+
+
+def test_drops_from_serialized_metadata():
+    payload = template(["metaData.countryCodeId"]).build(
+        **APPLICANT, metadata='{"countryCodeId": 44, "referrer": "fair"}')
+    assert json.loads(payload["metaData"]) == {"referrer": "fair"}
+
+
+def test_whole_parent_wins_over_nested_paths():
+    for fields in (["candidate.presentAddress", "candidate.presentAddress.zipCode"],
+                   ["candidate.presentAddress.zipCode", "candidate.presentAddress"]):
+        payload = template(fields).build(**APPLICANT, city="Paris", zip_code="75001")
+        assert "presentAddress" not in payload["candidate"]
+
+
+def test_candidate_id_without_candidate_object():
+    payload = template([]).build(**APPLICANT, candidate_id="c-1")
+    assert payload["candidateId"] == "c-1"
+    assert "candidate" not in payload
+    payload = template([], requires_candidate_object=True).build(**APPLICANT, candidate_id="c-1")
+    assert payload["candidate"]["firstName"] == "Ada"
+
+
+def test_unknown_field_paths_are_rejected():
+    with pytest.raises(ConfigError):
+        template(["candidate.nickname"])
@@ -0,0 +1,68 @@
+import pytest
+
+from ratelimit import MIN_RATE, TokenBucket, parse_retry_after
+
+
+def test_burst_then_paced():
+    bucket = TokenBucket(rate=10, burst=3)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1, abs=0.01)
+    assert waits[4] == pytest.approx(0.2, abs=0.01)
+
+
+def test_throttle_halves_rate_and_shrinks_burst():
+    bucket = TokenBucket(rate=10, burst=20)
+    bucket.throttle()
+    assert bucket.rate == 5
+    assert bucket.burst == 5
+    assert bucket.tokens <= 0
+
+
+def test_repeated_throttle_stops_at_min_rate():
+    bucket = TokenBucket(rate=1)
+    for _ in range(20):
+        bucket.paused_until = 0.0
+        bucket.throttle()
+    assert bucket.rate == MIN_RATE
+
+
+def test_recover_restores_configured_rate_and_burst():
+    bucket = TokenBucket(rate=10, burst=20)
+    bucket.throttle()
+    bucket.recover()
+    assert 5 < bucket.rate < 10
+    assert bucket.burst == bucket.rate
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == 10
+    assert bucket.burst == 20
+
+
+def test_throttle_without_configured_rate_uses_observed_rate():
+    bucket = TokenBucket()
+    for _ in range(8):
+        assert bucket.reserve() == 0.0
+    bucket.throttle()
+    assert bucket.rate == 4
+    for _ in range(1000):
+        bucket.recover()
+    # No configured ceiling: recovery keeps raising the rate
+    assert bucket.rate > 100
+
+
+def test_cancel_returns_token_and_never_goes_negative():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.reserve() == 0.0
+    bucket.cancel()
+    assert bucket.reserve() == 0.0
+    bucket.cancel()
+    bucket.cancel()
+    assert bucket._window_count == 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
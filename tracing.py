@@ -0,0 +1,319 @@
+"""
+Per-request tracing of application submissions
+
+A Tracer turns each create_application call into a span whose time is split
+into phases:
+
+    build       payload building (templates, attachments)
+    serialize   JSON encoding of the body
+    rate_limit  waiting for a rate-limit token or Retry-After
+    connect     DNS + TCP + TLS for a new connection (absent when pooled)
+    server      request sent until the response headers arrived
+    download    reading the response body
+    parse       decoding the response JSON
+    backoff     sleeping between retries
+
+Phases repeat across retries and are summed in span.timings. Hook objects
+are called at before_build, after_serialize, on_response and on_error, and
+finished spans go to an exporter: FileSpanExporter appends OTLP/JSON lines
+that the OpenTelemetry Collector (otlpjsonfile receiver) and most tracing
+backends can import. Without a tracer the creators skip all of this.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+HOOKS = ("before_build", "after_serialize", "on_response", "on_error")
+
+# Phases spent on the wire rather than in this process
+NETWORK_PHASES = ("connect", "server", "download")
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """
+    One traced application submission
+
+    Phase intervals are measured with perf_counter_ns and mapped onto the
+    wall clock captured at start, so they stay monotonic within the span.
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.phases: List[Tuple[str, int, int]] = []
+        self.timings: Dict[str, float] = {}
+        self.events: List[Tuple[str, int, Dict[str, Any]]] = []
+        self.error: Optional[str] = None
+        self._start_perf = time.perf_counter_ns()
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def wall_ns(self, perf_ns: int) -> int:
+        """Convert a perf_counter_ns reading into Unix nanoseconds"""
+        return self.start_ns + perf_ns - self._start_perf
+
+    def add_phase(self, phase: str, start: int, end: Optional[int] = None) -> int:
+        """
+        Record that phase ran from start to end (perf_counter_ns; end defaults to now)
+
+        Returns:
+            end, so consecutive phases can chain
+        """
+        if end is None:
+            end = time.perf_counter_ns()
+        self.phases.append((phase, start, end))
+        self.timings[phase] = self.timings.get(phase, 0.0) + (end - start) / 1e9
+        return end
+
+    def add_event(self, name: str, **attributes):
+        self.events.append((name, time.time_ns(), attributes))
+
+    def set_error(self, error: str):
+        self.error = error
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = self.wall_ns(time.perf_counter_ns())
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (or to now while open)"""
+        end = self.end_ns if self.end_ns is not None else self.wall_ns(time.perf_counter_ns())
+        return (end - self.start_ns) / 1e9
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict]:
+    return [{"key": key, "value": _otlp_value(value)}
+            for key, value in attributes.items() if value is not None]
+
+
+def otlp_spans(span: Span) -> List[Dict]:
+    """The span and one child span per phase interval, as OTLP/JSON span objects"""
+    attributes = dict(span.attributes)
+    for phase, seconds in span.timings.items():
+        attributes[f"knit.phase.{phase}_ms"] = round(seconds * 1000, 3)
+    spans = [{
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": SPAN_KIND_CLIENT,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(attributes),
+        "events": [{"timeUnixNano": str(at), "name": name, "attributes": _otlp_attributes(attrs)}
+                   for name, at, attrs in span.events],
+        "status": ({"code": STATUS_ERROR, "message": span.error} if span.error
+                   else {"code": STATUS_OK})
+    }]
+    for phase, start, end in span.phases:
+        spans.append({
+            "traceId": span.trace_id,
+            "spanId": os.urandom(8).hex(),
+            "parentSpanId": span.span_id,
+            "name": phase,
+            "kind": SPAN_KIND_CLIENT if phase in NETWORK_PHASES else SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.wall_ns(start)),
+            "endTimeUnixNano": str(span.wall_ns(end)),
+            "status": {"code": STATUS_OK}
+        })
+    return spans
+
+
+class FileSpanExporter:
+    """
+    Append finished spans to a file as OTLP/JSON, one export request per line
+
+    Lines are buffered and written every batch_size spans (and on flush/close),
+    so exporting costs no I/O per request.
+    """
+
+    def __init__(self, path: str, service_name: str = "knit-apply", batch_size: int = 64):
+        """
+        Args:
+            path: File to append to
+            service_name: Value of the service.name resource attribute
+            batch_size: Spans per written line
+        """
+        self.path = path
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.extend(otlp_spans(span))
+            if len(self._buffer) >= self.batch_size:
+                self._write()
+
+    def _write(self):
+        if not self._buffer:
+            return
+        request = {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": "knit.apply"}, "spans": self._buffer}]
+        }]}
+        self._file.write(json.dumps(request, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        with self._lock:
+            self._write()
+            self._file.close()
+
+
+class Tracer:
+    """
+    Creates spans, dispatches hooks and hands finished spans to an exporter
+
+    Hooks are objects with any of before_build(span), after_serialize(span,
+    body), on_response(span, response) and on_error(span, error); they run
+    on the submitting thread (or event loop), so keep them cheap. Hook
+    exceptions propagate to the caller.
+    """
+
+    def __init__(self, hooks: Iterable[Any] = (), exporter: Optional[Any] = None):
+        """
+        Args:
+            hooks: Hook objects, called in order
+            exporter: Object with export(span), e.g. FileSpanExporter
+        """
+        self.exporter = exporter
+        hooks = list(hooks)
+        self._hooks = {name: [getattr(hook, name) for hook in hooks if hasattr(hook, name)]
+                       for name in HOOKS}
+
+    def start(self, ats_name: str, job_id: str) -> Span:
+        return Span("ats.application.create", {"knit.ats": ats_name, "knit.job_id": job_id})
+
+    def before_build(self, span: Span):
+        for hook in self._hooks["before_build"]:
+            hook(span)
+
+    def after_serialize(self, span: Span, body: Optional[bytes]):
+        for hook in self._hooks["after_serialize"]:
+            hook(span, body)
+
+    def on_response(self, span: Span, response: Any):
+        for hook in self._hooks["on_response"]:
+            hook(span, response)
+
+    def on_error(self, span: Span, error: BaseException):
+        span.add_event("exception", **{"exception.type": type(error).__name__,
+                                       "exception.message": str(error)})
+        for hook in self._hooks["on_error"]:
+            hook(span, error)
+
+    def finish(self, span: Span, result: Dict):
+        """End the span with the outcome of the call and export it"""
+        success = result.get("success")
+        if not (success is True or success == "true"):
+            span.set_error(str(result.get("error") or "application not created"))
+        span.end()
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+# Connection setup of the calling thread: a list of (start, end) perf_counter_ns
+_connects = threading.local()
+
+
+def take_connect_time() -> Optional[Tuple[int, int]]:
+    """Pop the most recent connection setup made by this thread, if any"""
+    timings = getattr(_connects, "timings", None)
+    if not timings:
+        return None
+    timing = timings[-1]
+    timings.clear()
+    return timing
+
+
+def _record_connect(start: int):
+    timings = getattr(_connects, "timings", None)
+    if timings is None:
+        timings = _connects.timings = []
+    timings.append((start, time.perf_counter_ns()))
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter_ns()
+        super().connect()
+        _record_connect(start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter_ns()
+        super().connect()
+        _record_connect(start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def time_connections(adapter):
+    """
+    Make a requests HTTPAdapter record connection setup for take_connect_time()
+
+    Only connections opened after this call are timed.
+    """
+    adapter.poolmanager.pool_classes_by_scheme = {
+        "http": _TimedHTTPConnectionPool,
+        "https": _TimedHTTPSConnectionPool
+    }
+
+
+def aiohttp_trace_config():
+    """
+    aiohttp TraceConfig adding a 'connect' phase to the span passed as
+    trace_request_ctx
+    """
+    import aiohttp
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter_ns()
+
+    async def on_connection_create_end(session, context, params):
+        span = context.trace_request_ctx
+        if isinstance(span, Span):
+            span.add_phase("connect", context.connect_started)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config